@@ -0,0 +1,161 @@
+# kfantrix_api.py - 헤드리스 JSON API
+# 대시보드와 같은 로더(저장소 → 공유 캐시 CSV)로 그룹 분석 테이블을 JSON 으로 제공.
+# 응답 본문은 (그룹, 테이블, 데이터 버전) 키 LRU 에 직렬화된 채로 두고,
+# ETag 가 같으면 테이블을 읽지 않고 304 로 응답한다.
+#
+# GET /groups
+# GET /groups/{prefix}/{endpoint}?limit=N
+#   endpoint: summary, members, cooccurrence, loyal-fans, region-keywords, marketing
+# GET /insights  (전체 그룹·지역 마케팅 인사이트)
+
+import argparse
+import hashlib
+import threading
+from collections import OrderedDict
+
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+
+from kfantrix_cache import SharedTableCache, load_table, table_source
+from kfantrix_insight import load_insights, source_versions
+from kfantrix_store import STORE_DIR
+
+GROUPS = {'plave': 'PLAVE', 'nmixx': 'NMIXX', 'skz': 'Stray Kids'}
+ENDPOINTS = {
+    'summary': 'summary',
+    'members': 'member',
+    'cooccurrence': 'cooccurrence',
+    'loyal-fans': 'loyal_fans',
+    'region-keywords': 'region_keywords',
+    'marketing': 'member_region_keywords'
+}
+MAX_RESPONSES = 128
+
+
+class ResponseCache:
+    """직렬화된 응답 본문 LRU (ETag 키, 스레드 안전)"""
+
+    def __init__(self, maxsize=MAX_RESPONSES):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def get(self, key, render):
+        """key 의 본문. 없으면 render() 결과를 저장 (None 이면 저장하지 않음)"""
+        with self._lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return self.entries[key]
+        body = render()
+        if body is None:
+            return None
+        with self._lock:
+            self.misses += 1
+            self.entries[key] = body
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+        return body
+
+    def stats(self):
+        return {'responses': len(self.entries), 'hits': self.hits, 'misses': self.misses}
+
+
+def make_etag(*parts):
+    return '"' + hashlib.sha1(repr(parts).encode('utf-8')).hexdigest()[:16] + '"'
+
+
+def not_modified(request, etag):
+    tags = request.headers.get('if-none-match', '')
+    return etag in [t.strip() for t in tags.split(',')] or tags.strip() == '*'
+
+
+# ============================================================
+# 앱
+# ============================================================
+def create_app(store_dir=STORE_DIR, src_dir='.', cache_dir=None, maxsize=MAX_RESPONSES):
+    """API 앱 생성. 테이블 읽기·직렬화는 스레드 풀에서 돌려 이벤트 루프를 막지 않는다"""
+    tables = SharedTableCache(cache_dir)
+    responses = ResponseCache(maxsize)
+
+    def render(prefix, key, source, limit):
+        df = load_table(prefix, key, source, tables, store_dir, src_dir)
+        if df is None:
+            return None
+        if limit:
+            df = df.head(limit)
+        if key == 'summary':
+            return df.iloc[0].to_json(force_ascii=False).encode('utf-8')
+        return df.to_json(orient='records', force_ascii=False).encode('utf-8')
+
+    async def groups(request):
+        return JSONResponse([{'prefix': prefix, 'name': name} for prefix, name in GROUPS.items()])
+
+    async def table(request):
+        prefix = request.path_params['prefix']
+        endpoint = request.path_params['endpoint']
+        if prefix not in GROUPS or endpoint not in ENDPOINTS:
+            return JSONResponse({'error': 'not found'}, status_code=404)
+        limit = request.query_params.get('limit')
+        if limit is not None and not limit.isdigit():
+            return JSONResponse({'error': 'limit must be a positive integer'}, status_code=400)
+        limit = int(limit) if limit else None
+
+        key = ENDPOINTS[endpoint]
+        source, version = await run_in_threadpool(table_source, prefix, key, store_dir, src_dir)
+        if version is None:
+            return JSONResponse({'error': f'{prefix} {endpoint} 데이터 없음'}, status_code=404)
+        etag = make_etag(prefix, key, source, version, limit)
+        headers = {'ETag': etag, 'Cache-Control': 'no-cache'}
+        if not_modified(request, etag):
+            return Response(status_code=304, headers=headers)
+
+        body = await run_in_threadpool(responses.get, etag, lambda: render(prefix, key, source, limit))
+        if body is None:
+            return JSONResponse({'error': f'{prefix} {endpoint} 데이터 없음'}, status_code=404)
+        return Response(body, media_type='application/json', headers=headers)
+
+    async def insights(request):
+        versions = await run_in_threadpool(source_versions, list(GROUPS), store_dir, src_dir)
+        etag = make_etag('insights', versions)
+        headers = {'ETag': etag, 'Cache-Control': 'no-cache'}
+        if not_modified(request, etag):
+            return Response(status_code=304, headers=headers)
+        body = await run_in_threadpool(responses.get, etag, lambda: load_insights(
+            list(GROUPS), store_dir, src_dir, tables).to_json(orient='records', force_ascii=False).encode('utf-8'))
+        return Response(body, media_type='application/json', headers=headers)
+
+    async def stats(request):
+        return JSONResponse(responses.stats())
+
+    return Starlette(routes=[
+        Route('/groups', groups),
+        Route('/groups/{prefix}/{endpoint}', table),
+        Route('/insights', insights),
+        Route('/stats', stats)
+    ])
+
+
+def main():
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description='KFANTRIX JSON API 서버')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8600)
+    parser.add_argument('--store-dir', default=STORE_DIR)
+    parser.add_argument('--src-dir', default='.')
+    parser.add_argument('--cache-dir', help='공유 테이블 캐시 경로')
+    parser.add_argument('--max-responses', type=int, default=MAX_RESPONSES)
+    args = parser.parse_args()
+
+    app = create_app(args.store_dir, args.src_dir, args.cache_dir, args.max_responses)
+    uvicorn.run(app, host=args.host, port=args.port)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,11 +1,30 @@
 # kfantrix_app.py - KFANTRIX 통합 대시보드
 # 채널 기본 지표 + 3개 그룹 심층 분석
 
+import json
+import os
+
 import streamlit as st
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
-from datetime import datetime
+from datetime import date, datetime
+
+import kfantrix_figures as figures
+from kfantrix_cache import CHANNEL_FILE, SharedTableCache, file_stamp, load_table, table_source
+from kfantrix_cube import cube_version, load_cube
+from kfantrix_export import MIME_TYPES, available_formats, slice_export, table_export
+from kfantrix_figcache import FigureCache, channel_version, group_version
+from kfantrix_insight import CATEGORY_LABELS, compute_insights, load_insights, source_versions
+from kfantrix_loyalty import load_loyalty, loyalty_version
+from kfantrix_pipeline import format_top
+from kfantrix_overlap import jaccard_matrix, load_overlap, overlap_table, overlap_version, signatures
+from kfantrix_profile import Profiler, RunLog, env_enabled, memory_enabled, summarize
+from kfantrix_search import SearchIndex, index_version
+from kfantrix_store import keywords_version, load_keywords, read_manifest
+from kfantrix_timeseries import METRIC_LABELS, growth, read_rollup, timeseries_version
+from kfantrix_topk import RAW_CATEGORY
+from kfantrix_videos import COLUMN_LABELS, PAGE_SIZE, SORT_COLUMNS, VideoIndex, page_count
 
 # ============================================================
 # 페이지 설정
@@ -77,36 +96,147 @@ st.markdown("""
 # ============================================================
 # 데이터 로드
 # ============================================================
+# 레플리카 공유 캐시 (KFANTRIX_CACHE_DIR 또는 /dev/shm/kfantrix)
+shared_cache = SharedTableCache()
+
+# 프로파일링 (서버를 KFANTRIX_PROFILE=1 로 띄웠을 때만 기록, 방문자가 켤 수 없음)
+# 메모리는 KFANTRIX_PROFILE_MEMORY=1 일 때만 (tracemalloc 이 프로세스 전체를 느리게 하므로)
+profiler = Profiler(env_enabled(), memory=memory_enabled())
+
+@st.cache_resource
+def profile_log():
+    """세션 간 공유 실행 기록 (+ JSONL 로그 파일)"""
+    return RunLog()
+
 @st.cache_data
-def load_channel_data():
-    """채널 기본 지표 로드"""
+def load_channel_data(version):
+    """채널 기본 지표 로드 (version 은 원본 파일 스탬프, 바뀌면 다시 읽음)"""
     try:
-        return pd.read_csv('channels_data.csv')
+        return shared_cache.read_csv(CHANNEL_FILE)
     except:
         return None
 
 @st.cache_data
-def load_deep_analysis(prefix):
-    """심층 분석 데이터 로드"""
-    data = {}
-    files = {
-        'summary': f'{prefix}_summary.csv',
-        'language': f'{prefix}_language_stats.csv',
-        'member': f'{prefix}_member_stats.csv',
-        'region_member': f'{prefix}_region_member.csv',
-        'cooccurrence': f'{prefix}_member_cooccurrence.csv',
-        'member_keywords': f'{prefix}_member_keywords.csv',
-        'region_keywords': f'{prefix}_region_keywords.csv',
-        'member_region_keywords': f'{prefix}_member_region_keywords.csv',
-        'loyal_fans': f'{prefix}_loyal_fans.csv',
-        'video_engagement': f'{prefix}_video_engagement.csv'
-    }
-    for key, filename in files.items():
-        try:
-            data[key] = pd.read_csv(filename)
-        except:
-            data[key] = None
-    return data
+def load_channel_rollup(level, start, version):
+    """채널 지표 롤업 로드 (스냅샷 원본은 읽지 않음, version 은 시계열 메타 스탬프)"""
+    return read_rollup(level, start=start)
+
+@st.cache_data
+def load_deep_table(prefix, key, source, version):
+    """심층 분석 테이블 하나 로드 (컬럼형 저장소 우선, 없으면 공유 캐시 경유 CSV)"""
+    return load_table(prefix, key, source, shared_cache)
+
+class DeepData:
+    """그룹 심층 분석 데이터 - 페이지가 실제로 접근하는 테이블만 로드"""
+    def __init__(self, prefix):
+        self.prefix = prefix
+        self._tables = {}
+        self._manifest = None
+    
+    def __getitem__(self, key):
+        if key not in self._tables:
+            if self._manifest is None:
+                self._manifest = read_manifest(self.prefix) or {}
+            source, version = table_source(self.prefix, key, manifest=self._manifest)
+            with profiler.section('load', f'{self.prefix}.{key}'):
+                self._tables[key] = load_deep_table(self.prefix, key, source, version)
+        return self._tables[key]
+    
+    def override(self, tables):
+        """필터된 테이블로 교체 (이번 실행에서만 유효)"""
+        self._tables.update(tables)
+
+@st.cache_data
+def load_marketing_insights(versions):
+    """전체 그룹·지역 마케팅 인사이트 (versions 는 입력 테이블 버전, 바뀌면 다시 계산)"""
+    return load_insights(cache=shared_cache)
+
+@st.cache_resource
+def load_cube_index(prefix, version):
+    """롤업 큐브 로드 (version 이 바뀌면 다시 읽음, 없으면 None)"""
+    return load_cube(prefix)
+
+@st.cache_resource
+def load_loyalty_index(prefix, version):
+    """충성도 인덱스 로드 (version 이 바뀌면 다시 읽음, 없으면 None)"""
+    return load_loyalty(prefix)
+
+@st.cache_resource
+def load_overlap_index(prefix, version):
+    """팬 중복도 서명 인덱스 로드 (version 이 바뀌면 다시 읽음, 없으면 None)"""
+    return load_overlap(prefix)
+
+@st.cache_resource
+def load_video_index(prefix, version, _df):
+    """영상 정렬·필터 인덱스 (정렬 순서 캐시 포함, version 이 바뀌면 다시 만듦)"""
+    return VideoIndex.from_frame(_df)
+
+@st.cache_resource
+def load_search_index(prefix, version):
+    """키워드 역색인 로드 (세그먼트가 추가되면 다시 읽음, 없으면 None)"""
+    return SearchIndex(prefix) if version else None
+
+@st.cache_resource
+def load_keyword_index(prefix, version):
+    """키워드 heavy hitter 요약 로드 (version 이 바뀌면 다시 읽음, 없으면 None)"""
+    return load_keywords(prefix)
+
+@st.cache_data
+def keyword_tables(_keywords, _data, scope, k, start=None, end=None):
+    """키워드 요약에서 멤버/국가 키워드 테이블을 원하는 k 로 다시 만들기
+    (scope 는 (그룹, 페이지, 데이터 버전, 기간, 영상), scope/k 가 같으면 다시 merge 하지 않음)"""
+    keywords, data = _keywords, _data
+    def top(category, n, **filters):
+        return format_top(keywords.summary(category, start=start, end=end, **filters), n)
+    
+    tables = {}
+    if data['member_keywords'] is not None:
+        df = data['member_keywords'].copy()
+        for cat in ['visual', 'talent', 'personality', 'love']:
+            df[f'top_{cat}'] = [top(cat, k, member=m) for m in df['member']]
+        df['top_raw_words'] = [top(RAW_CATEGORY, k * 2, member=m) for m in df['member']]
+        tables['member_keywords'] = df
+    if data['region_keywords'] is not None:
+        df = data['region_keywords'].copy()
+        for cat in ['visual', 'talent', 'love']:
+            df[f'top_{cat}'] = [top(cat, k, region=r) for r in df['region']]
+        df['top_raw_words'] = [top(RAW_CATEGORY, k * 2, region=r) for r in df['region']]
+        tables['region_keywords'] = df
+    return tables
+
+@st.cache_resource
+def figure_cache():
+    """세션 간 공유 그림 캐시"""
+    return FigureCache()
+
+def show_figure(key, build):
+    """(그룹, 페이지, 선택, 데이터 버전) 키로 캐시된 그림 표시. 없을 때만 build() 실행"""
+    # 프로파일 구간 이름은 키에서 처음 나오는 식별자형 문자열 (예: 'member_mentions')
+    name = next((k for k in key[1:] if isinstance(k, str) and k.isidentifier()), '')
+    with profiler.section('figure', name):
+        fig = figure_cache().get(key, build)
+    with profiler.section('send', name):
+        st.plotly_chart(fig, use_container_width=True)
+
+def read_file(path):
+    """내보낸 파일 내용 (다운로드 버튼용, 읽고 바로 닫는다)"""
+    with open(path, 'rb') as f:
+        return f.read()
+
+SEARCH_LIMIT = 100  # 검색 탭에 보여줄 댓글 수 (좋아요 순 상위)
+
+def show_comments(hits):
+    """검색된 댓글 목록"""
+    if hits.empty:
+        st.info("해당 키워드가 포함된 댓글이 없습니다.")
+        return
+    hits = hits.assign(members=hits['members'].str.join(', '))
+    st.dataframe(
+        hits[['date', 'region', 'members', 'likes', 'text']].rename(columns={
+            'date': '날짜', 'region': '국가', 'members': '언급 멤버', 'likes': '좋아요', 'text': '댓글'
+        }),
+        use_container_width=True, hide_index=True
+    )
 
 # 그룹별 데이터 로드
 GROUPS = {
@@ -115,8 +245,9 @@ GROUPS = {
     'Stray Kids': {'prefix': 'skz', 'color': '#F59E0B', 'emoji': '🖤'}
 }
 
-channel_data = load_channel_data()
-deep_data = {name: load_deep_analysis(info['prefix']) for name, info in GROUPS.items()}
+with profiler.section('load', 'channel'):
+    channel_data = load_channel_data(file_stamp(CHANNEL_FILE))
+deep_data = {name: DeepData(info['prefix']) for name, info in GROUPS.items()}
 
 # ============================================================
 # 사이드바
@@ -150,9 +281,38 @@ with st.sidebar:
         st.markdown("### 📑 분석 메뉴")
         deep_menu = st.radio(
             "상세 분석",
-            ["📊 전체 요약", "💑 멤버 케미", "🏷️ 키워드 분석", "💜 진성팬 분석", "🎯 마케팅 인사이트"],
+            ["📊 전체 요약", "💑 멤버 케미", "🏷️ 키워드 분석", "💜 진성팬 분석", "🎯 마케팅 인사이트", "🎬 영상 분석"],
             label_visibility="collapsed"
         )
+        
+        # 롤업 큐브 / 충성도 인덱스가 있으면 기간·영상 필터
+        prefix = GROUPS[selected_group]['prefix']
+        with profiler.section('load', f'{prefix}.indexes'):
+            cube = load_cube_index(prefix, cube_version(prefix))
+            loyalty = load_loyalty_index(prefix, loyalty_version(prefix))
+            search = load_search_index(prefix, index_version(prefix))
+            keywords = load_keyword_index(prefix, keywords_version(prefix))
+        period, videos = None, []
+        first = last = None
+        if cube is not None:
+            first, last = cube.date_range()
+        elif loyalty is not None and loyalty.cells:
+            first, last = loyalty.dates()[0], loyalty.dates()[-1]
+        
+        if first:
+            st.divider()
+            st.markdown("### 📅 기간 필터")
+            first, last = date.fromisoformat(first), date.fromisoformat(last)
+            picked = st.date_input("기간", (first, last), min_value=first, max_value=last,
+                                   label_visibility="collapsed")
+            if len(picked) == 2 and tuple(picked) != (first, last):
+                period = tuple(d.isoformat() for d in picked)
+        if cube is not None:
+            video_table = deep_data[selected_group]['video_engagement']
+            titles = {} if video_table is None else dict(zip(video_table['video_id'], video_table['video_title']))
+            videos = st.multiselect("🎬 영상", cube.videos(), format_func=lambda v: titles.get(v, v))
+            if videos and (loyalty is not None or keywords is not None):
+                st.caption("고유 작성자·진성팬·키워드 지표는 기간 필터만 반영됩니다.")
     
     st.divider()
     st.markdown("### 💡 서비스 안내")
@@ -180,6 +340,7 @@ if analysis_mode == "📈 채널 기본 지표":
         st.stop()
     
     df = channel_data
+    scope = ('channel', channel_version())
     
     # 핵심 메트릭
     col1, col2, col3, col4, col5 = st.columns(5)
@@ -200,48 +361,88 @@ if analysis_mode == "📈 채널 기본 지표":
     col_left, col_right = st.columns(2)
     
     with col_left:
-        fig1 = px.bar(
-            df.sort_values('subscribers', ascending=True),
-            x='subscribers', y='artist', orientation='h',
-            color='artist', color_discrete_sequence=px.colors.qualitative.Set2,
-            title='구독자 수 비교'
-        )
-        fig1.update_layout(showlegend=False, xaxis_title='구독자', yaxis_title='')
-        st.plotly_chart(fig1, use_container_width=True)
+        def build_subscribers():
+            fig1 = px.bar(
+                df.sort_values('subscribers', ascending=True),
+                x='subscribers', y='artist', orientation='h',
+                color='artist', color_discrete_sequence=px.colors.qualitative.Set2,
+                title='구독자 수 비교'
+            )
+            fig1.update_layout(showlegend=False, xaxis_title='구독자', yaxis_title='')
+            return fig1
+        show_figure(scope + ('subscribers',), build_subscribers)
     
     with col_right:
-        fig2 = px.bar(
-            df.sort_values('engagement_rate', ascending=True),
-            x='engagement_rate', y='artist', orientation='h',
-            color='artist', color_discrete_sequence=px.colors.qualitative.Set2,
-            title='참여도 비교'
-        )
-        fig2.update_layout(showlegend=False, xaxis_title='참여도 (%)', yaxis_title='')
-        st.plotly_chart(fig2, use_container_width=True)
+        def build_engagement():
+            fig2 = px.bar(
+                df.sort_values('engagement_rate', ascending=True),
+                x='engagement_rate', y='artist', orientation='h',
+                color='artist', color_discrete_sequence=px.colors.qualitative.Set2,
+                title='참여도 비교'
+            )
+            fig2.update_layout(showlegend=False, xaxis_title='참여도 (%)', yaxis_title='')
+            return fig2
+        show_figure(scope + ('engagement',), build_engagement)
     
     # 레이더 차트
     st.markdown("### 🎯 종합 스코어")
     categories = ['구독자', '평균조회수', '참여도', '팬덤활성도']
     
-    fig_radar = go.Figure()
-    for _, row in df.iterrows():
-        values = [
-            row['subscribers'] / df['subscribers'].max(),
-            row['avg_views'] / df['avg_views'].max(),
-            row['engagement_rate'] / df['engagement_rate'].max(),
-            row['fandom_activity'] / df['fandom_activity'].max()
-        ]
-        values.append(values[0])
-        fig_radar.add_trace(go.Scatterpolar(
-            r=values, theta=categories + [categories[0]],
-            fill='toself', name=row['artist'], opacity=0.7
-        ))
-    fig_radar.update_layout(
-        polar=dict(radialaxis=dict(visible=True, range=[0, 1])),
-        showlegend=True,
-        legend=dict(orientation="h", yanchor="bottom", y=-0.3, xanchor="center", x=0.5)
-    )
-    st.plotly_chart(fig_radar, use_container_width=True)
+    def build_radar():
+        fig_radar = go.Figure()
+        for _, row in df.iterrows():
+            values = [
+                row['subscribers'] / df['subscribers'].max(),
+                row['avg_views'] / df['avg_views'].max(),
+                row['engagement_rate'] / df['engagement_rate'].max(),
+                row['fandom_activity'] / df['fandom_activity'].max()
+            ]
+            values.append(values[0])
+            fig_radar.add_trace(go.Scatterpolar(
+                r=values, theta=categories + [categories[0]],
+                fill='toself', name=row['artist'], opacity=0.7
+            ))
+        fig_radar.update_layout(
+            polar=dict(radialaxis=dict(visible=True, range=[0, 1])),
+            showlegend=True,
+            legend=dict(orientation="h", yanchor="bottom", y=-0.3, xanchor="center", x=0.5)
+        )
+        return fig_radar
+    show_figure(scope + ('radar',), build_radar)
+    
+    # 시계열 추이 (store/channels 롤업)
+    st.markdown("### 📈 성장 추이")
+    ts_version = timeseries_version()
+    if ts_version is None:
+        st.info("💡 채널 스냅샷 이력이 없습니다. `python kfantrix_timeseries.py append channels_data.csv` 로 수집분을 쌓아주세요.")
+    else:
+        col_a, col_b, col_c = st.columns(3)
+        with col_a:
+            ts_level = st.radio("단위", ['day', 'week', 'hour'], horizontal=True, key='ts_level',
+                                format_func={'hour': '시간', 'day': '일', 'week': '주'}.get)
+        with col_b:
+            ts_metric = st.selectbox("지표", list(METRIC_LABELS), key='ts_metric',
+                                     format_func=METRIC_LABELS.get)
+        with col_c:
+            ts_days = st.selectbox("기간", [30, 90, 180, 365, 0], index=1, key='ts_days',
+                                   format_func=lambda d: f"최근 {d}일" if d else "전체")
+        ts_start = (pd.Timestamp.now().normalize() - pd.Timedelta(days=ts_days)) if ts_days else None
+        with profiler.section('load', f'channel.rollup.{ts_level}'):
+            df_ts = load_channel_rollup(ts_level, ts_start, ts_version)
+        if df_ts['bucket'].nunique() < 2:
+            st.info(f"💡 선택한 기간에 수집 구간이 {df_ts['bucket'].nunique()}개뿐이라 추이를 그릴 수 없습니다.")
+        else:
+            label = METRIC_LABELS[ts_metric]
+            ts_key = (ts_version, ts_level, ts_days, ts_metric)
+            df_growth = growth(df_ts, ts_metric)
+            col_left, col_right = st.columns([3, 2])
+            with col_left:
+                show_figure(('channel', 'channel_growth') + ts_key, lambda: figures.channel_growth(df_ts, ts_metric, label))
+            with col_right:
+                show_figure(('channel', 'channel_delta') + ts_key, lambda: figures.channel_delta(df_growth, label))
+            st.dataframe(df_growth.rename(columns={
+                'artist': '아티스트', 'first': '시작', 'last': '마지막', 'delta': '변화량', 'growth_rate': '증가율 (%)'
+            }), use_container_width=True, hide_index=True)
     
     # 데이터 테이블
     st.markdown("### 📋 상세 데이터")
@@ -260,7 +461,33 @@ elif analysis_mode == "🔬 심층 댓글 분석":
         st.warning(f"⚠️ {selected_group} 데이터를 찾을 수 없습니다. {group_info['prefix']}_*.csv 파일을 업로드해주세요.")
         st.stop()
     
-    summary = data['summary'].iloc[0]
+    summary = data['summary'].iloc[0].copy()
+    
+    # 기간/영상 필터 적용 (큐브 슬라이스로 테이블 교체)
+    # 슬라이스하지 못한 테이블은 전체 기간 값 그대로 → 화면에 '전체 기준' 표시
+    start, end = period or (None, None)
+    sliced = set()
+    if cube is not None and (period or videos):
+        with profiler.section('transform', 'cube_filter'):
+            tables = cube.tables(start, end, videos, keywords)
+            data.override(tables)
+            sliced.update(tables)
+            for key, value in cube.summary(start, end, videos).items():
+                summary[key] = value
+    if loyalty is not None and period:
+        # 진성팬은 작성자 × 날짜 기준이라 영상 필터는 반영하지 못함
+        for key, value in loyalty.summary(start, end).items():
+            summary[key] = value
+        data.override({'loyal_fans': loyalty.member_tiers(start, end)})
+        if not videos:
+            sliced.add('loyal_fans')
+    
+    def unsliced_note(*keys):
+        """필터가 걸렸는데 슬라이스하지 못한 항목이면 전체 기준이라고 표시"""
+        if (period or videos) and not sliced.issuperset(keys):
+            st.caption("⚠️ 기간/영상 필터가 반영되지 않은 전체 기준 값입니다.")
+    
+    scope = (group_info['prefix'], deep_menu, group_version(group_info['prefix']), start, end, tuple(videos))
     
     # -------------------- 📊 전체 요약 --------------------
     if deep_menu == "📊 전체 요약":
@@ -275,29 +502,25 @@ elif analysis_mode == "🔬 심층 댓글 분석":
             st.metric("진성팬 비율", f"{summary['loyal_fan_rate']}%")
         with col5:
             st.metric("슈퍼팬 비율", f"{summary['super_fan_rate']}%")
+        if loyalty is not None:
+            unsliced_note('loyal_fans')
         
         col_left, col_right = st.columns(2)
         
         with col_left:
             st.markdown("### 🌐 언어 분포")
             if data['language'] is not None:
-                fig = px.pie(data['language'].head(8), values='percentage', names='region',
-                           color_discrete_sequence=px.colors.sequential.Purples_r, hole=0.4)
-                st.plotly_chart(fig, use_container_width=True)
+                show_figure(scope + ('language',), lambda: figures.language(data['language']))
         
         with col_right:
             st.markdown("### 👥 멤버 언급 비율")
             if data['member'] is not None:
-                df_mem = data['member'].sort_values('mention_count', ascending=True)
-                fig = px.bar(df_mem, x='mention_count', y='member', orientation='h',
-                           color='mention_rate', color_continuous_scale='Purples', text='mention_rate')
-                fig.update_traces(texttemplate='%{text:.1f}%', textposition='outside')
-                fig.update_layout(coloraxis_showscale=False)
-                st.plotly_chart(fig, use_container_width=True)
+                show_figure(scope + ('member_mentions',), lambda: figures.member_mentions(data['member']))
         
         # 케미 TOP 3
         if data['cooccurrence'] is not None and len(data['cooccurrence']) > 0:
             st.markdown("### 💑 인기 케미 TOP 3")
+            unsliced_note('cooccurrence')
             cols = st.columns(3)
             for idx, (col, (_, row)) in enumerate(zip(cols, data['cooccurrence'].head(3).iterrows())):
                 with col:
@@ -306,31 +529,20 @@ elif analysis_mode == "🔬 심층 댓글 분석":
     # -------------------- 💑 멤버 케미 --------------------
     elif deep_menu == "💑 멤버 케미":
         st.markdown("### 💑 멤버 동시 언급 분석")
+        unsliced_note('cooccurrence', 'member')
         
         if data['cooccurrence'] is not None and len(data['cooccurrence']) > 0:
             col_left, col_right = st.columns(2)
             
             with col_left:
-                fig = px.bar(data['cooccurrence'].head(10), x='pair', y='count',
-                           color='count', color_continuous_scale='Purples', text='count')
-                fig.update_traces(textposition='outside')
-                fig.update_layout(coloraxis_showscale=False, title='동시 언급 순위')
-                st.plotly_chart(fig, use_container_width=True)
+                show_figure(scope + ('cooc_rank',), lambda: figures.cooc_rank(data['cooccurrence']))
             
             with col_right:
                 # 히트맵
                 if data['member'] is not None:
-                    members = data['member']['member'].tolist()
-                    matrix = pd.DataFrame(0, index=members, columns=members)
-                    for _, row in data['cooccurrence'].iterrows():
-                        m1, m2 = row['member_1'], row['member_2']
-                        if m1 in members and m2 in members:
-                            matrix.loc[m1, m2] = row['count']
-                            matrix.loc[m2, m1] = row['count']
-                    fig = px.imshow(matrix.values, x=members, y=members,
-                                  color_continuous_scale='Purples', text_auto=True)
-                    fig.update_layout(title='케미 히트맵')
-                    st.plotly_chart(fig, use_container_width=True)
+                    metric = st.radio("케미 지표", list(figures.COOC_METRICS), horizontal=True)
+                    show_figure(scope + ('cooc_heatmap', metric), lambda: figures.cooc_heatmap(
+                        data['member'], data['cooccurrence'], summary['total_comments'], metric))
             
             top = data['cooccurrence'].iloc[0]
             st.markdown(f"""
@@ -342,10 +554,31 @@ elif analysis_mode == "🔬 심층 댓글 분석":
             """, unsafe_allow_html=True)
         else:
             st.info("케미 데이터가 없습니다.")
+        
+        # 트리오·유닛·완전체
+        st.markdown("### 👪 트리오·유닛 조합")
+        unsliced_note('combos')
+        df_combo = data['combos']
+        if df_combo is not None and len(df_combo) > 0:
+            sizes = sorted(df_combo['size'].unique().tolist())
+            size = st.radio("조합 인원", sizes, horizontal=True, key='combo_size',
+                            format_func=lambda n: f"{n}명")
+            show_figure(scope + ('combo_rank', size), lambda: figures.combo_rank(df_combo, size))
+        else:
+            st.info("3명 이상 함께 언급된 댓글이 없습니다. (kfantrix_ingest.py 로 다시 집계하면 생성)")
     
     # -------------------- 🏷️ 키워드 분석 --------------------
     elif deep_menu == "🏷️ 키워드 분석":
-        tab1, tab2 = st.tabs(["👥 멤버별 키워드", "🌍 국가별 키워드"])
+        # 키워드 요약이 있으면 표시 개수(k)와 기간을 바로 반영
+        if keywords is not None:
+            top_k = st.slider("표시할 키워드 수", 3, 20, 5)
+            with profiler.section('transform', 'keyword_tables'):
+                data.override(keyword_tables(keywords, data, scope, top_k, start, end))
+        
+        tab_names = ["👥 멤버별 키워드", "🌍 국가별 키워드"]
+        if search:
+            tab_names.append("🔎 댓글 검색")
+        tab1, tab2, *tab_search = st.tabs(tab_names)
         
         with tab1:
             if data['member_keywords'] is not None:
@@ -366,6 +599,16 @@ elif analysis_mode == "🔬 심층 댓글 분석":
                 
                 st.markdown("**📝 자주 등장하는 단어**")
                 st.success(kw['top_raw_words'] if kw['top_raw_words'] else "-")
+                
+                # 키워드 → 해당 멤버를 언급한 원본 댓글
+                if search:
+                    words = [w.rsplit('(', 1)[0]
+                             for col in ['top_visual', 'top_talent', 'top_personality', 'top_love', 'top_raw_words']
+                             if isinstance(kw[col], str) for w in kw[col].split(', ') if w]
+                    picked_word = st.selectbox("🔎 키워드로 댓글 보기", list(dict.fromkeys(words)))
+                    if picked_word:
+                        show_comments(search.search(picked_word, member=selected, start=start, end=end,
+                                                    videos=videos))
         
         with tab2:
             if data['region_keywords'] is not None:
@@ -378,51 +621,69 @@ elif analysis_mode == "🔬 심층 댓글 분석":
                         with col2:
                             st.markdown(f"**사랑 표현**: {row['top_love'] or '-'}")
                             st.markdown(f"**자주 쓰는 단어**: {row['top_raw_words'] or '-'}")
+        
+        if tab_search:
+            with tab_search[0]:
+                col1, col2, col3 = st.columns([3, 1, 1])
+                with col1:
+                    query = st.text_input("검색어", placeholder="예: 귀엽 / 너무 귀엽다")
+                with col2:
+                    use_prefix = st.checkbox("앞부분 일치", value=True)
+                with col3:
+                    use_phrase = st.checkbox("구절 일치")
+                
+                members = [None] + (data['member']['member'].tolist() if data['member'] is not None else [])
+                member_filter = st.selectbox("멤버", members, format_func=lambda m: m or "전체")
+                
+                if query.strip():
+                    filters = dict(member=member_filter, start=start, end=end, videos=videos)
+                    with profiler.section('transform', 'search'):
+                        hits = search.search(query, prefix=use_prefix, phrase=use_phrase,
+                                             limit=SEARCH_LIMIT, **filters)
+                        stats = search.breakdown(query, prefix=use_prefix, phrase=use_phrase, **filters)
+                    st.markdown(f"**{stats['total']:,}개 댓글**")
+                    if not hits.empty:
+                        col1, col2 = st.columns(2)
+                        with col1:
+                            by_region = stats['region'].rename_axis('region').reset_index(name='count')
+                            fig = px.bar(by_region, x='region', y='count', title='국가별 댓글 수',
+                                         color_discrete_sequence=[GROUPS[selected_group]['color']])
+                            st.plotly_chart(fig, use_container_width=True)
+                        with col2:
+                            related = search.related(query, k=10, prefix=use_prefix, phrase=use_phrase, **filters)
+                            fig = px.bar(related.iloc[::-1], x='count', y='keyword', orientation='h',
+                                         title='함께 등장한 키워드',
+                                         color_discrete_sequence=[GROUPS[selected_group]['color']])
+                            st.plotly_chart(fig, use_container_width=True)
+                    show_comments(hits)
     
     # -------------------- 💜 진성팬 분석 --------------------
     elif deep_menu == "💜 진성팬 분석":
         st.markdown("### 💜 진성팬 분석")
         
+        df_lf = data['loyal_fans']
+        unsliced_note('loyal_fans')
+        
         col1, col2, col3 = st.columns(3)
         with col1:
             st.metric("진성팬 비율 (2회+)", f"{summary['loyal_fan_rate']}%")
         with col2:
             st.metric("슈퍼팬 비율 (5회+)", f"{summary['super_fan_rate']}%")
         with col3:
-            if data['loyal_fans'] is not None:
-                st.metric("슈퍼팬 수", f"{data['loyal_fans']['super_fans'].sum()}명")
+            if df_lf is not None:
+                st.metric("슈퍼팬 수", f"{df_lf['super_fans'].sum()}명")
         
-        if data['loyal_fans'] is not None:
+        if df_lf is not None:
             # 스택 바 차트
-            fig = go.Figure()
-            df_lf = data['loyal_fans']
-            for fan_type, col, color in [
-                ('일반팬', 'casual_fans', '#E0E0E0'),
-                ('정규팬', 'regular_fans', '#B39DDB'),
-                ('진성팬', 'loyal_fans', '#7C4DFF'),
-                ('슈퍼팬', 'super_fans', '#E91E63')
-            ]:
-                fig.add_trace(go.Bar(name=fan_type, x=df_lf['member'], y=df_lf[col], marker_color=color))
-            fig.update_layout(barmode='stack', title='멤버별 팬 등급 분포')
-            st.plotly_chart(fig, use_container_width=True)
+            show_figure(scope + ('fan_tiers',), lambda: figures.fan_tiers(df_lf))
             
             # 진성팬 비율 비교
             col_l, col_r = st.columns(2)
             with col_l:
-                fig2 = px.bar(df_lf.sort_values('loyal_rate'), x='loyal_rate', y='member',
-                            orientation='h', color='loyal_rate', color_continuous_scale='Purples',
-                            text='loyal_rate', title='진성팬 비율')
-                fig2.update_traces(texttemplate='%{text:.1f}%', textposition='outside')
-                fig2.update_layout(coloraxis_showscale=False)
-                st.plotly_chart(fig2, use_container_width=True)
+                show_figure(scope + ('loyal_rate',), lambda: figures.loyal_rate(df_lf))
             
             with col_r:
-                fig3 = px.bar(df_lf.sort_values('super_fan_rate'), x='super_fan_rate', y='member',
-                            orientation='h', color='super_fan_rate', color_continuous_scale='RdPu',
-                            text='super_fan_rate', title='슈퍼팬 비율')
-                fig3.update_traces(texttemplate='%{text:.1f}%', textposition='outside')
-                fig3.update_layout(coloraxis_showscale=False)
-                st.plotly_chart(fig3, use_container_width=True)
+                show_figure(scope + ('super_rate',), lambda: figures.super_rate(df_lf))
     
     # -------------------- 🎯 마케팅 인사이트 --------------------
     elif deep_menu == "🎯 마케팅 인사이트":
@@ -430,6 +691,13 @@ elif analysis_mode == "🔬 심층 댓글 분석":
         
         if data['member_region_keywords'] is not None:
             df_mrk = data['member_region_keywords']
+            # 필터가 없으면 미리 계산된 전체 표, 있으면 필터된 테이블로 바로 계산
+            with profiler.section('transform', 'insights'):
+                if period or videos:
+                    insights = compute_insights({group_info['prefix']: df_mrk})
+                else:
+                    insights = load_marketing_insights(source_versions())
+                    insights = insights[insights['group'] == group_info['prefix']]
             regions = df_mrk['region'].unique().tolist()
             selected_region = st.selectbox("🌍 타겟 국가/지역", regions)
             
@@ -439,43 +707,108 @@ elif analysis_mode == "🔬 심층 댓글 분석":
                 col1, col2 = st.columns(2)
                 
                 with col1:
-                    fig = px.bar(df_region, x='member', y='comment_count', color='member',
-                               color_discrete_sequence=px.colors.qualitative.Set2, text='comment_count')
-                    fig.update_traces(textposition='outside')
-                    fig.update_layout(showlegend=False, title=f'{selected_region} 멤버별 인기도')
-                    st.plotly_chart(fig, use_container_width=True)
+                    show_figure(scope + ('region_members', selected_region),
+                                lambda: figures.region_members(df_region, selected_region))
                 
                 with col2:
-                    total = {
-                        '비주얼': df_region['visual_score'].sum(),
-                        '실력': df_region['talent_score'].sum(),
-                        '성격': df_region['personality_score'].sum(),
-                        '사랑': df_region['love_score'].sum()
-                    }
-                    df_cat = pd.DataFrame({'category': list(total.keys()), 'score': list(total.values())})
-                    fig = px.pie(df_cat, values='score', names='category', title='반응 카테고리',
-                               color_discrete_sequence=['#8B5CF6', '#EC4899', '#F59E0B', '#10B981'])
-                    st.plotly_chart(fig, use_container_width=True)
+                    show_figure(scope + ('region_categories', selected_region),
+                                lambda: figures.region_categories(figures.category_totals(df_region)))
                 
-                top = df_region.iloc[0]
-                top_cat = max(total, key=total.get)
-                st.markdown(f"""
-                <div class="insight-box">
-                <strong>🎯 {selected_region} 마케팅 전략</strong><br><br>
-                <strong>추천 멤버:</strong> {top['member']} (언급 {top['comment_count']}회)<br>
-                <strong>추천 키워드:</strong> {top_cat}<br>
-                <strong>콘텐츠 방향:</strong> {top['member']}의 {top_cat} 중심 콘텐츠
-                </div>
-                """, unsafe_allow_html=True)
+                top = insights[insights['region'] == str(selected_region)]
+                if top.empty:
+                    # 미리 계산된 표에 없는 지역 (표가 예전 버전) → 이 지역만 바로 계산
+                    top = compute_insights({group_info['prefix']: df_region})
+                if top.empty:
+                    st.info(f"{selected_region} 지역의 마케팅 인사이트가 없습니다.")
+                else:
+                    top = top.iloc[0]
+                    top_cat = CATEGORY_LABELS[top['top_category']]
+                    st.markdown(f"""
+                    <div class="insight-box">
+                    <strong>🎯 {selected_region} 마케팅 전략</strong><br><br>
+                    <strong>추천 멤버:</strong> {top['recommended_member']} (언급 {top['member_comments']}회, 비중 {top['member_share']:.0%}, 안정도 {top['member_stability']:.0%})<br>
+                    <strong>추천 키워드:</strong> {top_cat} (안정도 {top['category_stability']:.0%})<br>
+                    <strong>콘텐츠 방향:</strong> {top['recommended_member']}의 {top_cat} 중심 콘텐츠
+                    </div>
+                    """, unsafe_allow_html=True)
         
         # 히트맵
         st.markdown("### 📊 멤버×국가 히트맵")
         if data['member_region_keywords'] is not None:
-            pivot = data['member_region_keywords'].pivot_table(
-                index='member', columns='region', values='comment_count', fill_value=0)
-            fig = px.imshow(pivot.values, x=pivot.columns.tolist(), y=pivot.index.tolist(),
-                          color_continuous_scale='Purples', text_auto=True, aspect='auto')
-            st.plotly_chart(fig, use_container_width=True)
+            show_figure(scope + ('member_region_heatmap',),
+                        lambda: figures.member_region_heatmap(data['member_region_keywords']))
+        
+        # 전체 그룹·지역 추천 매트릭스 (미리 계산된 표)
+        st.markdown("### 🌍 전체 그룹·지역 추천")
+        all_insights = load_marketing_insights(source_versions())
+        if len(all_insights):
+            group_names = {info['prefix']: name for name, info in GROUPS.items()}
+            st.dataframe(
+                all_insights.assign(
+                    group=all_insights['group'].map(group_names),
+                    top_category=all_insights['top_category'].map(CATEGORY_LABELS)
+                )[['group', 'region', 'comment_count', 'recommended_member', 'member_share',
+                   'member_stability', 'runner_up_member', 'top_category', 'category_stability']].rename(columns={
+                    'group': '그룹', 'region': '지역', 'comment_count': '댓글 수',
+                    'recommended_member': '추천 멤버', 'member_share': '멤버 비중',
+                    'member_stability': '멤버 안정도', 'runner_up_member': '2위 멤버',
+                    'top_category': '추천 카테고리', 'category_stability': '카테고리 안정도'
+                }),
+                use_container_width=True, hide_index=True
+            )
+            st.caption("안정도: 1위가 2위보다 우연히 앞섰을 가능성이 낮을수록 100%에 가깝습니다 (50% = 동률).")
+    
+    # -------------------- 🎬 영상 분석 --------------------
+    elif deep_menu == "🎬 영상 분석":
+        df_video = data['video_engagement']
+        if df_video is None:
+            st.warning("영상 데이터가 없습니다.")
+            st.stop()
+        
+        prefix = group_info['prefix']
+        _, video_version = table_source(prefix, 'video_engagement')
+        with profiler.section('load', f'{prefix}.video_index'):
+            video_index = load_video_index(prefix, video_version, df_video)
+        sort_columns = video_index.sort_columns()
+        
+        col1, col2, col3, col4 = st.columns([2, 1, 2, 1])
+        with col1:
+            sort_col = st.selectbox("정렬", sort_columns, format_func=SORT_COLUMNS.get, key='video_sort')
+        with col2:
+            ascending = st.radio("순서", ["내림차순", "오름차순"], key='video_order') == "오름차순"
+        with col3:
+            title_query = st.text_input("제목 검색", key='video_search').strip()
+        with col4:
+            member_filter = st.selectbox("최다 언급 멤버", [""] + video_index.members(), key='video_member',
+                                         format_func=lambda m: m or "전체")
+        min_comments = st.slider("최소 댓글 수", 0, int(df_video['comment_count'].max()), 0, key='video_min_comments')
+        filters = {'search': title_query or None, 'member': member_filter or None,
+                   'min_comments': min_comments, 'video_ids': tuple(videos) or None}
+        
+        with profiler.section('transform', 'video_query'):
+            totals = video_index.totals(**filters)
+            pages = page_count(totals['videos'])
+            col1, col2, col3, col4 = st.columns(4)
+            with col1:
+                st.metric("영상", f"{totals['videos']:,}개")
+            with col2:
+                st.metric("댓글", f"{totals['comments']:,}개")
+            with col3:
+                if 'likes' in totals:
+                    st.metric("좋아요", f"{totals['likes']:,}")
+            with col4:
+                page = st.number_input("페이지", 1, pages, 1, key='video_page')
+            df_page, _ = video_index.query(sort_col, ascending, min(page, pages), PAGE_SIZE, **filters)
+        
+        if df_page.empty:
+            st.info("조건에 맞는 영상이 없습니다.")
+        else:
+            label = SORT_COLUMNS[sort_col]
+            chart_col = sort_col if pd.api.types.is_numeric_dtype(df_page[sort_col]) else 'comment_count'
+            show_figure(scope + ('video_page', sort_col, ascending, tuple(sorted(filters.items())), page),
+                        lambda: figures.video_page(df_page, chart_col, SORT_COLUMNS[chart_col]))
+            st.dataframe(df_page.rename(columns=COLUMN_LABELS), use_container_width=True, hide_index=True)
+            st.caption(f"{totals['videos']:,}개 중 {page}/{pages} 페이지 · 지표는 전체 기간 누적입니다 (사이드바 영상 선택만 반영).")
 
 # ============================================================
 # ⚖️ 그룹 비교
@@ -504,6 +837,7 @@ elif analysis_mode == "⚖️ 그룹 비교":
         st.stop()
     
     df_compare = pd.DataFrame(compare_data)
+    scope = ('compare', tuple(group_version(info['prefix']) for info in GROUPS.values()))
     
     # 요약 카드
     st.markdown("### 📊 핵심 지표 비교")
@@ -523,23 +857,27 @@ elif analysis_mode == "⚖️ 그룹 비교":
     
     with col_left:
         st.markdown("### 💜 진성팬 비율 비교")
-        fig = px.bar(df_compare.sort_values('loyal_fan_rate'), x='loyal_fan_rate', y='group',
-                   orientation='h', color='group',
-                   color_discrete_map={r['group']: r['color'] for _, r in df_compare.iterrows()},
-                   text='loyal_fan_rate')
-        fig.update_traces(texttemplate='%{text:.1f}%', textposition='outside')
-        fig.update_layout(showlegend=False, xaxis_title='진성팬 비율 (%)', yaxis_title='')
-        st.plotly_chart(fig, use_container_width=True)
+        def build_loyal_compare():
+            fig = px.bar(df_compare.sort_values('loyal_fan_rate'), x='loyal_fan_rate', y='group',
+                       orientation='h', color='group',
+                       color_discrete_map={r['group']: r['color'] for _, r in df_compare.iterrows()},
+                       text='loyal_fan_rate')
+            fig.update_traces(texttemplate='%{text:.1f}%', textposition='outside')
+            fig.update_layout(showlegend=False, xaxis_title='진성팬 비율 (%)', yaxis_title='')
+            return fig
+        show_figure(scope + ('loyal_compare',), build_loyal_compare)
     
     with col_right:
         st.markdown("### 👥 고유 작성자 수 비교")
-        fig = px.bar(df_compare.sort_values('unique_authors'), x='unique_authors', y='group',
-                   orientation='h', color='group',
-                   color_discrete_map={r['group']: r['color'] for _, r in df_compare.iterrows()},
-                   text='unique_authors')
-        fig.update_traces(texttemplate='%{text:,}', textposition='outside')
-        fig.update_layout(showlegend=False, xaxis_title='고유 작성자 수', yaxis_title='')
-        st.plotly_chart(fig, use_container_width=True)
+        def build_author_compare():
+            fig = px.bar(df_compare.sort_values('unique_authors'), x='unique_authors', y='group',
+                       orientation='h', color='group',
+                       color_discrete_map={r['group']: r['color'] for _, r in df_compare.iterrows()},
+                       text='unique_authors')
+            fig.update_traces(texttemplate='%{text:,}', textposition='outside')
+            fig.update_layout(showlegend=False, xaxis_title='고유 작성자 수', yaxis_title='')
+            return fig
+        show_figure(scope + ('author_compare',), build_author_compare)
     
     # 언어 분포 비교
     st.markdown("### 🌐 언어 분포 비교")
@@ -556,11 +894,51 @@ elif analysis_mode == "⚖️ 그룹 비교":
                 })
     
     if lang_compare:
-        df_lang = pd.DataFrame(lang_compare)
-        fig = px.bar(df_lang, x='region', y='percentage', color='group', barmode='group',
-                   color_discrete_map={r['group']: r['color'] for _, r in df_compare.iterrows()})
-        fig.update_layout(xaxis_title='국가/지역', yaxis_title='비율 (%)')
-        st.plotly_chart(fig, use_container_width=True)
+        def build_language_compare():
+            df_lang = pd.DataFrame(lang_compare)
+            fig = px.bar(df_lang, x='region', y='percentage', color='group', barmode='group',
+                       color_discrete_map={r['group']: r['color'] for _, r in df_compare.iterrows()})
+            fig.update_layout(xaxis_title='국가/지역', yaxis_title='비율 (%)')
+            return fig
+        show_figure(scope + ('language_compare',), build_language_compare)
+    
+    # 팬 중복도 (수집 때 만든 MinHash 서명으로 추정)
+    st.markdown("### 🔗 팬 중복도")
+    group_names = {info['prefix']: name for name, info in GROUPS.items()}
+    with profiler.section('load', 'overlap'):
+        overlap_indexes = {}
+        for p in group_names:
+            index = load_overlap_index(p, overlap_version(p))
+            if index is not None and index.cells:
+                overlap_indexes[p] = index
+    if not overlap_indexes:
+        st.info("💡 팬 중복도 서명이 없습니다. `python kfantrix_ingest.py <prefix>` 로 원본 댓글을 수집하면 함께 만들어집니다.")
+    else:
+        ov_dates = sorted(d for index in overlap_indexes.values() for d in (index.dates()[0], index.dates()[-1]))
+        ov_first, ov_last = date.fromisoformat(ov_dates[0]), date.fromisoformat(ov_dates[-1])
+        col_a, col_b = st.columns(2)
+        with col_a:
+            ov_members = st.radio("단위", ["그룹", "그룹 + 멤버"], horizontal=True, key='overlap_unit') != "그룹"
+        with col_b:
+            ov_window = st.date_input("기간", (ov_first, ov_last), min_value=ov_first, max_value=ov_last,
+                                      key='overlap_window')
+        ov_start, ov_end = (d.isoformat() for d in ov_window) if len(ov_window) == 2 else (None, None)
+        with profiler.section('transform', 'overlap'):
+            sketches = signatures(overlap_indexes, ov_start, ov_end, ov_members)
+            sketches = {(group_names[k] if '/' not in k else f"{group_names[k.split('/')[0]]} · {k.split('/', 1)[1]}"): v
+                        for k, v in sketches.items()}
+            df_overlap = overlap_table(sketches)
+        if len(sketches) < 2:
+            st.info("💡 비교할 그룹이 하나뿐입니다. 멤버 단위로 보거나 다른 그룹을 수집해주세요.")
+        else:
+            ov_key = ('compare', 'overlap_heatmap',
+                      tuple(overlap_version(p) for p in overlap_indexes), ov_start, ov_end, ov_members)
+            show_figure(ov_key, lambda: figures.overlap_heatmap(jaccard_matrix(sketches)))
+            st.dataframe(df_overlap.rename(columns={
+                'a': 'A', 'b': 'B', 'authors_a': 'A 작성자', 'authors_b': 'B 작성자', 'jaccard': 'Jaccard',
+                'shared_authors': '공통 작성자', 'share_of_a': 'A 중 B 비율 (%)', 'share_of_b': 'B 중 A 비율 (%)'
+            }), use_container_width=True, hide_index=True)
+            st.caption("MinHash 서명(128개) 기반 추정치입니다. Jaccard 오차는 약 ±0.04 입니다.")
     
     # 인사이트
     top_loyal = df_compare.sort_values('loyal_fan_rate', ascending=False).iloc[0]
@@ -583,18 +961,49 @@ st.markdown('<hr class="divider">', unsafe_allow_html=True)
 
 # 다운로드 버튼
 if analysis_mode == "🔬 심층 댓글 분석" and data['member'] is not None:
+    # 버전·필터별로 디스크에 한 번만 써 두고, 버튼을 눌렀을 때만 파일을 읽는다
+    prefix = group_info['prefix']
+    export_version = group_version(prefix)
+    fmt = st.radio("📦 내보내기 형식", available_formats(), horizontal=True)
+    
+    def export_file(key):
+        return lambda: read_file(table_export(prefix, key, fmt, export_version, lambda: data[key],
+                                              (start, end, tuple(videos))))
+    
     col1, col2, col3 = st.columns(3)
     with col1:
-        csv = data['member'].to_csv(index=False, encoding='utf-8-sig')
-        st.download_button("📥 멤버 분석 CSV", csv, f"{group_info['prefix']}_member.csv", "text/csv")
+        st.download_button(f"📥 멤버 분석 {fmt.upper()}", export_file('member'),
+                           f"{prefix}_member.{fmt}", MIME_TYPES[fmt])
     with col2:
         if data['loyal_fans'] is not None:
-            csv = data['loyal_fans'].to_csv(index=False, encoding='utf-8-sig')
-            st.download_button("📥 진성팬 CSV", csv, f"{group_info['prefix']}_loyal.csv", "text/csv")
+            st.download_button(f"📥 진성팬 {fmt.upper()}", export_file('loyal_fans'),
+                               f"{prefix}_loyal.{fmt}", MIME_TYPES[fmt])
     with col3:
         if data['member_region_keywords'] is not None:
-            csv = data['member_region_keywords'].to_csv(index=False, encoding='utf-8-sig')
-            st.download_button("📥 마케팅 인사이트 CSV", csv, f"{group_info['prefix']}_marketing.csv", "text/csv")
+            st.download_button(f"📥 마케팅 인사이트 {fmt.upper()}", export_file('member_region_keywords'),
+                               f"{prefix}_marketing.{fmt}", MIME_TYPES[fmt])
+    
+    # 원본 댓글 슬라이스 (검색 색인 또는 원본 CSV 를 청크로 걸러 파일에 이어 씀)
+    if search is not None or os.path.exists(f'{prefix}_comments_raw.csv'):
+        with st.expander("📥 원본 댓글 내보내기"):
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                slice_member = st.selectbox("멤버", ['전체'] + data['member']['member'].tolist(),
+                                             key='export_member')
+            with col2:
+                regions = [] if data['language'] is None else data['language']['region'].tolist()
+                slice_region = st.selectbox("국가", ['전체'] + regions, key='export_region')
+            with col3:
+                slice_fmt = st.radio("형식", ['csv', 'parquet'], horizontal=True, key='export_format')
+            st.caption("기간은 사이드바 기간 필터를 따릅니다.")
+            member_arg = None if slice_member == '전체' else slice_member
+            region_arg = None if slice_region == '전체' else slice_region
+            st.download_button(
+                "📥 댓글 내려받기",
+                lambda: read_file(slice_export(prefix, export_version, slice_fmt,
+                                               member_arg, region_arg, start, end)),
+                f"{prefix}_comments.{slice_fmt}", MIME_TYPES[slice_fmt]
+            )
 
 st.markdown("""
 <div class="footer">
@@ -603,3 +1012,23 @@ st.markdown("""
     <p>📧 contact@kfantrix.com</p>
 </div>
 """, unsafe_allow_html=True)
+
+# 프로파일 패널 (디버그 모드에서만 표시)
+if profiler.enabled:
+    deep_mode = analysis_mode == "🔬 심층 댓글 분석"
+    if 'profile_session' not in st.session_state:
+        st.session_state['profile_session'] = profiler.run_id
+    run = profiler.record(session=st.session_state['profile_session'], mode=analysis_mode,
+                          group=selected_group if deep_mode else None,
+                          menu=deep_menu if deep_mode else None)
+    log = profile_log()
+    log.add(run)
+    with st.expander("🛠 프로파일"):
+        st.markdown(f"**이번 실행: {run['total_ms']:,.0f} ms**")
+        st.dataframe(pd.DataFrame(run['sections']), use_container_width=True, hide_index=True)
+        st.markdown("**최근 실행 p50 / p99 (이 프로세스)**")
+        st.dataframe(summarize(log.recent()), use_container_width=True, hide_index=True)
+        st.download_button("📥 실행 기록 JSONL",
+                           lambda: ''.join(json.dumps(r, ensure_ascii=False) + '\n' for r in log.recent()),
+                           "kfantrix_profile.jsonl", "application/x-ndjson")
+        st.caption(f"전체 로그: {log.path} · 집계: python kfantrix_profile.py {log.path}")
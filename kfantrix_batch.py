@@ -0,0 +1,154 @@
+# kfantrix_batch.py - 여러 그룹 전체 재집계 (멀티프로세스)
+# 그룹 × 영상 shard 단위로 작업을 프로세스 풀에 나눠 돌리고,
+# shard 별 부분 집계(집계기/충성도/큐브/키워드/검색 세그먼트)를 그룹마다 합친다.
+# 원본 CSV는 부모가 한 번만 읽어 store/_batch_*/ 임시 폴더에 shard 별 CSV로 나누고, 워커는 자기 shard 파일만 읽는다.
+
+import argparse
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+
+from kfantrix_ingest import IngestState, publish
+from kfantrix_insight import build_insights
+from kfantrix_language import (absorb_language_cache, load_language_cache, pending_language_cache,
+                               save_language_cache)
+from kfantrix_loyalty import choose_backend
+from kfantrix_pipeline import CHUNK_SIZE, RAW_COLUMNS, iter_raw_chunks
+from kfantrix_search import compact, drop_pending, new_segment, segment_names, swap_index
+from kfantrix_store import STORE_DIR
+
+
+def shard_of(video_ids, shards):
+    """video_id → shard 번호 (프로세스가 달라도 같은 값)"""
+    hashes = pd.util.hash_array(video_ids.astype(str).to_numpy())
+    return (hashes % shards).astype(int)
+
+
+def partition_raw(prefix, raw_path, shards, out_dir, chunksize=CHUNK_SIZE):
+    """원본 CSV를 한 번 읽어 shard 별 CSV로 나눈다 (분류·매칭 없이). 반환값은 shard 순서의 경로."""
+    paths = [os.path.join(out_dir, f'{prefix}_{shard:03d}.csv') for shard in range(shards)]
+    for path in paths:
+        pd.DataFrame(columns=RAW_COLUMNS).to_csv(path, index=False)
+    for chunk in iter_raw_chunks(raw_path, chunksize, prefix, rematch=False, classify=False):
+        for shard, part in chunk.groupby(shard_of(chunk['video_id'], shards)):
+            part.to_csv(paths[shard], mode='a', header=False, index=False)
+    return paths
+
+
+# ============================================================
+# 워커
+# ============================================================
+def build_shard(prefix, shard_path, shard, store_dir=STORE_DIR,
+                loyalty_backend='exact', chunksize=CHUNK_SIZE):
+    """영상 shard 하나를 처음부터 집계한 (수집 상태, 새 언어 캐시 항목) (워커 프로세스에서 실행).
+
+    shard_path 는 partition_raw 가 나눈 이 shard 의 행만 담은 CSV 라서
+    파싱·매칭·분류·키워드·멤버·작성자 등 행 단위 작업이 모두 shard 수만큼 나뉜다.
+    언어 캐시는 워커끼리 동시에 쓰지 않도록 새 항목만 돌려주고 부모가 한 번 저장한다.
+    """
+    state = IngestState(loyalty_backend=loyalty_backend)
+    segment = None
+    seen = set()
+
+    def new_rows(chunk):
+        chunk = chunk.drop_duplicates('comment_id')
+        return chunk[~chunk['comment_id'].isin(seen)]
+
+    load_language_cache(store_dir)
+    for chunk in iter_raw_chunks(shard_path, chunksize, prefix, select=new_rows):
+        state.aggregator.update(chunk)
+        state.loyalty.add_chunk(chunk)
+        state.cube.add_chunk(chunk)
+        state.keywords.add_chunk(chunk)
+        state.overlap.add_chunk(chunk)
+        state.watermarks.advance(chunk)
+        segment = segment or new_segment(prefix, store_dir, suffix=f'_{shard:03d}')
+        segment.add_chunk(chunk)
+        seen.update(chunk['comment_id'])
+    if segment is not None:
+        segment.close()
+    return state, pending_language_cache()
+
+
+# ============================================================
+# 배치 실행
+# ============================================================
+def run_batch(prefixes, src_dir='.', store_dir=STORE_DIR, out_dir='.', workers=None,
+              shards=None, chunksize=CHUNK_SIZE):
+    """그룹들을 (그룹, shard) 작업으로 나눠 병렬 집계 후 그룹별로 병합·저장.
+
+    반환값은 {prefix: 댓글 수}. 원본 파일이 없는 그룹은 건너뛴다.
+    기존 검색 세그먼트는 그룹의 publish 가 끝난 뒤에 새 세그먼트로 바꾼다 (실패하면 그대로 남는다).
+    """
+    workers = workers or os.cpu_count() or 1
+    shards = shards or workers
+    raw_paths = {p: os.path.join(src_dir, f'{p}_comments_raw.csv') for p in prefixes}
+    raw_paths = {p: path for p, path in raw_paths.items() if os.path.exists(path)}
+
+    backends, old = {}, {}
+    for prefix in raw_paths:
+        backends[prefix] = choose_backend(prefix, store_dir, src_dir)
+        old[prefix] = segment_names(prefix, store_dir)
+        drop_pending(prefix, store_dir)
+
+    parts = {prefix: [] for prefix in raw_paths}
+    results = {}
+    os.makedirs(store_dir, exist_ok=True)
+    with tempfile.TemporaryDirectory(prefix='_batch_', dir=store_dir) as tmp, \
+            ProcessPoolExecutor(max_workers=workers) as pool:
+        # 그룹을 나누는 대로 바로 제출 (다음 그룹을 나누는 동안 앞 그룹 워커가 돈다)
+        futures = {}
+        for prefix, path in raw_paths.items():
+            for shard, shard_path in enumerate(partition_raw(prefix, path, shards, tmp, chunksize)):
+                futures[pool.submit(build_shard, prefix, shard_path, shard, store_dir,
+                                    backends[prefix], chunksize)] = prefix
+        for future in as_completed(futures):
+            prefix = futures[future]
+            state, language = future.result()
+            absorb_language_cache(language)
+            parts[prefix].append(state)
+            if len(parts[prefix]) < shards:
+                continue
+            # 그룹의 shard 가 모두 끝나면 바로 병합·저장 (다른 그룹 작업과 겹침)
+            state = parts.pop(prefix)
+            merged = state[0]
+            for other in state[1:]:
+                merged.merge(other)
+            publish(merged, prefix, store_dir, out_dir)
+            swap_index(prefix, old[prefix], store_dir)
+            compact(prefix, store_dir)
+            results[prefix] = merged.aggregator.total_comments
+    save_language_cache(store_dir)
+    # 그룹 테이블이 모두 바뀌었으므로 전체 마케팅 인사이트도 다시 계산
+    if results:
+        build_insights(store_dir=store_dir, src_dir=src_dir)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='여러 그룹 원본 댓글 병렬 재집계')
+    parser.add_argument('prefixes', nargs='+', help='그룹 prefix 목록 (예: plave nmixx skz)')
+    parser.add_argument('--src-dir', default='.', help='<prefix>_comments_raw.csv 위치')
+    parser.add_argument('--store-dir', default=STORE_DIR)
+    parser.add_argument('--out-dir', default='.', help="CSV 출력 경로 ('' 이면 저장소만 갱신)")
+    parser.add_argument('--workers', type=int, help='프로세스 수 (기본: CPU 코어 수)')
+    parser.add_argument('--shards', type=int, help='그룹당 영상 shard 수 (기본: 프로세스 수)')
+    parser.add_argument('--chunksize', type=int, default=CHUNK_SIZE)
+    args = parser.parse_args()
+
+    started = time.time()
+    results = run_batch(args.prefixes, args.src_dir, args.store_dir, args.out_dir,
+                        args.workers, args.shards, args.chunksize)
+    for prefix in args.prefixes:
+        if prefix in results:
+            print(f'✅ {prefix}: 댓글 {results[prefix]:,}개')
+        else:
+            print(f'⚠️ {prefix}: 원본 댓글 파일 없음')
+    print(f'⏱ {time.time() - started:.1f}초')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,410 @@
+# kfantrix_bench.py - 벤치마크 (합성 원본 댓글 생성 + 구간별 시간/메모리 측정)
+# 원본 댓글과 같은 스키마의 합성 데이터를 원하는 규모로 만들고
+# 로드 / 디코딩 / 멤버 매칭 / 집계 / 케미 / 충성도 / 큐브 / 그림 렌더링 구간을 따로 잰다.
+# 결과는 JSON 으로 남기고 --compare 로 기준 결과와 비교해 느려진 구간이 있으면 실패(exit 1).
+#
+# bench/synthetic_<rows>_<seed>_<설정 해시>.csv   합성 원본 (같은 설정이면 재사용)
+# bench/results_<timestamp>.json      측정 결과
+
+import argparse
+import hashlib
+import json
+import os
+import platform
+import resource
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime, timedelta, timezone
+from itertools import combinations
+from multiprocessing import get_context
+
+import numpy as np
+import pandas as pd
+
+import kfantrix_figures as figures
+from kfantrix_cooccur import CooccurrenceMatrix
+from kfantrix_cube import RollupCube
+from kfantrix_decode import decode_columns, explode_list
+from kfantrix_language import LanguageClassifier
+from kfantrix_loyalty import LoyaltyIndex
+from kfantrix_mentions import MentionMatcher, GROUP_ALIASES
+from kfantrix_pipeline import CHUNK_SIZE, RAW_COLUMNS, SCORE_CATEGORIES, aggregate_raw, iter_raw_chunks
+
+BENCH_DIR = 'bench'
+
+# 실제 덤프(plave) 분포를 따른 기본값
+MEMBERS = ['예준', '노아', '밤비', '은호', '하민']
+LANGUAGES = [
+    ('ko', '한국', 0.796), ('en', '영어권', 0.129), ('unknown', '기타', 0.038), ('ja', '일본', 0.010),
+    ('zh', '중국', 0.008), ('th', '태국', 0.007), ('vi', '베트남', 0.006), ('id', '인도네시아', 0.003),
+    ('es', '스페인어권', 0.001), ('pt', '포르투갈어권', 0.001), ('ru', '러시아', 0.001)
+]
+KEYWORDS = {
+    'visual': ['눈', '코', '입', '외모', '잘생', '비주얼', '얼굴'],
+    'talent': ['노래', '보컬', '춤', '랩', '라이브', '음색', '고음'],
+    'personality': ['귀여', '웃음', '착하', '다정', '센스', '매력'],
+    'love': ['사랑', '최고', '좋아', '행복', '감동', '응원']
+}
+
+
+def profile(members=None, mention_rate=0.145, author_ratio=1.3, author_skew=0.6, videos=10,
+            days=30, vocabulary=20000):
+    """합성 데이터 분포 설정 (기본값은 실제 덤프와 비슷한 비율)"""
+    return {
+        'members': members or MEMBERS,
+        'mention_rate': mention_rate,      # 멤버를 언급한 댓글 비율
+        'author_ratio': author_ratio,      # 작성자 풀 크기 / 댓글 수
+        'author_skew': author_skew,        # 작성자별 댓글 수 멱법칙 지수 (클수록 헤비 유저 집중)
+        'videos': videos,
+        'days': days,                      # 영상 게시 후 댓글이 달리는 기간
+        'vocabulary': vocabulary
+    }
+
+
+# ============================================================
+# 합성 데이터 생성
+# ============================================================
+def _zipf_sampler(rng, n, skew):
+    """0..n-1 을 대략 1/(i+1)^skew 비율로 뽑는 함수 (연속 근사 역함수라 n 과 무관하게 메모리 일정)"""
+    def sample(size):
+        u = rng.random(size)
+        if abs(skew - 1) < 1e-9:
+            x = np.exp(u * np.log(n + 1))
+        else:
+            a = 1 - skew
+            x = (u * ((n + 1) ** a - 1) + 1) ** (1 / a)
+        return np.minimum(x.astype(np.int64) - 1, n - 1).clip(0)
+    return sample
+
+
+def _list_repr(items):
+    return '[' + ', '.join(f"'{i}'" for i in items) + ']'
+
+
+class SyntheticComments:
+    """원본 댓글 스키마(RAW_COLUMNS)의 합성 청크 생성기.
+
+    멤버 조합·키워드 사전·단어 목록은 미리 만든 카탈로그에서 뽑아
+    청크당 Python 루프 없이 배열 인덱싱만으로 행을 만든다.
+    """
+
+    def __init__(self, rows, seed=0, **options):
+        self.rows = rows
+        self.profile = profile(**options)
+        self.rng = np.random.default_rng(seed)
+        rng, p = self.rng, self.profile
+
+        # 멤버 조합 (1~3명, 인기도 멱법칙) 카탈로그
+        members = p['members']
+        popularity = 1.0 / np.arange(1, len(members) + 1) ** 0.5
+        combos, weights = [[]], [1 - p['mention_rate']]
+        for size, share in [(1, 0.85), (2, 0.12), (3, 0.03)]:
+            subsets = list(combinations(range(len(members)), size))
+            w = np.array([popularity[list(s)].prod() for s in subsets])
+            combos += [[members[i] for i in s] for s in subsets]
+            weights += list(p['mention_rate'] * share * w / w.sum())
+        self.mentions = np.array([_list_repr(c) for c in combos], dtype=object)
+        self.mention_weights = np.cumsum(weights) / np.sum(weights)
+
+        # 키워드 사전 카탈로그 (약 2/3 은 빈 사전)
+        catalog = ['{}'] * 1000
+        for _ in range(500):
+            cats = rng.choice(SCORE_CATEGORIES, size=rng.integers(1, 3), replace=False)
+            catalog.append('{' + ', '.join(
+                f"'{c}': {_list_repr(rng.choice(KEYWORDS[c], size=rng.integers(1, 3), replace=False))}"
+                for c in cats) + '}')
+        self.keywords = np.array(catalog, dtype=object)
+
+        # 단어 목록 카탈로그 (어휘 멱법칙) → raw_words / text
+        vocab = np.array([f'w{i}' for i in range(p['vocabulary'])], dtype=object)
+        pick_word = _zipf_sampler(rng, len(vocab), 1.0)
+        sentences = [vocab[pick_word(rng.integers(2, 12))] for _ in range(min(50000, max(1000, rows // 20)))]
+        self.raw_words = np.array([_list_repr(s) for s in sentences], dtype=object)
+        self.texts = np.array([' '.join(s) for s in sentences], dtype=object)
+
+        self.n_authors = max(1, int(rows * p['author_ratio']))
+        self.pick_author = _zipf_sampler(rng, self.n_authors, p['author_skew'])
+        start = date(2025, 1, 1)
+        self.video_ids = np.array([f'v{i:010d}' for i in range(p['videos'])], dtype=object)
+        self.video_dates = np.array([(start + timedelta(days=int(d))).isoformat()
+                                     for d in np.sort(rng.integers(0, 300, p['videos']))], dtype=object)
+        self.languages = np.array([l for l, _, _ in LANGUAGES], dtype=object)
+        self.regions = np.array([r for _, r, _ in LANGUAGES], dtype=object)
+        self.language_weights = np.cumsum([w for _, _, w in LANGUAGES]) / sum(w for _, _, w in LANGUAGES)
+        self._dates = {}
+
+    def _date(self, video, delay):
+        key = (video, delay)
+        if key not in self._dates:
+            self._dates[key] = (date.fromisoformat(self.video_dates[video]) + timedelta(days=int(delay))).isoformat()
+        return self._dates[key]
+
+    def chunk(self, offset, size):
+        rng, p = self.rng, self.profile
+        video = rng.integers(0, p['videos'], size)
+        delay = np.minimum(rng.geometric(0.35, size) - 1, p['days'])
+        dates = pd.Series(list(zip(video, delay))).map(lambda vd: self._date(*vd))
+        author = self.pick_author(size)
+        lang = np.minimum(np.searchsorted(self.language_weights, rng.random(size)), len(LANGUAGES) - 1)
+        sentence = rng.integers(0, len(self.texts), size)
+        author_ids = pd.Series(author).astype(str).str.zfill(10)
+        return pd.DataFrame({
+            'video_id': self.video_ids[video],
+            'comment_id': 'c' + pd.Series(np.arange(offset, offset + size)).astype(str).str.zfill(12),
+            'author': '@user' + author_ids,
+            'author_id': 'UC' + author_ids,
+            'text': self.texts[sentence],
+            'likes': np.minimum(rng.zipf(2.0, size) - 1, 100000),
+            'date': dates.to_numpy(),
+            'video_title': 'synthetic ' + pd.Series(self.video_ids[video]),
+            'video_date': self.video_dates[video],
+            'language': self.languages[lang],
+            'region': self.regions[lang],
+            'mentioned_members': self.mentions[np.searchsorted(self.mention_weights, rng.random(size))],
+            'keywords': self.keywords[rng.integers(0, len(self.keywords), size)],
+            'raw_words': self.raw_words[sentence]
+        })[RAW_COLUMNS]
+
+    def __iter__(self, chunksize=CHUNK_SIZE):
+        for offset in range(0, self.rows, chunksize):
+            yield self.chunk(offset, min(chunksize, self.rows - offset))
+
+
+def synthetic_path(rows, seed=0, chunksize=CHUNK_SIZE, **options):
+    """합성 원본 캐시 경로. 생성 결과를 바꾸는 설정(options, 청크 크기)은 해시로 이름에 넣는다."""
+    key = json.dumps({'chunksize': chunksize, **options}, sort_keys=True, ensure_ascii=False)
+    tag = hashlib.sha1(key.encode('utf-8')).hexdigest()[:12]
+    return os.path.join(BENCH_DIR, f'synthetic_{rows}_{seed}_{tag}.csv')
+
+
+def write_synthetic(path, rows, seed=0, chunksize=CHUNK_SIZE, **options):
+    """합성 원본 CSV 를 청크 단위로 쓰기 (행 수와 무관하게 메모리 일정)"""
+    tmp = f'{path}.{os.getpid()}.tmp'
+    gen = SyntheticComments(rows, seed, **options)
+    with open(tmp, 'w', encoding='utf-8-sig', newline='') as f:
+        for i, chunk in enumerate(gen.__iter__(chunksize)):
+            chunk.to_csv(f, index=False, header=i == 0)
+    os.replace(tmp, path)
+    return path
+
+
+# ============================================================
+# 측정 구간 (각 구간은 새 프로세스에서 실행해 최대 메모리를 따로 잰다)
+# ============================================================
+def stage_load(path, chunksize):
+    rows = 0
+    for chunk in iter_raw_chunks(path, chunksize):
+        rows += len(chunk)
+    return rows
+
+
+def stage_decode(path, chunksize):
+    rows = 0
+    for chunk in iter_raw_chunks(path, chunksize):
+        rows += len(decode_columns(chunk))
+    return rows
+
+
+def stage_aggregate(path, chunksize):
+    agg = aggregate_raw(path, chunksize=chunksize)
+    agg.finalize()
+    return agg.total_comments
+
+
+def stage_mentions(path, chunksize):
+    """본문 별칭 매칭 (원본 mentioned_members / raw_words 재작성)"""
+    matcher = MentionMatcher(GROUP_ALIASES['plave'])
+    rows = 0
+    for chunk in iter_raw_chunks(path, chunksize):
+        rows += len(matcher.annotate(chunk))
+    return rows
+
+
+def stage_language(path, chunksize):
+    """언어/지역 분류 (원본 표기를 무시하고 전부 다시 분류, 캐시는 메모리에서만)"""
+    classifier = LanguageClassifier()
+    rows = 0
+    for chunk in iter_raw_chunks(path, chunksize, classify=False):
+        rows += len(classifier.annotate(chunk, reclassify=True))
+    return rows
+
+
+def stage_cooccurrence(path, chunksize):
+    cooc = CooccurrenceMatrix()
+    rows = 0
+    for chunk in iter_raw_chunks(path, chunksize):
+        cooc.update(explode_list(chunk, 'mentioned_members', 'member'), len(chunk))
+        rows += len(chunk)
+    cooc.top_pairs()
+    return rows
+
+
+def stage_loyalty(path, chunksize, backend='exact'):
+    index = LoyaltyIndex(backend)
+    rows = 0
+    for chunk in iter_raw_chunks(path, chunksize):
+        index.add_chunk(chunk)
+        rows += len(chunk)
+    index.summary()
+    index.member_tiers()
+    return rows
+
+
+def stage_loyalty_sketch(path, chunksize):
+    return stage_loyalty(path, chunksize, 'sketch')
+
+
+def stage_cube(path, chunksize):
+    cube = RollupCube()
+    rows = 0
+    for chunk in iter_raw_chunks(path, chunksize):
+        cube.add_chunk(chunk)
+        rows += len(chunk)
+    cube.compact()
+    cube.tables()
+    return rows
+
+
+def stage_render(path, chunksize, repeat=20):
+    """집계 테이블 → 페이지 그림 생성 + JSON 직렬화 (브라우저 전송분). 집계 시간은 제외"""
+    tables = aggregate_raw(path, chunksize=chunksize).finalize()
+    total = tables['summary'].iloc[0]['total_comments']
+    builders = [
+        lambda: figures.language(tables['language']),
+        lambda: figures.member_mentions(tables['member']),
+        lambda: figures.cooc_rank(tables['cooccurrence']),
+        lambda: figures.cooc_heatmap(tables['member'], tables['cooccurrence'], total),
+        lambda: figures.fan_tiers(tables['loyal_fans']),
+        lambda: figures.loyal_rate(tables['loyal_fans']),
+        lambda: figures.super_rate(tables['loyal_fans']),
+        lambda: figures.member_region_heatmap(tables['member_region_keywords'])
+    ]
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for build in builders:
+            build().to_json()
+    return repeat * len(builders), time.perf_counter() - started
+
+
+STAGES = {
+    'load': stage_load,
+    'decode': stage_decode,
+    'mentions': stage_mentions,
+    'language': stage_language,
+    'aggregate': stage_aggregate,
+    'cooccurrence': stage_cooccurrence,
+    'loyalty': stage_loyalty,
+    'loyalty_sketch': stage_loyalty_sketch,
+    'cube': stage_cube,
+    'render': stage_render
+}
+
+
+def _run_stage(name, path, chunksize):
+    started = time.perf_counter()
+    result = STAGES[name](path, chunksize)
+    seconds = time.perf_counter() - started
+    units, seconds = result if isinstance(result, tuple) else (result, seconds)
+    # ru_maxrss 단위: Linux KB, macOS bytes
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    peak_mb = peak / (1 << 20) if sys.platform == 'darwin' else peak / 1024
+    return {'stage': name, 'seconds': round(seconds, 4), 'units': int(units),
+            'units_per_sec': round(units / seconds, 1) if seconds else None,
+            'peak_rss_mb': round(peak_mb, 1)}
+
+
+def run_benchmarks(path, stages=None, chunksize=CHUNK_SIZE, repeat=1):
+    """구간별 측정 (repeat 회 중 가장 빠른 값)"""
+    results = []
+    ctx = get_context('spawn')
+    for name in stages or list(STAGES):
+        runs = []
+        for _ in range(repeat):
+            with ProcessPoolExecutor(max_workers=1, mp_context=ctx) as pool:
+                runs.append(pool.submit(_run_stage, name, path, chunksize).result())
+        results.append(min(runs, key=lambda r: r['seconds']))
+        print(f"  {name:<15} {results[-1]['seconds']:>9.3f}s  {results[-1]['units_per_sec'] or 0:>12,.0f}/s"
+              f"  {results[-1]['peak_rss_mb']:>8.1f}MB")
+    return results
+
+
+def compare(results, baseline, tolerance=0.2):
+    """기준 결과보다 (1 + tolerance) 배 넘게 느려진 구간 목록"""
+    base = {r['stage']: r for r in baseline['results']}
+    regressions = []
+    for r in results:
+        b = base.get(r['stage'])
+        if b and b['seconds'] > 0 and r['seconds'] > b['seconds'] * (1 + tolerance):
+            regressions.append({'stage': r['stage'], 'baseline': b['seconds'], 'current': r['seconds'],
+                                'ratio': round(r['seconds'] / b['seconds'], 2)})
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='KFANTRIX 벤치마크 (합성 원본 댓글)')
+    parser.add_argument('--rows', type=int, default=1_000_000, help='합성 댓글 수 (예: 1000000 ~ 100000000)')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--raw', help='합성 대신 기존 원본 댓글 CSV 로 측정')
+    parser.add_argument('--stages', nargs='+', choices=list(STAGES), help='측정 구간 (기본: 전체)')
+    parser.add_argument('--chunksize', type=int, default=CHUNK_SIZE)
+    parser.add_argument('--repeat', type=int, default=1, help='구간별 반복 횟수 (최솟값 기록)')
+    parser.add_argument('--members', type=int, help=f'멤버 수 (기본: {len(MEMBERS)})')
+    parser.add_argument('--mention-rate', type=float, default=0.145)
+    parser.add_argument('--author-ratio', type=float, default=1.3)
+    parser.add_argument('--author-skew', type=float, default=0.6)
+    parser.add_argument('--videos', type=int, default=10)
+    parser.add_argument('--out', help='결과 JSON 경로 (기본: bench/results_<시각>.json)')
+    parser.add_argument('--compare', help='기준 결과 JSON (느려진 구간이 있으면 exit 1)')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='허용 지연 비율 (기본 0.2 = 20%%)')
+    args = parser.parse_args()
+
+    os.makedirs(BENCH_DIR, exist_ok=True)
+    options = {'mention_rate': args.mention_rate, 'author_ratio': args.author_ratio,
+               'author_skew': args.author_skew, 'videos': args.videos}
+    if args.members:
+        options['members'] = [f'm{i}' for i in range(args.members)]
+    if args.raw:
+        path = args.raw
+    else:
+        path = synthetic_path(args.rows, args.seed, args.chunksize, **options)
+        if not os.path.exists(path):
+            started = time.perf_counter()
+            write_synthetic(path, args.rows, args.seed, args.chunksize, **options)
+            print(f'🧪 {path} 생성 ({time.perf_counter() - started:.1f}초)')
+
+    print(f'⏱ {path}')
+    results = run_benchmarks(path, args.stages, args.chunksize, args.repeat)
+    report = {
+        'meta': {
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'input': path,
+            'rows': args.rows if not args.raw else None,
+            'seed': args.seed,
+            'options': options,
+            'chunksize': args.chunksize,
+            'python': platform.python_version(),
+            'pandas': pd.__version__,
+            'numpy': np.__version__,
+            'machine': platform.machine(),
+            'cpus': os.cpu_count()
+        },
+        'results': results
+    }
+    out = args.out or os.path.join(BENCH_DIR, f"results_{datetime.now(timezone.utc):%Y%m%dT%H%M%SZ}.json")
+    with open(out, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f'✅ {out}')
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for r in regressions:
+            print(f"❌ {r['stage']}: {r['baseline']:.3f}s → {r['current']:.3f}s (x{r['ratio']})")
+        if regressions:
+            sys.exit(1)
+        print('✅ 기준 대비 성능 저하 없음')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,157 @@
+# kfantrix_cache.py - 레플리카 공유 테이블 캐시
+# CSV 원본을 한 번만 파싱해 호스트 공유 디렉터리에 Arrow 로 두고
+# 모든 Streamlit 프로세스가 같은 파일을 메모리 맵으로 읽는다 (페이지 캐시 1벌).
+#
+# <cache_dir>/<name>@<stamp>.arrow
+#   stamp = 원본 파일 수정 시각+크기 → 원본이 바뀌면 새 파일, 예전 파일은 정리
+
+import argparse
+import glob
+import os
+
+import pandas as pd
+import pyarrow.feather as feather
+
+from kfantrix_pipeline import TABLE_FILES
+from kfantrix_store import STORE_DIR, read_manifest, read_table
+
+CACHE_ENV = 'KFANTRIX_CACHE_DIR'
+CHANNEL_FILE = 'channels_data.csv'
+
+
+def default_cache_dir():
+    """KFANTRIX_CACHE_DIR > /dev/shm (공유 메모리) > store/cache (로컬 디스크)"""
+    if os.environ.get(CACHE_ENV):
+        return os.environ[CACHE_ENV]
+    if os.path.isdir('/dev/shm'):
+        return '/dev/shm/kfantrix'
+    return os.path.join(STORE_DIR, 'cache')
+
+
+def file_stamp(path):
+    """파일 버전 스탬프 (없으면 None)"""
+    if not os.path.exists(path):
+        return None
+    stat = os.stat(path)
+    return f'{stat.st_mtime_ns:x}-{stat.st_size:x}'
+
+
+# ============================================================
+# 공유 캐시
+# ============================================================
+class SharedTableCache:
+    """이름 + 버전 스탬프로 구분되는 Arrow 파일 캐시.
+
+    파일은 tmp 에 쓴 뒤 os.replace 로 올리므로 다른 프로세스가 읽는 도중에도
+    반쯤 쓰인 파일을 보지 않는다. 예전 버전을 지워도 이미 메모리 맵한 프로세스는
+    그대로 읽을 수 있다.
+    """
+
+    def __init__(self, root=None):
+        self.root = root or default_cache_dir()
+
+    def path(self, name, stamp):
+        return os.path.join(self.root, f'{name}@{stamp}.arrow')
+
+    def get(self, name, stamp, load):
+        """캐시 테이블. 없으면 load() 결과를 저장 후 반환 (load 가 None 이면 None)"""
+        path = self.path(name, stamp)
+        if os.path.exists(path):
+            return feather.read_table(path, memory_map=True).to_pandas()
+        df = load()
+        if df is not None:
+            self.put(name, stamp, df)
+        return df
+
+    def put(self, name, stamp, df):
+        path = self.path(name, stamp)
+        try:
+            os.makedirs(self.root, exist_ok=True)
+            tmp = f'{path}.{os.getpid()}.tmp'
+            feather.write_feather(df, tmp, compression='uncompressed')
+            os.replace(tmp, path)
+        except OSError:
+            # 캐시 디렉터리를 못 쓰면 캐시 없이 동작
+            return
+        self.prune(name, keep=path)
+
+    def prune(self, name, keep=None):
+        """name 의 다른 버전 파일 삭제"""
+        for old in glob.glob(os.path.join(glob.escape(self.root), f'{glob.escape(name)}@*.arrow')):
+            if old != keep:
+                try:
+                    os.remove(old)
+                except OSError:
+                    pass
+
+    def read_csv(self, path, name=None):
+        """CSV 를 캐시 경유로 읽기 (원본이 없으면 None)"""
+        stamp = file_stamp(path)
+        if stamp is None:
+            return None
+        return self.get(name or os.path.basename(path), stamp,
+                        lambda: pd.read_csv(path, encoding='utf-8-sig'))
+
+    def clear(self):
+        for path in glob.glob(os.path.join(glob.escape(self.root), '*.arrow')):
+            os.remove(path)
+
+
+# ============================================================
+# 그룹 테이블 버전
+# ============================================================
+def table_source(prefix, key, store_dir=STORE_DIR, src_dir='.', manifest=None):
+    """테이블 하나의 (출처, 버전 스탬프). 저장소가 있으면 manifest 버전, 없으면 CSV 스탬프"""
+    manifest = manifest if manifest is not None else read_manifest(prefix, store_dir)
+    if manifest is not None and key in manifest.get('tables', {}):
+        return 'store', manifest['version']
+    return 'csv', file_stamp(os.path.join(src_dir, f'{prefix}_{TABLE_FILES[key]}.csv'))
+
+
+def load_table(prefix, key, source, cache=None, store_dir=STORE_DIR, src_dir='.'):
+    """그룹 테이블 하나 (저장소 우선, 없으면 공유 캐시 경유 CSV, 둘 다 없으면 None)"""
+    if source == 'store':
+        df = read_table(prefix, key, store_dir)
+        if df is not None:
+            return df
+    try:
+        return (cache or SharedTableCache()).read_csv(os.path.join(src_dir, f'{prefix}_{TABLE_FILES[key]}.csv'))
+    except Exception:
+        return None
+
+
+def warm(prefixes, cache=None, src_dir='.', store_dir=STORE_DIR):
+    """CSV 로만 있는 테이블을 미리 캐시에 올리기 (배포 직후/재시작 전 실행). 반환값은 올린 테이블 수"""
+    cache = cache or SharedTableCache()
+    loaded = 0
+    if cache.read_csv(os.path.join(src_dir, CHANNEL_FILE)) is not None:
+        loaded += 1
+    for prefix in prefixes:
+        manifest = read_manifest(prefix, store_dir)
+        for key, suffix in TABLE_FILES.items():
+            source, _ = table_source(prefix, key, store_dir, src_dir, manifest)
+            if source == 'csv' and cache.read_csv(os.path.join(src_dir, f'{prefix}_{suffix}.csv')) is not None:
+                loaded += 1
+    return loaded
+
+
+def main():
+    parser = argparse.ArgumentParser(description='레플리카 공유 테이블 캐시 예열/정리')
+    parser.add_argument('prefixes', nargs='*', default=['plave', 'nmixx', 'skz'])
+    parser.add_argument('--cache-dir', help=f'캐시 경로 (기본: ${CACHE_ENV} 또는 /dev/shm/kfantrix)')
+    parser.add_argument('--src-dir', default='.')
+    parser.add_argument('--store-dir', default=STORE_DIR)
+    parser.add_argument('--clear', action='store_true', help='캐시 비우기')
+    args = parser.parse_args()
+
+    cache = SharedTableCache(args.cache_dir)
+    if args.clear:
+        cache.clear()
+        print(f'🧹 {cache.root} 비움')
+        return
+    loaded = warm(args.prefixes, cache, args.src_dir, args.store_dir)
+    print(f'✅ {cache.root}: 테이블 {loaded}개 준비')
+
+
+if __name__ == '__main__':
+    main()
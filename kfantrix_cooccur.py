@@ -0,0 +1,165 @@
+# kfantrix_cooccur.py - 멤버 동시 언급(케미) 엔진
+# 댓글×멤버 희소 incidence 행렬 X 에 대해 Xᵀ·X 로 멤버×멤버 행렬을 한 번에 계산
+
+from collections import Counter
+from itertools import combinations
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+NORMALIZATIONS = ['count', 'jaccard', 'lift', 'pmi']
+
+
+# ============================================================
+# 동시 언급 행렬
+# ============================================================
+class CooccurrenceMatrix:
+    """멤버×멤버 동시 언급 행렬 (대각선 = 멤버별 언급 댓글 수).
+
+    청크 단위로 update() 를 반복 호출해 누적하고, 다른 그룹/기간의 행렬과
+    merge() 로 합칠 수 있다. 멤버는 처음 등장할 때 행렬에 추가된다.
+    """
+
+    def __init__(self, members=()):
+        self.members = []
+        self.index = {}
+        self.counts = np.zeros((0, 0), dtype=np.int64)
+        self.total = 0
+        self._add_members(members)
+
+    def _add_members(self, members):
+        new = [m for m in dict.fromkeys(members) if m not in self.index]
+        if not new:
+            return
+        for m in new:
+            self.index[m] = len(self.members)
+            self.members.append(m)
+        size = len(self.members)
+        grown = np.zeros((size, size), dtype=np.int64)
+        old = self.counts.shape[0]
+        grown[:old, :old] = self.counts
+        self.counts = grown
+
+    # -------------------- 누적 --------------------
+    def update(self, mentions, total_comments=None):
+        """(comment_id, member) long 테이블 반영.
+
+        total_comments 는 멤버 언급이 없는 댓글까지 포함한 청크 댓글 수
+        (lift/PMI 의 분모). 생략하면 언급 댓글 수를 쓴다.
+        """
+        mentions = mentions.drop_duplicates(['comment_id', 'member'])
+        comment_codes, comment_ids = pd.factorize(mentions['comment_id'])
+        self._add_members(mentions['member'].unique())
+        member_codes = mentions['member'].map(self.index).to_numpy()
+
+        size = len(self.members)
+        x = sparse.csr_matrix(
+            (np.ones(len(mentions), dtype=np.int64), (comment_codes, member_codes)),
+            shape=(len(comment_ids), size)
+        )
+        self.counts += (x.T @ x).toarray()
+        self.total += len(comment_ids) if total_comments is None else total_comments
+
+    def update_pairs(self, pairs, mention_counts=None, total_comments=0):
+        """기존 pair 테이블(member_1, member_2, count)로부터 채우기"""
+        members = list(mention_counts.index) if mention_counts is not None else []
+        self._add_members(members + list(pairs['member_1']) + list(pairs['member_2']))
+        i = np.array([self.index[m] for m in pairs['member_1']], dtype=np.int64)
+        j = np.array([self.index[m] for m in pairs['member_2']], dtype=np.int64)
+        counts = pairs['count'].to_numpy(dtype=np.int64)
+        np.add.at(self.counts, (i, j), counts)
+        np.add.at(self.counts, (j, i), counts)
+        if mention_counts is not None:
+            d = np.array([self.index[m] for m in members], dtype=np.int64)
+            self.counts[d, d] += mention_counts.to_numpy(dtype=np.int64)
+        self.total += total_comments
+
+    def merge(self, other):
+        """다른 행렬(다른 영상/기간/그룹) 합치기"""
+        self._add_members(other.members)
+        idx = np.array([self.index[m] for m in other.members], dtype=np.int64)
+        self.counts[np.ix_(idx, idx)] += other.counts
+        self.total += other.total
+        return self
+
+    # -------------------- 결과 --------------------
+    def matrix(self, normalize='count', members=None, diagonal=False):
+        """멤버×멤버 DataFrame. normalize: count / jaccard / lift / pmi"""
+        if normalize not in NORMALIZATIONS:
+            raise ValueError(f'normalize must be one of {NORMALIZATIONS}')
+        members = list(members) if members is not None else self.members
+        idx = np.array([self.index.get(m, -1) for m in members], dtype=np.int64)
+        counts = np.zeros((len(members), len(members)), dtype=np.int64)
+        known = idx >= 0
+        counts[np.ix_(known, known)] = self.counts[np.ix_(idx[known], idx[known])]
+
+        values = counts.astype(float)
+        single = np.diag(counts).astype(float)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            if normalize == 'jaccard':
+                values = counts / (single[:, None] + single[None, :] - counts)
+            elif normalize in ('lift', 'pmi'):
+                values = counts * float(self.total) / np.outer(single, single)
+                if normalize == 'pmi':
+                    values = np.log2(values)
+        values = np.nan_to_num(values, nan=0.0, posinf=0.0, neginf=0.0)
+        if not diagonal:
+            np.fill_diagonal(values, 0)
+        if normalize == 'count':
+            values = values.astype(np.int64)
+        return pd.DataFrame(values, index=members, columns=members)
+
+    def top_pairs(self, k=None, normalize='count'):
+        """상위 pair 테이블 (member_1, member_2, pair, count[, score])"""
+        i, j = np.triu_indices(len(self.members), k=1)
+        counts = self.counts[i, j]
+        mask = counts > 0
+        i, j, counts = i[mask], j[mask], counts[mask]
+        df = pd.DataFrame({
+            'member_1': [self.members[a] for a in i],
+            'member_2': [self.members[b] for b in j],
+            'count': counts
+        })
+        # 이름 순으로 pair 방향을 고정 (member_1 < member_2)
+        swap = df['member_1'] > df['member_2']
+        df.loc[swap, ['member_1', 'member_2']] = df.loc[swap, ['member_2', 'member_1']].to_numpy()
+        df.insert(2, 'pair', df['member_1'] + '+' + df['member_2'])
+        sort_by = 'count'
+        if normalize != 'count':
+            scores = self.matrix(normalize, diagonal=True).to_numpy()
+            df['score'] = scores[i, j]
+            sort_by = 'score'
+        df = df.sort_values(sort_by, ascending=False, kind='stable').reset_index(drop=True)
+        return df.head(k) if k else df
+
+
+# ============================================================
+# 3인 이상 조합 (트리오, 유닛)
+# ============================================================
+def combo_counts(mentions, size=3, counter=None):
+    """size 명 이상이 함께 언급된 조합별 댓글 수 (트리오부터 완전체까지).
+
+    댓글별 멤버 집합을 먼저 value_counts 로 줄인 뒤 집합마다 한 번만
+    부분 조합(size 명 ~ 집합 전체)을 펼치므로, 비용은 댓글 수가 아니라 서로 다른 집합 수에 비례한다.
+    """
+    counter = Counter() if counter is None else counter
+    sets = (mentions.drop_duplicates(['comment_id', 'member'])
+            .groupby('comment_id')['member']
+            .agg(lambda ms: tuple(sorted(ms))))
+    sets = sets[sets.map(len) >= size].value_counts()
+    for members, count in sets.items():
+        for n in range(size, len(members) + 1):
+            for combo in combinations(members, n):
+                counter[combo] += count
+    return counter
+
+
+def combo_table(counter, k=None):
+    """조합 Counter → DataFrame(combo, size, count). k 는 조합 크기별 상위 개수"""
+    rows = [{'combo': '+'.join(combo), 'size': len(combo), 'count': count}
+            for combo, count in counter.most_common()]
+    df = pd.DataFrame(rows, columns=['combo', 'size', 'count'])
+    if k:
+        df = df.groupby('size', sort=True).head(k)
+    return df.sort_values(['size', 'count'], ascending=[True, False], kind='stable').reset_index(drop=True)
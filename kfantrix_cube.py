@@ -0,0 +1,383 @@
+# kfantrix_cube.py - 날짜 × 영상 × 언어/국가 × 멤버 롤업 큐브
+# 댓글/멤버 언급 수와 키워드 카테고리 점수를 미리 합산해 두고,
+# 기간·영상 슬라이스는 날짜 정렬 배열의 searchsorted + bincount 로 계산
+
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+import pyarrow.feather as feather
+
+from kfantrix_decode import explode_keywords, explode_list
+from kfantrix_pipeline import (CHUNK_SIZE, MEMBER_LANG_COLUMNS, MIN_MEMBER_REGION_COMMENTS, MIN_REGION_COMMENTS,
+                               SCORE_CATEGORIES, format_top, iter_raw_chunks, rate)
+from kfantrix_store import STORE_DIR, group_dir
+from kfantrix_topk import RAW_CATEGORY
+
+DIMS = ['date', 'video_id', 'language', 'region']
+SCORE_COLUMNS = [f'{c}_score' for c in SCORE_CATEGORIES]
+MEASURES = ['comments'] + SCORE_COLUMNS
+FACTS = {'comments': DIMS, 'mentions': DIMS + ['member'], 'pairs': DIMS + ['member_1', 'member_2']}
+CATEGORY_DIMS = ['video_id', 'language', 'region', 'member', 'member_1', 'member_2']
+
+
+# ============================================================
+# 청크 → 팩트
+# ============================================================
+def chunk_facts(chunk):
+    """원본 댓글 청크 → {팩트 이름: 팩트} (댓글 / 멤버 언급 / 멤버 쌍 동시 언급)"""
+    chunk = chunk.reset_index(drop=True)
+    base = chunk[['comment_id'] + DIMS].copy()
+    base['language'] = base['language'].fillna('unknown')
+    base['region'] = base['region'].fillna('기타')
+    base['comments'] = 1
+
+    keywords = explode_keywords(chunk)
+    keywords = keywords[keywords['category'].isin(SCORE_CATEGORIES)]
+    scores = (keywords.groupby(['comment_id', 'category']).size()
+              .unstack(fill_value=0)
+              .reindex(columns=SCORE_CATEGORIES, fill_value=0))
+    scores.columns = SCORE_COLUMNS
+    base = base.merge(scores, left_on='comment_id', right_index=True, how='left')
+    base[SCORE_COLUMNS] = base[SCORE_COLUMNS].fillna(0).astype('int64')
+
+    members = explode_list(chunk, 'mentioned_members', 'member').drop_duplicates()
+    mentions = members.merge(base, on='comment_id')
+
+    # 같은 댓글의 멤버 쌍 (이름 순 member_1 < member_2, 케미 테이블과 같은 방향)
+    pairs = members.merge(members, on='comment_id', suffixes=('_1', '_2'))
+    pairs = pairs[pairs['member_1'] < pairs['member_2']].merge(base, on='comment_id')
+
+    return {
+        'comments': base.groupby(DIMS, as_index=False)[MEASURES].sum(),
+        'mentions': mentions.groupby(FACTS['mentions'], as_index=False)[MEASURES].sum(),
+        'pairs': pairs.groupby(FACTS['pairs'], as_index=False)[MEASURES].sum()
+    }
+
+
+# ============================================================
+# 큐브
+# ============================================================
+class RollupCube:
+    """사전 합산된 팩트 테이블 3종 (comments / mentions / pairs).
+
+    add_chunk() 로 부분 팩트를 쌓고 compact() 에서 합친 뒤 날짜순으로
+    정렬해 numpy 코드 배열로 고정한다. 조회는 고정된 배열만 사용한다.
+    """
+
+    def __init__(self):
+        self.facts = {name: None for name in FACTS}
+        self._parts = {name: [] for name in FACTS}
+        self._arrays = {}
+        # 처음부터 쌓지 않은 팩트 (일부 댓글만 담기므로 쌓지도 조회하지도 않음)
+        self.missing = set()
+
+    def __setstate__(self, state):
+        # 멤버 쌍 팩트가 없던 이전 수집 상태: --full 로 다시 만들 때까지 쌍 팩트 없이 동작
+        self.__dict__.update(state)
+        self.__dict__.setdefault('missing', set())
+        for name in FACTS:
+            if name not in self.facts:
+                self.facts[name] = None
+                self._parts[name] = []
+                self.missing.add(name)
+
+    # -------------------- 적재 --------------------
+    def add_chunk(self, chunk):
+        for name, df in chunk_facts(chunk).items():
+            if name not in self.missing:
+                self._parts[name].append(df)
+
+    def compact(self):
+        for name, dims in FACTS.items():
+            frames = [f for f in [self.facts[name]] + self._parts[name] if f is not None]
+            if not frames:
+                continue
+            df = pd.concat(frames, ignore_index=True)
+            for col in CATEGORY_DIMS:
+                if col in df:
+                    df[col] = df[col].astype(str)
+            df = (df.groupby(dims, as_index=False)[MEASURES].sum()
+                  .sort_values('date', kind='stable')
+                  .reset_index(drop=True))
+            self.facts[name] = df
+            self._parts[name] = []
+        self._freeze()
+        return self
+
+    def merge(self, other):
+        """다른 큐브(다른 영상 shard)의 팩트 합치기. 조회 전에 compact() 필요"""
+        self.missing |= other.missing
+        for name in self.missing:
+            self.facts[name], self._parts[name] = None, []
+        for name in [n for n in FACTS if n not in self.missing]:
+            self._parts[name] += [f for f in [other.facts[name]] + other._parts[name] if f is not None]
+        return self
+
+    def _freeze(self):
+        # 차원 값 목록은 두 팩트가 공유 (코드가 같아야 bincount 결과를 맞출 수 있음)
+        self.categories = {}
+        for col in CATEGORY_DIMS:
+            values = set()
+            for df in self.facts.values():
+                if df is not None and col in df:
+                    values.update(df[col].astype(str))
+            self.categories[col] = sorted(values)
+
+        self.lang_region = {}
+        self._arrays = {}
+        for name, df in self.facts.items():
+            if df is None:
+                continue
+            arrays = {'date': df['date'].to_numpy(dtype=str)}
+            for col in CATEGORY_DIMS:
+                if col in df:
+                    arrays[col] = pd.Categorical(df[col].astype(str),
+                                                 categories=self.categories[col]).codes.astype(np.int64)
+            for col in MEASURES:
+                arrays[col] = df[col].to_numpy(dtype=np.int64)
+            self._arrays[name] = arrays
+            self.lang_region.update(df.drop_duplicates('language').set_index('language')['region'])
+
+    # -------------------- 조회 --------------------
+    def date_range(self):
+        dates = self._arrays.get('comments', {}).get('date')
+        if dates is None or not len(dates):
+            return None, None
+        return str(dates[0]), str(dates[-1])
+
+    def videos(self):
+        return list(self.categories.get('video_id', []))
+
+    def _slice(self, name, start=None, end=None, videos=None):
+        """기간은 searchsorted, 영상은 코드 마스크로 자른 배열 dict"""
+        arrays = self._arrays.get(name)
+        if arrays is None:
+            return None
+        dates = arrays['date']
+        lo = np.searchsorted(dates, start, 'left') if start else 0
+        hi = np.searchsorted(dates, end, 'right') if end else len(dates)
+        view = {col: values[lo:hi] for col, values in arrays.items()}
+        if videos:
+            index = {v: i for i, v in enumerate(self.categories['video_id'])}
+            codes = [index[v] for v in videos if v in index]
+            mask = np.isin(view['video_id'], codes)
+            view = {col: values[mask] for col, values in view.items()}
+        return view
+
+    def _sum(self, view, keys, measure='comments'):
+        """keys 코드 조합별 합계 (keys 순서의 다차원 배열)"""
+        sizes = [len(self.categories[k]) for k in keys]
+        flat = np.zeros(len(view[measure]), dtype=np.int64)
+        for key, size in zip(keys, sizes):
+            flat = flat * size + view[key]
+        totals = np.bincount(flat, weights=view[measure], minlength=int(np.prod(sizes)))
+        return totals.astype(np.int64).reshape(sizes)
+
+    def summary(self, start=None, end=None, videos=None):
+        view = self._slice('comments', start, end, videos)
+        return {
+            'total_comments': int(view['comments'].sum()),
+            'total_videos': int(len(np.unique(view['video_id'])))
+        }
+
+    def language(self, start=None, end=None, videos=None):
+        view = self._slice('comments', start, end, videos)
+        counts = self._sum(view, ['language'])
+        total = counts.sum()
+        langs = self.categories['language']
+        rows = [{'language': langs[i], 'region': self.lang_region[langs[i]], 'count': int(counts[i]),
+                 'percentage': rate(counts[i], total, 2)}
+                for i in np.argsort(-counts, kind='stable') if counts[i]]
+        return pd.DataFrame(rows, columns=['language', 'region', 'count', 'percentage'])
+
+    def member(self, start=None, end=None, videos=None):
+        total = self.summary(start, end, videos)['total_comments']
+        view = self._slice('mentions', start, end, videos)
+        by_lang = self._sum(view, ['member', 'language'])
+        langs = self.categories['language']
+        rows = []
+        for i, member in enumerate(self.categories['member']):
+            mentions = int(by_lang[i].sum())
+            if not mentions:
+                continue
+            row = {'member': member, 'mention_count': mentions, 'mention_rate': rate(mentions, total, 2)}
+            for lang, col in MEMBER_LANG_COLUMNS.items():
+                row[col] = int(by_lang[i][langs.index(lang)]) if lang in langs else 0
+            row['lang_other'] = mentions - sum(row[col] for col in MEMBER_LANG_COLUMNS.values())
+            rows.append(row)
+        df = pd.DataFrame(rows)
+        return df.sort_values('mention_count', ascending=False).reset_index(drop=True) if rows else None
+
+    def region_member(self, start=None, end=None, videos=None):
+        comments = self._sum(self._slice('comments', start, end, videos), ['language'])
+        by_lang = self._sum(self._slice('mentions', start, end, videos), ['language', 'member'])
+        langs = self.categories['language']
+        members = self.categories['member']
+        rows = []
+        for i in np.argsort(-comments, kind='stable'):
+            if comments[i] < MIN_REGION_COMMENTS or langs[i] == 'unknown':
+                continue
+            top = int(np.argmax(by_lang[i])) if members else 0
+            has_top = bool(members) and by_lang[i][top] > 0
+            rows.append({
+                'language': langs[i],
+                'region': self.lang_region[langs[i]],
+                'total_comments': int(comments[i]),
+                'top_member': members[top] if has_top else '',
+                'top_member_count': int(by_lang[i][top]) if has_top else 0
+            })
+        return pd.DataFrame(rows, columns=['language', 'region', 'total_comments',
+                                           'top_member', 'top_member_count'])
+
+    def member_region_keywords(self, start=None, end=None, videos=None, keywords=None):
+        """멤버 × 국가 점수 (집계 테이블과 같은 최소 댓글 수 기준).
+
+        top_words 는 키워드 요약(KeywordSummaries)이 있으면 같은 기간의 raw_words 상위 5개.
+        요약에는 영상 차원이 없으므로 영상 필터가 있어도 기간 기준 단어다.
+        """
+        view = self._slice('mentions', start, end, videos)
+        keys = ['member', 'region']
+        counts = self._sum(view, keys)
+        scores = {col: self._sum(view, keys, col) for col in SCORE_COLUMNS}
+        members, regions = self.categories['member'], self.categories['region']
+        rows = []
+        for i in range(len(members)):
+            for j in np.argsort(-counts[i], kind='stable'):
+                if counts[i, j] < MIN_MEMBER_REGION_COMMENTS:
+                    break
+                row_scores = {col: int(scores[col][i, j]) for col in SCORE_COLUMNS}
+                words = ''
+                if keywords is not None:
+                    words = format_top(keywords.summary(RAW_CATEGORY, members[i], regions[j], start, end),
+                                       5, with_count=False)
+                rows.append({
+                    'member': members[i],
+                    'region': regions[j],
+                    'comment_count': int(counts[i, j]),
+                    'top_category': max(SCORE_CATEGORIES, key=lambda c: row_scores[f'{c}_score']),
+                    **row_scores,
+                    'top_words': words
+                })
+        return pd.DataFrame(rows) if rows else None
+
+    def cooccurrence(self, start=None, end=None, videos=None):
+        """기간·영상 슬라이스의 멤버 쌍 동시 언급 (케미 테이블과 같은 컬럼, 쌍 팩트가 없으면 None)"""
+        view = self._slice('pairs', start, end, videos)
+        if view is None:
+            return None
+        counts = self._sum(view, ['member_1', 'member_2'])
+        first, second = self.categories['member_1'], self.categories['member_2']
+        i, j = np.nonzero(counts)
+        df = pd.DataFrame({
+            'member_1': [first[a] for a in i],
+            'member_2': [second[b] for b in j],
+            'count': counts[i, j]
+        })
+        df.insert(2, 'pair', df['member_1'] + '+' + df['member_2'])
+        return df.sort_values('count', ascending=False, kind='stable').reset_index(drop=True)
+
+    def region_keywords(self, start=None, end=None, videos=None, keywords=None):
+        """국가별 댓글 수 + 키워드 (키워드는 요약이 있을 때만, 영상 차원 없이 기간 기준)"""
+        counts = self._sum(self._slice('comments', start, end, videos), ['region'])
+        regions = self.categories['region']
+        rows = []
+        for i in np.argsort(-counts, kind='stable'):
+            if not counts[i]:
+                break
+            row = {'region': regions[i]}
+            for col, category, n in [('top_visual', 'visual', 5), ('top_talent', 'talent', 5),
+                                     ('top_love', 'love', 5), ('top_raw_words', RAW_CATEGORY, 10)]:
+                row[col] = '' if keywords is None else \
+                    format_top(keywords.summary(category, region=regions[i], start=start, end=end), n)
+            row['comment_count'] = int(counts[i])
+            rows.append(row)
+        return pd.DataFrame(rows, columns=['region', 'top_visual', 'top_talent', 'top_love',
+                                           'top_raw_words', 'comment_count'])
+
+    def tables(self, start=None, end=None, videos=None, keywords=None):
+        """대시보드 테이블 키로 슬라이스 결과 묶음 (keywords 는 top_words 용 KeywordSummaries).
+
+        쌍 팩트가 없는 예전 큐브면 cooccurrence 는 빠진다 (호출 쪽에서 전체 기간 표시).
+        """
+        tables = {
+            'language': self.language(start, end, videos),
+            'member': self.member(start, end, videos),
+            'region_member': self.region_member(start, end, videos),
+            'region_keywords': self.region_keywords(start, end, videos, keywords),
+            'member_region_keywords': self.member_region_keywords(start, end, videos, keywords)
+        }
+        cooccurrence = self.cooccurrence(start, end, videos)
+        if cooccurrence is not None:
+            tables['cooccurrence'] = cooccurrence
+        return tables
+
+
+# ============================================================
+# 저장/복원
+# ============================================================
+def save_cube(cube, prefix, store_dir=STORE_DIR):
+    path = group_dir(prefix, store_dir)
+    os.makedirs(path, exist_ok=True)
+    for name, df in cube.facts.items():
+        target = os.path.join(path, f'cube_{name}.arrow')
+        if df is None:
+            # 예전 실행이 남긴 팩트가 지금 큐브와 섞이지 않도록
+            if os.path.exists(target):
+                os.remove(target)
+            continue
+        df = df.copy()
+        for col in CATEGORY_DIMS:
+            if col in df:
+                df[col] = df[col].astype('category')
+        feather.write_feather(df, target, compression='uncompressed')
+
+
+def cube_version(prefix, store_dir=STORE_DIR):
+    """큐브 파일 수정 시각 (캐시 키 용도, 없으면 None)"""
+    path = os.path.join(group_dir(prefix, store_dir), 'cube_comments.arrow')
+    return os.path.getmtime(path) if os.path.exists(path) else None
+
+
+def load_cube(prefix, store_dir=STORE_DIR):
+    """저장된 큐브 (없으면 None)"""
+    cube = RollupCube()
+    for name in FACTS:
+        path = os.path.join(group_dir(prefix, store_dir), f'cube_{name}.arrow')
+        if not os.path.exists(path):
+            # 쌍 팩트는 나중에 추가된 것이라 없어도 나머지로 동작
+            if name == 'pairs':
+                continue
+            return None
+        cube.facts[name] = feather.read_table(path, memory_map=True).to_pandas()
+    return cube.compact()
+
+
+def build_cube(prefix, raw_path=None, store_dir=STORE_DIR, chunksize=CHUNK_SIZE):
+    """원본 댓글로 큐브 생성 후 저장"""
+    raw_path = raw_path or f'{prefix}_comments_raw.csv'
+    cube = RollupCube()
+    for chunk in iter_raw_chunks(raw_path, chunksize, prefix):
+        cube.add_chunk(chunk.drop_duplicates('comment_id'))
+    cube.compact()
+    save_cube(cube, prefix, store_dir)
+    return cube
+
+
+def main():
+    parser = argparse.ArgumentParser(description='기간/영상 필터용 롤업 큐브 생성')
+    parser.add_argument('prefix', help='그룹 prefix (예: plave)')
+    parser.add_argument('--raw', help='원본 댓글 CSV 경로 (기본: <prefix>_comments_raw.csv)')
+    parser.add_argument('--store-dir', default=STORE_DIR)
+    parser.add_argument('--chunksize', type=int, default=CHUNK_SIZE)
+    args = parser.parse_args()
+
+    cube = build_cube(args.prefix, args.raw, args.store_dir, args.chunksize)
+    start, end = cube.date_range()
+    rows = {name: len(df) for name, df in cube.facts.items() if df is not None}
+    print(f"✅ {args.prefix}: {start} ~ {end}, 팩트 " + ', '.join(f'{k} {v:,}행' for k, v in rows.items()))
+
+
+if __name__ == '__main__':
+    main()
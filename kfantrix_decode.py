@@ -0,0 +1,108 @@
+# kfantrix_decode.py - 원본 댓글의 문자열 list/dict 컬럼 디코더
+# mentioned_members / keywords / raw_words 는 파이썬 repr 문자열로 저장되어 있음
+#   "['은호', '하민']", "{'visual': ['입'], 'love': ['사랑']}"
+# 행마다 ast.literal_eval 하는 대신 정규식 한 번으로 토큰을 뽑아낸다
+
+import ast
+import re
+
+import pandas as pd
+
+# ============================================================
+# 정규식
+# ============================================================
+# 따옴표 문자열 하나 ('...' 또는 repr 이 작은따옴표를 피할 때 쓰는 "...")
+_QUOTED = r"""'(?:[^'\\]|\\.)*'|"(?:[^"\\]|\\.)*\""""
+ITEM_RE = re.compile(f'({_QUOTED})')
+# dict 의 키(뒤에 ':' 가 붙은 문자열) 또는 값 문자열
+KEY_OR_ITEM_RE = re.compile(rf'({_QUOTED})\s*:|({_QUOTED})')
+
+LIST_COLUMNS = ['mentioned_members', 'raw_words']
+DICT_COLUMNS = ['keywords']
+
+
+def _unquote(token):
+    """따옴표 토큰 → 문자열 (이스케이프가 있을 때만 literal_eval)"""
+    if '\\' in token:
+        return ast.literal_eval(token)
+    return token[1:-1]
+
+
+# ============================================================
+# 디코더
+# ============================================================
+def decode_list(series):
+    """"['a', 'b']" 형태의 Series → list Series"""
+    tokens = series.fillna('').astype(str).str.findall(ITEM_RE)
+    return tokens.map(lambda items: [_unquote(t) for t in items])
+
+
+def _tokens_to_dict(tokens):
+    result = {}
+    current = None
+    for key, item in tokens:
+        if key:
+            current = result.setdefault(_unquote(key), [])
+        elif current is not None:
+            current.append(_unquote(item))
+    return result
+
+
+def decode_dict(series):
+    """"{'cat': ['a', 'b']}" 형태의 Series → dict Series"""
+    tokens = series.fillna('').astype(str).str.findall(KEY_OR_ITEM_RE)
+    return tokens.map(_tokens_to_dict)
+
+
+def decode_columns(chunk):
+    """원본 댓글 청크의 list/dict 컬럼을 한 번에 디코딩"""
+    chunk = chunk.copy()
+    for col in LIST_COLUMNS:
+        chunk[col] = decode_list(chunk[col])
+    for col in DICT_COLUMNS:
+        chunk[col] = decode_dict(chunk[col])
+    return chunk
+
+
+# ============================================================
+# long 포맷 변환
+# ============================================================
+def _explode_tokens(chunk, column, pattern):
+    """정규식 토큰을 행 단위로 펼치기 → (행 위치, 토큰)"""
+    tokens = chunk[column].fillna('').astype(str).str.findall(pattern)
+    tokens.index = pd.RangeIndex(len(tokens))
+    tokens = tokens.explode().dropna()
+    return tokens.index.to_numpy(), tokens
+
+
+def explode_list(chunk, column, value_name):
+    """(comment_id, value) long 테이블"""
+    rows, tokens = _explode_tokens(chunk, column, ITEM_RE)
+    return pd.DataFrame({
+        'comment_id': chunk['comment_id'].to_numpy()[rows],
+        value_name: [_unquote(t) for t in tokens]
+    })
+
+
+def explode_keywords(chunk, column='keywords'):
+    """(comment_id, category, keyword) long 테이블"""
+    rows, tokens = _explode_tokens(chunk, column, KEY_OR_ITEM_RE)
+    pairs = pd.DataFrame(tokens.tolist(), columns=['key', 'item'], index=rows)
+    # 키 토큰 위치에서 카테고리를 잡고 같은 댓글 안에서 아래로 채움
+    category = pairs['key'].where(pairs['key'] != '').groupby(level=0).ffill()
+    is_item = (pairs['item'] != '').to_numpy()
+    return pd.DataFrame({
+        'comment_id': chunk['comment_id'].to_numpy()[rows[is_item]],
+        'category': [_unquote(t) for t in category[is_item]],
+        'keyword': [_unquote(t) for t in pairs['item'][is_item]]
+    })
+
+
+def to_long(chunk):
+    """원본 댓글 청크 → 본문 테이블 + long 테이블 3종"""
+    return {
+        'comments': chunk.drop(columns=LIST_COLUMNS + DICT_COLUMNS),
+        'mentions': explode_list(chunk, 'mentioned_members', 'member'),
+        'keywords': explode_keywords(chunk),
+        'raw_words': explode_list(chunk, 'raw_words', 'word')
+    }
@@ -0,0 +1,232 @@
+# kfantrix_export.py - 내보내기 파일 생성
+# 테이블은 데이터 버전마다 한 번만 CSV/Parquet/XLSX 로 써 두고 디스크에서 내려준다.
+# 원본 댓글 슬라이스(멤버/국가/기간)는 청크 단위로 걸러 바로 파일에 이어 쓴다.
+# 지난 버전 폴더는 수집(publish) 때 EXPORT_GRACE 동안 새 파일이 없었던 것만 지운다.
+#
+# store/<prefix>/exports/<version>/<name>.<fmt>
+
+import argparse
+import hashlib
+import importlib.util
+import os
+import shutil
+import sys
+import time
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from kfantrix_decode import decode_list
+from kfantrix_pipeline import CHUNK_SIZE, TABLE_FILES, iter_raw_chunks
+from kfantrix_search import SearchIndex
+from kfantrix_store import STORE_DIR, group_dir, read_table
+
+EXPORT_DIR = 'exports'
+MIME_TYPES = {
+    'csv': 'text/csv',
+    'parquet': 'application/vnd.apache.parquet',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+}
+SLICE_COLUMNS = ['comment_id', 'video_id', 'date', 'region', 'members', 'likes', 'author', 'text']
+EXPORT_GRACE = 6 * 3600  # 초. 다른 레플리카가 아직 옛 버전을 쓰고 있을 수 있는 유예 시간
+
+
+def available_formats():
+    """사용 가능한 형식 (xlsx 는 openpyxl 이 있을 때만)"""
+    formats = ['csv', 'parquet']
+    if importlib.util.find_spec('openpyxl') is not None:
+        formats.append('xlsx')
+    return formats
+
+
+def version_tag(*parts):
+    """버전/필터 조합 → 짧은 디렉터리·파일 이름"""
+    return hashlib.sha1(repr(parts).encode('utf-8')).hexdigest()[:12]
+
+
+def export_dir(prefix, version, store_dir=STORE_DIR):
+    return os.path.join(group_dir(prefix, store_dir), EXPORT_DIR, version_tag(version))
+
+
+def prune_exports(prefix, store_dir=STORE_DIR, grace=EXPORT_GRACE):
+    """grace 초 넘게 새 파일이 생기지 않은 버전 폴더 삭제 (수집 publish 에서 호출).
+
+    앱은 폴더를 지우지 않는다. 옛 버전을 쓰는 레플리카가 있으면 폴더 mtime 이 갱신되어 남는다.
+    """
+    root = os.path.join(group_dir(prefix, store_dir), EXPORT_DIR)
+    if not os.path.isdir(root):
+        return
+    cutoff = time.time() - grace
+    for name in os.listdir(root):
+        path = os.path.join(root, name)
+        if os.path.getmtime(path) < cutoff:
+            shutil.rmtree(path, ignore_errors=True)
+
+
+# ============================================================
+# 테이블 내보내기
+# ============================================================
+def write_table(df, path, fmt):
+    """DataFrame 하나를 fmt 로 저장 (tmp → os.replace)"""
+    tmp = f'{path}.{os.getpid()}.tmp'
+    if fmt == 'csv':
+        df.to_csv(tmp, index=False, encoding='utf-8-sig')
+    elif fmt == 'parquet':
+        df.to_parquet(tmp, index=False)
+    elif fmt == 'xlsx':
+        df.to_excel(tmp, index=False, engine='openpyxl')
+    else:
+        raise ValueError(f'fmt must be one of {list(MIME_TYPES)}')
+    os.replace(tmp, path)
+
+
+def table_export(prefix, name, fmt, version, load, filters=(), store_dir=STORE_DIR):
+    """(데이터 버전, 필터)별 내보내기 파일 경로. 없을 때만 load() 로 만들어 쓴다 (load 가 None 이면 None)"""
+    folder = export_dir(prefix, version, store_dir)
+    path = os.path.join(folder, f'{name}_{version_tag(*filters)}.{fmt}' if filters else f'{name}.{fmt}')
+    if os.path.exists(path):
+        return path
+    df = load()
+    if df is None:
+        return None
+    os.makedirs(folder, exist_ok=True)
+    write_table(df, path, fmt)
+    return path
+
+
+# ============================================================
+# 원본 댓글 슬라이스
+# ============================================================
+def _filter(df, region=None, start=None, end=None):
+    if region:
+        df = df[df['region'] == region]
+    if start:
+        df = df[df['date'] >= start]
+    if end:
+        df = df[df['date'] <= end]
+    return df
+
+
+def iter_comment_slice(prefix, member=None, region=None, start=None, end=None,
+                       store_dir=STORE_DIR, raw_path=None, chunksize=CHUNK_SIZE):
+    """조건에 맞는 원본 댓글을 DataFrame 청크로 하나씩.
+
+    검색 색인 세그먼트가 있으면 메모리 맵된 docs 를 배치 단위로 읽고,
+    없으면 원본 CSV 를 청크로 스트리밍한다. 어느 쪽이든 전체를 메모리에 올리지 않는다.
+    """
+    index = SearchIndex(prefix, store_dir)
+    if index:
+        for segment in index.segments:
+            bit = segment.member_mask(member) if member else None
+            if member and bit is None:
+                continue
+            for batch in segment.docs.to_batches(max_chunksize=chunksize):
+                df = _filter(batch.to_pandas(), region, start, end)
+                if bit is not None:
+                    df = df[(df['members'] & bit) != 0]
+                if df.empty:
+                    continue
+                df = df.assign(members=[', '.join(m for i, m in enumerate(segment.members) if bits >> i & 1)
+                                        for bits in df['members']])
+                yield df[SLICE_COLUMNS]
+        return
+
+    raw_path = raw_path or f'{prefix}_comments_raw.csv'
+    if not os.path.exists(raw_path):
+        return
+    for chunk in iter_raw_chunks(raw_path, chunksize, prefix):
+        chunk = chunk.drop_duplicates('comment_id').assign(
+            date=lambda c: c['date'].astype(str),
+            region=lambda c: c['region'].fillna('기타'),
+            likes=lambda c: pd.to_numeric(c['likes'], errors='coerce').fillna(0).astype('int64'))
+        chunk = _filter(chunk, region, start, end)
+        members = decode_list(chunk['mentioned_members'])
+        if member:
+            keep = members.map(lambda ms: member in ms)
+            chunk, members = chunk[keep], members[keep]
+        if chunk.empty:
+            continue
+        yield chunk.assign(members=members.str.join(', '))[SLICE_COLUMNS]
+
+
+def write_slice(path, chunks, fmt='csv'):
+    """청크를 파일에 이어 쓰기. 반환값은 행 수"""
+    rows = 0
+    tmp = f'{path}.{os.getpid()}.tmp'
+    writer = None
+    with open(tmp, 'wb') as f:
+        for df in chunks:
+            if fmt == 'csv':
+                df.to_csv(f, index=False, header=rows == 0, encoding='utf-8-sig' if rows == 0 else 'utf-8')
+            elif fmt == 'parquet':
+                table = pa.Table.from_pandas(df, preserve_index=False)
+                if writer is None:
+                    writer = pq.ParquetWriter(f, table.schema)
+                writer.write_table(table.cast(writer.schema))
+            else:
+                raise ValueError('slice export supports csv / parquet only')
+            rows += len(df)
+        if rows == 0:
+            # 빈 결과도 헤더/스키마는 남긴다
+            empty = pd.DataFrame(columns=SLICE_COLUMNS)
+            if fmt == 'csv':
+                empty.to_csv(f, index=False, encoding='utf-8-sig')
+            else:
+                empty.to_parquet(f, index=False)
+        elif writer is not None:
+            writer.close()
+    os.replace(tmp, path)
+    return rows
+
+
+def slice_export(prefix, version, fmt='csv', member=None, region=None, start=None, end=None,
+                 store_dir=STORE_DIR):
+    """조건별 슬라이스 파일 경로 (같은 버전·조건이면 다시 만들지 않음)"""
+    folder = export_dir(prefix, version, store_dir)
+    name = f'comments_{version_tag(member, region, start, end)}.{fmt}'
+    path = os.path.join(folder, name)
+    if not os.path.exists(path):
+        os.makedirs(folder, exist_ok=True)
+        write_slice(path, iter_comment_slice(prefix, member, region, start, end, store_dir), fmt)
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description='테이블 / 원본 댓글 슬라이스 내보내기')
+    parser.add_argument('prefix', help='그룹 prefix (예: plave)')
+    parser.add_argument('--store-dir', default=STORE_DIR)
+    parser.add_argument('--format', default='csv', choices=list(MIME_TYPES))
+    parser.add_argument('--out-dir', default='.', help='테이블 내보내기 위치')
+    parser.add_argument('--comments', action='store_true', help='테이블 대신 원본 댓글 슬라이스')
+    parser.add_argument('--member')
+    parser.add_argument('--region')
+    parser.add_argument('--start', help='YYYY-MM-DD')
+    parser.add_argument('--end', help='YYYY-MM-DD')
+    parser.add_argument('--out', help="슬라이스 출력 파일 ('-' 이면 stdout, csv 만)")
+    args = parser.parse_args()
+
+    if args.comments:
+        chunks = iter_comment_slice(args.prefix, args.member, args.region, args.start, args.end,
+                                    args.store_dir)
+        if args.out in (None, '-'):
+            for i, df in enumerate(chunks):
+                df.to_csv(sys.stdout, index=False, header=i == 0)
+            return
+        rows = write_slice(args.out, chunks, args.format)
+        print(f'✅ {args.out}: 댓글 {rows:,}개')
+        return
+
+    os.makedirs(args.out_dir, exist_ok=True)
+    for key in TABLE_FILES:
+        df = read_table(args.prefix, key, args.store_dir)
+        if df is None:
+            csv = f'{args.prefix}_{TABLE_FILES[key]}.csv'
+            df = pd.read_csv(csv) if os.path.exists(csv) else None
+        if df is not None:
+            write_table(df, os.path.join(args.out_dir, f'{args.prefix}_{key}.{args.format}'), args.format)
+    print(f'✅ {args.prefix}: {args.format} 내보내기 완료')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+# kfantrix_figcache.py - Plotly 그림 캐시
+# (그룹, 페이지, 선택 상태, 데이터 버전) 키로 만들어 둔 Figure 를 LRU 로 보관.
+# 캐시에 있으면 pandas 전처리와 px 그림 생성, JSON 역직렬화·검증을 모두 건너뛴다.
+
+import os
+import threading
+from collections import OrderedDict
+
+from kfantrix_cube import cube_version
+from kfantrix_loyalty import loyalty_version
+from kfantrix_pipeline import TABLE_FILES
+from kfantrix_store import STORE_DIR, keywords_version, read_manifest
+
+MAX_FIGURES = 256
+
+
+class FigureCache:
+    """Figure LRU 캐시 (세션 간 공유, 스레드 안전).
+
+    키에 데이터 버전이 들어 있으므로 테이블이 바뀌면 예전 항목은 더 이상
+    조회되지 않고 LRU 순서에 따라 자연히 밀려난다. 반환된 그림은 세션끼리
+    공유되므로 수정하지 말고 st.plotly_chart 에 그대로 넘긴다 (이미 검증된
+    Figure 라 dict 처럼 다시 검증하지 않는다).
+    """
+
+    def __init__(self, maxsize=MAX_FIGURES):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def get(self, key, build):
+        """key 의 그림. 없으면 build() 로 만들어 저장"""
+        with self._lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return self.entries[key]
+        # 그림 생성은 잠금 밖에서 (같은 키가 동시에 만들어져도 결과는 같음)
+        fig = build()
+        with self._lock:
+            self.misses += 1
+            self.entries[key] = fig
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+        return fig
+
+    def clear(self):
+        with self._lock:
+            self.entries.clear()
+
+    def stats(self):
+        return {'figures': len(self.entries), 'hits': self.hits, 'misses': self.misses}
+
+
+# ============================================================
+# 데이터 버전
+# ============================================================
+def _mtime(path):
+    return os.path.getmtime(path) if os.path.exists(path) else None
+
+
+def channel_version(path='channels_data.csv'):
+    return _mtime(path)
+
+
+def group_version(prefix, store_dir=STORE_DIR, src_dir='.'):
+    """그룹 테이블 + 인덱스 버전 묶음 (저장소 manifest 우선, 없으면 CSV 수정 시각)"""
+    manifest = read_manifest(prefix, store_dir)
+    if manifest is not None:
+        tables = manifest['version']
+    else:
+        mtimes = [_mtime(os.path.join(src_dir, f'{prefix}_{suffix}.csv')) for suffix in TABLE_FILES.values()]
+        tables = max((m for m in mtimes if m is not None), default=None)
+    return (tables, cube_version(prefix, store_dir), loyalty_version(prefix, store_dir),
+            keywords_version(prefix, store_dir))
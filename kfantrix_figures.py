@@ -0,0 +1,176 @@
+# kfantrix_figures.py - 심층 분석 그림 생성
+# 대시보드 페이지와 헤드리스 리포트가 같은 그림을 쓰도록 테이블 → Plotly Figure 함수로 분리
+
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+
+from kfantrix_cooccur import CooccurrenceMatrix
+
+# 케미 히트맵 지표
+COOC_METRICS = {
+    '동시 언급 수': 'count',
+    'Jaccard': 'jaccard',
+    'Lift': 'lift',
+    'PMI': 'pmi'
+}
+
+# 팬 등급 (이름, 컬럼, 색)
+FAN_TIERS = [
+    ('일반팬', 'casual_fans', '#E0E0E0'),
+    ('정규팬', 'regular_fans', '#B39DDB'),
+    ('진성팬', 'loyal_fans', '#7C4DFF'),
+    ('슈퍼팬', 'super_fans', '#E91E63')
+]
+
+
+# ============================================================
+# 📈 채널 기본 지표 (시계열 롤업)
+# ============================================================
+def channel_growth(df_rollup, metric, label):
+    fig = px.line(df_rollup, x='bucket', y=metric, color='artist', markers=True,
+                  color_discrete_sequence=px.colors.qualitative.Set2, title=f'{label} 추이')
+    fig.update_layout(xaxis_title='', yaxis_title=label, legend_title='')
+    return fig
+
+
+def channel_delta(df_growth, label):
+    df = df_growth.dropna(subset=['growth_rate']).sort_values('growth_rate')
+    fig = px.bar(df, x='growth_rate', y='artist', orientation='h', text='growth_rate',
+                 color='growth_rate', color_continuous_scale='RdPu', title=f'{label} 증가율 (%)')
+    fig.update_traces(texttemplate='%{text:.2f}%', textposition='outside')
+    fig.update_layout(coloraxis_showscale=False, xaxis_title='', yaxis_title='')
+    return fig
+
+
+# ============================================================
+# 📊 전체 요약
+# ============================================================
+def language(df_language):
+    return px.pie(df_language.head(8), values='percentage', names='region',
+                  color_discrete_sequence=px.colors.sequential.Purples_r, hole=0.4)
+
+
+def member_mentions(df_member):
+    df_mem = df_member.sort_values('mention_count', ascending=True)
+    fig = px.bar(df_mem, x='mention_count', y='member', orientation='h',
+                 color='mention_rate', color_continuous_scale='Purples', text='mention_rate')
+    fig.update_traces(texttemplate='%{text:.1f}%', textposition='outside')
+    fig.update_layout(coloraxis_showscale=False)
+    return fig
+
+
+# ============================================================
+# 💑 멤버 케미
+# ============================================================
+def cooc_rank(df_cooc):
+    fig = px.bar(df_cooc.head(10), x='pair', y='count',
+                 color='count', color_continuous_scale='Purples', text='count')
+    fig.update_traces(textposition='outside')
+    fig.update_layout(coloraxis_showscale=False, title='동시 언급 순위')
+    return fig
+
+
+def cooc_heatmap(df_member, df_cooc, total_comments, metric='동시 언급 수'):
+    members = df_member['member'].tolist()
+    cooc = CooccurrenceMatrix(members)
+    cooc.update_pairs(df_cooc, df_member.set_index('member')['mention_count'], total_comments)
+    matrix = cooc.matrix(COOC_METRICS[metric], members)
+    fig = px.imshow(matrix.values, x=members, y=members, color_continuous_scale='Purples',
+                    text_auto=True if metric == '동시 언급 수' else '.2f')
+    fig.update_layout(title='케미 히트맵')
+    return fig
+
+
+def combo_rank(df_combo, size):
+    df = df_combo[df_combo['size'] == size].head(10)
+    fig = px.bar(df, x='combo', y='count',
+                 color='count', color_continuous_scale='Purples', text='count')
+    fig.update_traces(textposition='outside')
+    fig.update_layout(coloraxis_showscale=False, title=f'{size}명 조합 순위', xaxis_title='조합')
+    return fig
+
+
+# ============================================================
+# 💜 진성팬 분석
+# ============================================================
+def fan_tiers(df_lf):
+    fig = go.Figure()
+    for fan_type, col, color in FAN_TIERS:
+        fig.add_trace(go.Bar(name=fan_type, x=df_lf['member'], y=df_lf[col], marker_color=color))
+    fig.update_layout(barmode='stack', title='멤버별 팬 등급 분포')
+    return fig
+
+
+def loyal_rate(df_lf):
+    fig = px.bar(df_lf.sort_values('loyal_rate'), x='loyal_rate', y='member',
+                 orientation='h', color='loyal_rate', color_continuous_scale='Purples',
+                 text='loyal_rate', title='진성팬 비율')
+    fig.update_traces(texttemplate='%{text:.1f}%', textposition='outside')
+    fig.update_layout(coloraxis_showscale=False)
+    return fig
+
+
+def super_rate(df_lf):
+    fig = px.bar(df_lf.sort_values('super_fan_rate'), x='super_fan_rate', y='member',
+                 orientation='h', color='super_fan_rate', color_continuous_scale='RdPu',
+                 text='super_fan_rate', title='슈퍼팬 비율')
+    fig.update_traces(texttemplate='%{text:.1f}%', textposition='outside')
+    fig.update_layout(coloraxis_showscale=False)
+    return fig
+
+
+# ============================================================
+# 🎬 영상 분석
+# ============================================================
+def video_page(df_videos, column, label):
+    df = df_videos.assign(title=df_videos['video_title'].str.slice(0, 30) + ' · ' + df_videos['video_id'].str.slice(0, 4))
+    fig = px.bar(df.iloc[::-1], x=column, y='title', orientation='h', color=column,
+                 color_continuous_scale='Purples', text=column, title=f'{label} (현재 페이지)')
+    fig.update_traces(textposition='outside')
+    fig.update_layout(coloraxis_showscale=False, xaxis_title=label, yaxis_title='',
+                      height=max(300, 28 * len(df) + 120))
+    return fig
+
+
+# ============================================================
+# 🎯 마케팅 인사이트
+# ============================================================
+def category_totals(df_region):
+    """지역 안 카테고리 점수 합"""
+    return {
+        '비주얼': df_region['visual_score'].sum(),
+        '실력': df_region['talent_score'].sum(),
+        '성격': df_region['personality_score'].sum(),
+        '사랑': df_region['love_score'].sum()
+    }
+
+
+def region_members(df_region, region):
+    fig = px.bar(df_region, x='member', y='comment_count', color='member',
+                 color_discrete_sequence=px.colors.qualitative.Set2, text='comment_count')
+    fig.update_traces(textposition='outside')
+    fig.update_layout(showlegend=False, title=f'{region} 멤버별 인기도')
+    return fig
+
+
+def region_categories(total):
+    df_cat = pd.DataFrame({'category': list(total.keys()), 'score': list(total.values())})
+    return px.pie(df_cat, values='score', names='category', title='반응 카테고리',
+                  color_discrete_sequence=['#8B5CF6', '#EC4899', '#F59E0B', '#10B981'])
+
+
+def member_region_heatmap(df_mrk):
+    pivot = df_mrk.pivot_table(index='member', columns='region', values='comment_count', fill_value=0)
+    return px.imshow(pivot.values, x=pivot.columns.tolist(), y=pivot.index.tolist(),
+                     color_continuous_scale='Purples', text_auto=True, aspect='auto')
+
+
+# ============================================================
+# ⚖️ 그룹 비교
+# ============================================================
+def overlap_heatmap(matrix):
+    fig = px.imshow(matrix.values, x=matrix.columns.tolist(), y=matrix.index.tolist(),
+                    color_continuous_scale='Purples', text_auto='.2f', zmin=0, zmax=1, aspect='auto')
+    fig.update_layout(title='팬 중복도 (Jaccard)')
+    return fig
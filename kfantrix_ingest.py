@@ -0,0 +1,208 @@
+# kfantrix_ingest.py - 원본 댓글 증분 수집
+# 영상별 워터마크 이후의 새 comment_id 만 집계 상태에 델타로 반영
+
+import argparse
+import os
+import pickle
+
+from kfantrix_cube import RollupCube, save_cube
+from kfantrix_export import prune_exports
+from kfantrix_language import load_language_cache, save_language_cache
+from kfantrix_loyalty import LoyaltyIndex, choose_backend, save_loyalty
+from kfantrix_overlap import OverlapIndex, save_overlap
+from kfantrix_pipeline import CHUNK_SIZE, GroupAggregator, iter_raw_chunks, write_tables
+from kfantrix_search import compact, drop_pending, new_segment, segment_names, swap_index
+from kfantrix_store import STORE_DIR, group_dir, save_keywords, write_group
+from kfantrix_topk import KeywordSummaries
+
+STATE_FILE = 'ingest_state.pkl'
+
+
+# ============================================================
+# 워터마크
+# ============================================================
+class Watermarks:
+    """영상별 마지막 수집 날짜 + 그 날짜에 이미 반영한 comment_id.
+
+    날짜는 일 단위라 같은 날 댓글이 나중 덤프에 추가될 수 있으므로
+    워터마크 당일의 comment_id 만 경계 집합으로 들고 있는다.
+    """
+
+    def __init__(self):
+        self.dates = {}
+        self.boundary = {}
+
+    def filter_new(self, chunk):
+        """워터마크 이후의 새 댓글만 남기기"""
+        if not self.dates:
+            return chunk
+        marks = chunk['video_id'].map(self.dates)
+        seen = set().union(*self.boundary.values())
+        is_new = (
+            marks.isna()
+            | (chunk['date'] > marks)
+            | ((chunk['date'] == marks) & ~chunk['comment_id'].isin(seen))
+        )
+        return chunk[is_new]
+
+    def advance(self, chunk):
+        """반영한 댓글로 워터마크 전진"""
+        last = chunk.groupby('video_id')['date'].transform('max')
+        edge = chunk[chunk['date'] == last]
+        for (video_id, date), ids in edge.groupby(['video_id', 'date'])['comment_id']:
+            self._advance(video_id, date, ids)
+
+    def merge(self, other):
+        """다른 워터마크(이번 수집분)를 합치기"""
+        for video_id, date in other.dates.items():
+            self._advance(video_id, date, other.boundary[video_id])
+
+    def _advance(self, video_id, date, ids):
+        current = self.dates.get(video_id)
+        if current is None or date > current:
+            self.dates[video_id] = date
+            self.boundary[video_id] = set(ids)
+        elif date == current:
+            self.boundary[video_id].update(ids)
+
+
+# ============================================================
+# 상태 저장/복원
+# ============================================================
+class IngestState:
+    """집계기 + 워터마크 + 충성도 인덱스 + 롤업 큐브 + 키워드 요약 + 중복도 서명 묶음 (그룹당 하나)"""
+
+    def __init__(self, artist=None, loyalty_backend='exact'):
+        self.aggregator = GroupAggregator(artist=artist)
+        self.watermarks = Watermarks()
+        self.loyalty = LoyaltyIndex(loyalty_backend)
+        self.cube = RollupCube()
+        self.keywords = KeywordSummaries()
+        self.overlap = OverlapIndex()
+
+    def merge(self, other):
+        """다른 상태(다른 영상 shard)의 부분 집계 합치기"""
+        self.aggregator.merge(other.aggregator)
+        self.watermarks.merge(other.watermarks)
+        self.loyalty.merge(other.loyalty)
+        self.cube.merge(other.cube)
+        self.keywords.merge(other.keywords)
+        self.overlap.merge(other.overlap)
+        return self
+
+
+def state_path(prefix, store_dir=STORE_DIR):
+    return os.path.join(group_dir(prefix, store_dir), STATE_FILE)
+
+
+def load_state(prefix, store_dir=STORE_DIR, artist=None):
+    """저장된 수집 상태 복원. 없으면 새 상태"""
+    path = state_path(prefix, store_dir)
+    if not os.path.exists(path):
+        return IngestState(artist=artist, loyalty_backend=choose_backend(prefix, store_dir))
+    with open(path, 'rb') as f:
+        state = pickle.load(f)
+    # 중복도 서명이 없던 이전 상태: 이번 수집분부터 반영 (전체 반영은 --full)
+    if not hasattr(state, 'overlap'):
+        state.overlap = OverlapIndex()
+    return state
+
+
+def save_state(state, prefix, store_dir=STORE_DIR):
+    """임시 파일에 쓴 뒤 교체 (중간에 죽어도 이전 상태 유지)"""
+    path = state_path(prefix, store_dir)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = path + '.tmp'
+    with open(tmp, 'wb') as f:
+        pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp, path)
+
+
+# ============================================================
+# 증분 수집
+# ============================================================
+def publish(state, prefix, store_dir=STORE_DIR, out_dir='.'):
+    """수집 상태로 테이블/인덱스를 다시 쓰고 상태 저장 (지난 내보내기 폴더도 정리)"""
+    state.cube.compact()
+    tables = state.aggregator.finalize()
+    write_group(tables, prefix, store_dir)
+    if out_dir:
+        write_tables(tables, prefix, out_dir)
+    save_loyalty(state.loyalty, prefix, store_dir)
+    save_cube(state.cube, prefix, store_dir)
+    save_keywords(state.keywords, prefix, store_dir)
+    save_overlap(state.overlap, prefix, store_dir)
+    save_state(state, prefix, store_dir)
+    prune_exports(prefix, store_dir)
+
+
+def ingest(prefix, raw_path, store_dir=STORE_DIR, out_dir='.', artist=None,
+           full=False, chunksize=CHUNK_SIZE):
+    """원본 댓글 덤프에서 새 댓글만 집계에 반영하고 테이블 갱신.
+
+    반환값은 이번에 반영한 새 댓글 수.
+    """
+    if full:
+        state = IngestState(artist=artist, loyalty_backend=choose_backend(prefix, store_dir))
+    else:
+        state = load_state(prefix, store_dir, artist)
+
+    # 덤프 안의 순서는 보장되지 않으므로 워터마크는 수집이 끝난 뒤에 전진
+    run_marks = Watermarks()
+    run_ids = set()
+    added = 0
+    # --full 이어도 기존 세그먼트는 새 세그먼트를 공개할 때까지 조회에 남겨 둔다
+    old = segment_names(prefix, store_dir) if full else []
+    drop_pending(prefix, store_dir)
+    segment = None
+
+    def new_rows(chunk):
+        # 언어 분류·별칭 매칭 전에 거르므로 이미 반영한 댓글은 분류하지도, 작성자 이력에 다시 더하지도 않는다
+        chunk = state.watermarks.filter_new(chunk.drop_duplicates('comment_id'))
+        return chunk[~chunk['comment_id'].isin(run_ids)]
+
+    load_language_cache(store_dir)
+    for chunk in iter_raw_chunks(raw_path, chunksize, prefix, select=new_rows):
+        state.aggregator.update(chunk)
+        state.loyalty.add_chunk(chunk)
+        state.cube.add_chunk(chunk)
+        state.keywords.add_chunk(chunk)
+        state.overlap.add_chunk(chunk)
+        segment = segment or new_segment(prefix, store_dir)
+        segment.add_chunk(chunk)
+        run_marks.advance(chunk)
+        run_ids.update(chunk['comment_id'])
+        added += len(chunk)
+    state.watermarks.merge(run_marks)
+
+    if segment is not None:
+        segment.close()
+
+    if added or full:
+        publish(state, prefix, store_dir, out_dir)
+    # 상태 저장이 끝난 뒤에만 세그먼트·언어 캐시를 공개 (실패하면 다음 수집이 같은 댓글을 다시 넣으므로)
+    swap_index(prefix, old, store_dir)
+    compact(prefix, store_dir)
+    save_language_cache(store_dir)
+    return added
+
+
+def main():
+    parser = argparse.ArgumentParser(description='원본 댓글 증분 수집')
+    parser.add_argument('prefix', help='그룹 prefix (예: plave)')
+    parser.add_argument('--raw', help='원본 댓글 CSV 경로 (기본: <prefix>_comments_raw.csv)')
+    parser.add_argument('--store-dir', default=STORE_DIR)
+    parser.add_argument('--out-dir', default='.', help="CSV 출력 경로 ('' 이면 저장소만 갱신)")
+    parser.add_argument('--artist', help='summary 에 기록할 아티스트명')
+    parser.add_argument('--full', action='store_true', help='상태를 버리고 처음부터 다시 집계')
+    parser.add_argument('--chunksize', type=int, default=CHUNK_SIZE)
+    args = parser.parse_args()
+
+    raw_path = args.raw or f'{args.prefix}_comments_raw.csv'
+    added = ingest(args.prefix, raw_path, args.store_dir, args.out_dir, args.artist,
+                   args.full, args.chunksize)
+    print(f'✅ {args.prefix}: 새 댓글 {added:,}개 반영')
+
+
+if __name__ == '__main__':
+    main()
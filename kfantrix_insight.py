@@ -0,0 +1,160 @@
+# kfantrix_insight.py - 마케팅 인사이트 일괄 계산
+# 모든 (그룹, 지역) 쌍의 추천 멤버·추천 카테고리·점수 비중·순위 안정도를
+# member_region_keywords 를 한 번에 묶어 벡터 연산으로 계산하고 표 하나로 저장한다.
+#
+# store/marketing_insights.arrow (스키마 메타데이터에 입력 테이블 버전)
+
+import argparse
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+from scipy.special import ndtr
+
+from kfantrix_cache import load_table, table_source
+from kfantrix_store import STORE_DIR
+
+GROUP_PREFIXES = ['plave', 'nmixx', 'skz']
+SOURCE_KEY = 'member_region_keywords'
+INSIGHTS_FILE = 'marketing_insights.arrow'
+SOURCES_META = b'kfantrix_sources'
+
+SCORE_COLUMNS = {
+    'visual': 'visual_score',
+    'talent': 'talent_score',
+    'personality': 'personality_score',
+    'love': 'love_score'
+}
+CATEGORY_LABELS = {'visual': '비주얼', 'talent': '실력', 'personality': '성격', 'love': '사랑'}
+INSIGHT_COLUMNS = [
+    'group', 'region', 'comment_count', 'members',
+    'recommended_member', 'member_comments', 'member_share', 'runner_up_member', 'member_stability',
+    'top_category', 'category_stability'
+] + [f'{cat}_share' for cat in SCORE_COLUMNS]
+
+
+def stability(first, second):
+    """1위가 2위보다 우연히 앞섰을 가능성이 낮은 정도.
+
+    두 카운트를 포아송으로 보고 차이를 표준화한 정규 CDF (0.5 = 동률, 1 에 가까울수록 안정).
+    """
+    first = np.asarray(first, dtype=float)
+    second = np.asarray(second, dtype=float)
+    scale = np.sqrt(first + second)
+    z = np.divide(first - second, scale, out=np.zeros_like(scale), where=scale > 0)
+    return ndtr(z)
+
+
+# ============================================================
+# 계산
+# ============================================================
+def compute_insights(frames):
+    """{prefix: member_region_keywords} → (그룹, 지역) 별 인사이트 표"""
+    parts = [df.assign(group=prefix) for prefix, df in frames.items() if df is not None and len(df)]
+    if not parts:
+        return pd.DataFrame(columns=INSIGHT_COLUMNS)
+    scores = list(SCORE_COLUMNS.values())
+    df = pd.concat(parts, ignore_index=True)
+    df = df.assign(
+        region=df['region'].astype(str),
+        member=df['member'].astype(str),
+        **{col: pd.to_numeric(df[col], errors='coerce').fillna(0) for col in scores + ['comment_count']}
+    )
+    keys = ['group', 'region']
+
+    # 지역 안 멤버 순위 (언급 수 내림차순, 동률은 원래 순서)
+    df = df.sort_values(keys + ['comment_count'], ascending=[True, True, False], kind='stable')
+    grouped = df.groupby(keys, sort=False)
+    rank = grouped.cumcount()
+    totals = grouped[scores + ['comment_count']].sum()
+    totals['members'] = grouped.size()
+    first = df[rank == 0].set_index(keys)[['member', 'comment_count']].reindex(totals.index)
+    second = df[rank == 1].set_index(keys)[['member', 'comment_count']].reindex(totals.index)
+
+    # 카테고리 점수 합 → 비중 / 1위 카테고리 (동률이면 앞 카테고리)
+    score_sum = totals[scores].to_numpy(dtype=float)
+    row_total = score_sum.sum(axis=1, keepdims=True)
+    shares = np.divide(score_sum, row_total, out=np.zeros_like(score_sum), where=row_total > 0)
+    ordered = np.sort(score_sum, axis=1)
+
+    result = pd.DataFrame({
+        'comment_count': totals['comment_count'].astype('int64'),
+        'members': totals['members'].astype('int64'),
+        'recommended_member': first['member'],
+        'member_comments': first['comment_count'].astype('int64'),
+        'member_share': (first['comment_count'] / totals['comment_count'].where(totals['comment_count'] > 0)).fillna(0).round(4),
+        'runner_up_member': second['member'].fillna(''),
+        'member_stability': stability(first['comment_count'], second['comment_count'].fillna(0)).round(4),
+        'top_category': np.array(list(SCORE_COLUMNS))[score_sum.argmax(axis=1)],
+        'category_stability': stability(ordered[:, -1], ordered[:, -2]).round(4)
+    }, index=totals.index)
+    for i, cat in enumerate(SCORE_COLUMNS):
+        result[f'{cat}_share'] = shares[:, i].round(4)
+    result = result.reset_index()
+    return result.sort_values(['group', 'comment_count'], ascending=[True, False],
+                              kind='stable')[INSIGHT_COLUMNS].reset_index(drop=True)
+
+
+# ============================================================
+# 저장 / 로드
+# ============================================================
+def insights_path(store_dir=STORE_DIR):
+    return os.path.join(store_dir, INSIGHTS_FILE)
+
+
+def source_versions(prefixes=GROUP_PREFIXES, store_dir=STORE_DIR, src_dir='.'):
+    """입력 테이블 버전 (JSON 문자열, 캐시 키로도 사용)"""
+    return json.dumps({p: table_source(p, SOURCE_KEY, store_dir, src_dir) for p in prefixes}, sort_keys=True)
+
+
+def build_insights(prefixes=GROUP_PREFIXES, store_dir=STORE_DIR, src_dir='.', cache=None):
+    """모든 그룹 인사이트 계산 후 저장 (저장소를 못 쓰면 계산 결과만 반환)"""
+    versions = source_versions(prefixes, store_dir, src_dir)
+    frames = {}
+    for prefix, (source, version) in json.loads(versions).items():
+        frames[prefix] = load_table(prefix, SOURCE_KEY, source, cache, store_dir, src_dir) if version else None
+    df = compute_insights(frames)
+
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    table = table.replace_schema_metadata({**(table.schema.metadata or {}), SOURCES_META: versions.encode('utf-8')})
+    path = insights_path(store_dir)
+    try:
+        os.makedirs(store_dir, exist_ok=True)
+        tmp = f'{path}.{os.getpid()}.tmp'
+        feather.write_feather(table, tmp)
+        os.replace(tmp, path)
+    except OSError:
+        pass
+    return df
+
+
+def load_insights(prefixes=GROUP_PREFIXES, store_dir=STORE_DIR, src_dir='.', cache=None):
+    """저장된 인사이트 표 (입력 테이블 버전이 바뀌었으면 다시 계산)"""
+    path = insights_path(store_dir)
+    if os.path.exists(path):
+        table = feather.read_table(path, memory_map=True)
+        stored = (table.schema.metadata or {}).get(SOURCES_META, b'').decode('utf-8')
+        if stored == source_versions(prefixes, store_dir, src_dir):
+            return table.to_pandas()
+    return build_insights(prefixes, store_dir, src_dir, cache)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='전체 그룹·지역 마케팅 인사이트 계산')
+    parser.add_argument('prefixes', nargs='*', default=GROUP_PREFIXES)
+    parser.add_argument('--store-dir', default=STORE_DIR)
+    parser.add_argument('--src-dir', default='.')
+    parser.add_argument('--csv', help='결과를 CSV 로도 저장')
+    args = parser.parse_args()
+
+    df = build_insights(args.prefixes, args.store_dir, args.src_dir)
+    if args.csv:
+        df.to_csv(args.csv, index=False, encoding='utf-8-sig')
+    print(f'✅ {insights_path(args.store_dir)}: (그룹, 지역) {len(df)}개')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,465 @@
+# kfantrix_language.py - 댓글 언어/지역 분류 (배치 + 캐시)
+# 원본 덤프에 language 가 비어 있는 댓글만 청크 단위로 분류해 language / region 을 채운다.
+# 이미 분류된 댓글(원본 표기 또는 캐시)은 다시 분류하지 않으므로 겹치는 덤프를 다시 수집해도 거의 공짜다.
+#
+#   1. 캐시     정규화 본문(NFKC + casefold, 타임스탬프·URL·이모지·숫자 제거) 해시 → 언어
+#   2. 문자     한글 → ko, 가나 → ja, 한자 → zh, 태국·키릴·아랍 문자, 베트남어 성조 글자 → vi
+#               글자가 없는 댓글(이모지·타임스탬프만) → unknown
+#   3. 모델     나머지 로마자 댓글만 한 번에: fastText(lid.176, KFANTRIX_LANGID_MODEL 경로) 가 있으면 그것,
+#               없으면 내장 기능어 사전 점수
+#   4. 작성자   모델 결과가 불확실한 짧은 댓글(lol, omg ...)은 그 작성자의 기존 댓글 언어 분포를 따른다
+#
+# store/language/texts.arrow    본문 해시 → 언어 코드 (+ 불확실 표시)
+# store/language/authors.arrow  작성자 해시 → 언어별 댓글 수
+# 수집(ingest/batch)이 시작할 때 읽고 끝날 때 합쳐서 저장, 그 밖의 실행은 메모리에서만 쓴다.
+# 저장은 저장소마다 한 프로세스만 한다 (배치 워커는 새 항목을 부모에게 넘기고 부모가 한 번 저장).
+
+import argparse
+import importlib.util
+import os
+import time
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+
+from kfantrix_mentions import ELONGATED_RE
+
+# ============================================================
+# 설정
+# ============================================================
+# 캐시에는 이 목록의 위치(코드)를 저장하므로 새 언어는 뒤에만 추가
+LANGUAGE_REGIONS = {
+    'ko': '한국',
+    'en': '영어권',
+    'ja': '일본',
+    'zh': '중국',
+    'th': '태국',
+    'vi': '베트남',
+    'id': '인도네시아',
+    'es': '스페인어권',
+    'pt': '포르투갈어권',
+    'ru': '러시아',
+    'ar': '아랍어권',
+    'tl': '필리핀',
+    'unknown': '기타'
+}
+LANGUAGES = list(LANGUAGE_REGIONS)
+CODES = {lang: i for i, lang in enumerate(LANGUAGES)}
+UNCERTAIN = 0x80
+
+LANGUAGE_DIR = 'language'
+TEXTS_FILE = 'texts.arrow'
+AUTHORS_FILE = 'authors.arrow'
+MODEL_ENV = 'KFANTRIX_LANGID_MODEL'
+# fastText 확률이 이보다 낮으면 불확실
+MODEL_CONFIDENCE = 0.8
+# 작성자 기존 댓글 중 한 언어가 이 비율 이상일 때만 그 언어로 본다
+HISTORY_SHARE = 0.6
+
+# 우선순위 순서 (한글이 한 글자라도 있으면 한국어 댓글로 봄 - 원본 분류와 같은 기준)
+SCRIPTS = [
+    ('ko', r'[\uac00-\ud7a3\u1100-\u11ff\u3130-\u318f]'),
+    ('ja', r'[\u3040-\u30ff\u31f0-\u31ff]'),
+    ('zh', r'[\u3400-\u4dbf\u4e00-\u9fff]'),
+    ('th', r'[\u0e00-\u0e7f]'),
+    ('ru', r'[\u0400-\u04ff]'),
+    ('ar', r'[\u0600-\u06ff\u0750-\u077f]'),
+    ('vi', r'[ăâđêôơưạảấầẩẫậắằẳẵặẹẻẽếềểễệỉịọỏốồổỗộớờởỡợụủứừửữựỳỵỷỹ]')
+]
+LATIN_RE = r'[a-z\u00e0-\u024f]'
+NOISE_RE = r'https?://\S+|@\S+|\d+:\d{2}(?::\d{2})?'
+
+# 내장 모델: 로마자 언어별 기능어·자주 쓰는 팬 표현 (한 단어가 여러 언어에 있어도 됨)
+LATIN_WORDS = {
+    'en': 'the and is are you i to so my this of in it love cute he she they we was what how '
+          'why who omg lol really very much so much with for that just like your guys them can',
+    'es': 'el la los las que de y es muy por para con una un lo te amo hermoso hermosa lindo '
+          'linda quiero ojalá también pero como están jajaja mucho gracias todos son',
+    'pt': 'o os que de e não muito lindo linda eu você com para uma um meu minha tão amo eles '
+          'elas também mas como estão kkkk obrigado obrigada todos são demais',
+    'id': 'yang dan di ini itu aku kamu banget keren sangat tidak ga gak sih kak lucu sekali '
+          'semangat deh ya juga sama mereka udah sudah bisa mau apa',
+    'tl': 'ang ng mga sa ko ako ka naman talaga ganda sobra po kayo sila ito yung lang din '
+          'pa na nila natin grabe',
+    'vi': 'anh em yeu dep qua la cua va khong nhe oi'
+}
+LATIN_TABLE = pd.DataFrame(
+    [(word, CODES[lang]) for lang, words in LATIN_WORDS.items() for word in words.split()],
+    columns=['word', 'code'])
+
+
+# ============================================================
+# 정규화
+# ============================================================
+def normalize(texts):
+    """본문 Series → 캐시 키 (언어와 무관한 부분을 지워 같은 말은 같은 키가 되게)"""
+    # object dtype 으로 바꿔 Python 정규식(\w 가 유니코드 글자 전체)을 쓴다
+    return (texts.fillna('').astype(str).astype(object).str.normalize('NFKC').str.casefold()
+            .str.replace(NOISE_RE, ' ', regex=True)
+            .str.replace(r'[^\w\s]|[\d_]', ' ', regex=True)
+            .str.replace(ELONGATED_RE, r'\1', regex=True)
+            .str.split().str.join(' '))
+
+
+def hash_keys(keys):
+    return pd.util.hash_array(np.asarray(keys, dtype=object))
+
+
+def hash_authors(author_ids):
+    """author_id → 64bit 해시 (빈 값도 문자열로 맞춰서)"""
+    return hash_keys(np.asarray(author_ids, dtype=object).astype(str))
+
+
+# ============================================================
+# 해시 테이블 (정렬된 uint64 키 + 값)
+# ============================================================
+def _dedupe(keys, values, how):
+    """같은 키 합치기: 'first' 는 앞쪽 값 유지, 'sum' 은 값 합산"""
+    order = np.argsort(keys, kind='stable')
+    keys, values = keys[order], values[order]
+    starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]]) if len(keys) else np.empty(0, np.int64)
+    if how == 'sum' and len(keys):
+        values = np.add.reduceat(values, starts, axis=0)
+    else:
+        values = values[starts]
+    return keys[starts], values
+
+
+class HashTable:
+    """정렬 배열 두 단(본 테이블 + 작은 대기 테이블).
+
+    새 키는 대기 테이블에만 합치고, 대기 테이블이 본 테이블의 1/4 을 넘을 때만 전체를 다시 정렬하므로
+    청크마다 캐시 전체를 복사하지 않는다.
+    """
+
+    def __init__(self, width, dtype, how='first'):
+        self.width, self.dtype, self.how = width, dtype, how
+        self._levels = [self._empty(), self._empty()]
+
+    def _empty(self):
+        return np.empty(0, np.uint64), np.zeros((0, self.width), self.dtype)
+
+    def __len__(self):
+        return len(self.compact()[0])
+
+    def get(self, keys):
+        """키 배열 → (찾았는지, 값 행렬). 'sum' 테이블은 두 단의 값을 더한다"""
+        found = np.zeros(len(keys), bool)
+        values = np.zeros((len(keys), self.width), self.dtype)
+        for level_keys, level_values in self._levels:
+            if not len(level_keys):
+                continue
+            pos = np.minimum(np.searchsorted(level_keys, keys), len(level_keys) - 1)
+            hit = level_keys[pos] == keys
+            if self.how == 'sum':
+                values[hit] += level_values[pos[hit]]
+            else:
+                hit &= ~found
+                values[hit] = level_values[pos[hit]]
+            found |= hit
+        return found, values
+
+    def add(self, keys, values):
+        (main_keys, main_values), (new_keys, new_values) = self._levels
+        new = _dedupe(np.concatenate([new_keys, keys]), np.concatenate([new_values, values]), self.how)
+        self._levels[1] = new
+        if len(new[0]) > max(len(main_keys) // 4, 65536):
+            self.compact()
+
+    def compact(self):
+        keys = np.concatenate([level[0] for level in self._levels])
+        values = np.concatenate([level[1] for level in self._levels])
+        self._levels = [_dedupe(keys, values, self.how), self._empty()]
+        return self._levels[0]
+
+    def update(self, other):
+        self.add(*other.compact())
+
+    def to_arrow(self, names):
+        keys, values = self.compact()
+        return pa.table({'key': keys, **{name: values[:, i] for i, name in enumerate(names)}})
+
+    @classmethod
+    def from_arrow(cls, table, dtype, how):
+        names = table.column_names[1:]
+        result = cls(len(names), dtype, how)
+        values = np.column_stack([table[name].to_numpy() for name in names]).astype(dtype)
+        result._levels[0] = _dedupe(table['key'].to_numpy(), values, how)
+        return result
+
+
+# ============================================================
+# 분류기
+# ============================================================
+def _load_model():
+    """fastText 언어 식별 모델 (패키지나 모델 파일이 없으면 None)"""
+    path = os.environ.get(MODEL_ENV)
+    if not path or not os.path.exists(path) or importlib.util.find_spec('fasttext') is None:
+        return None
+    import fasttext
+    return fasttext.load_model(path)
+
+
+def classify_scripts(keys):
+    """정규화 본문 배열 → 코드 배열 (문자 판별로 안 끝난 로마자 댓글은 -1)"""
+    s = pd.Series(keys, dtype=object)
+    codes = np.full(len(s), -1, dtype=np.int16)
+    for lang, pattern in SCRIPTS:
+        hit = (codes == -1) & s.str.contains(pattern).to_numpy()
+        codes[hit] = CODES[lang]
+    codes[(codes == -1) & ~s.str.contains(LATIN_RE).to_numpy()] = CODES['unknown']
+    return codes
+
+
+def classify_words(keys):
+    """내장 모델: 로마자 본문 배열 → 코드 배열 (기능어 2개 이상으로 앞선 언어만 확실)"""
+    tokens = pd.Series(keys, dtype=object).str.split().explode().rename('word').reset_index()
+    hits = tokens.merge(LATIN_TABLE, on='word')
+    codes = np.full(len(keys), CODES['en'] | UNCERTAIN, dtype=np.int16)
+    if hits.empty:
+        return codes
+    scores = hits.groupby(['index', 'code']).size().unstack(fill_value=0)
+    ranked = np.sort(scores.to_numpy(), axis=1)
+    best = scores.to_numpy().argmax(axis=1)
+    certain = (ranked[:, -1] >= 2) & (ranked[:, -1] > (ranked[:, -2] if ranked.shape[1] > 1 else 0))
+    codes[scores.index.to_numpy()] = scores.columns.to_numpy()[best] | np.where(certain, 0, UNCERTAIN)
+    return codes
+
+
+class LanguageClassifier:
+    """청크 단위 언어 분류 + 본문 캐시 + 작성자 언어 이력"""
+
+    def __init__(self, model=None):
+        self.model = model
+        self.texts = HashTable(1, np.uint8)
+        self.authors = HashTable(len(LANGUAGES), np.uint32, 'sum')
+        # 마지막 저장 이후 새로 생긴 항목 (저장 때 디스크 내용에 이것만 더함)
+        self._new_texts = HashTable(1, np.uint8)
+        self._new_authors = HashTable(len(LANGUAGES), np.uint32, 'sum')
+        self.loaded = set()
+        self.stats = {'labeled': 0, 'cached': 0, 'script': 0, 'model': 0, 'history': 0}
+
+    # ---------------- 분류 ----------------
+    def _classify(self, keys):
+        codes = classify_scripts(keys)
+        rest = np.flatnonzero(codes == -1)
+        self.stats['script'] += len(keys) - len(rest)
+        if len(rest):
+            codes[rest] = self._predict(keys[rest])
+            self.stats['model'] += len(rest)
+        return codes.astype(np.uint8)
+
+    def _predict(self, keys):
+        if self.model is None:
+            return classify_words(keys)
+        labels, probs = self.model.predict(list(keys), k=1)
+        langs = [label[0].replace('__label__', '') if label else 'unknown' for label in labels]
+        codes = np.array([CODES.get(lang, CODES['unknown']) for lang in langs], dtype=np.int16)
+        return codes | np.where(np.asarray(probs)[:, 0] >= MODEL_CONFIDENCE, 0, UNCERTAIN)
+
+    def _remember(self, authors, codes):
+        # 이모지만 있는 댓글(unknown)은 작성자 언어에 대해 알려 주는 게 없음
+        known = codes != CODES['unknown']
+        authors, codes = authors[known], codes[known]
+        if not len(authors):
+            return
+        counts = np.zeros((len(authors), len(LANGUAGES)), np.uint32)
+        counts[np.arange(len(authors)), codes] = 1
+        self.authors.add(authors, counts)
+        self._new_authors.add(authors, counts)
+
+    def dominant(self, authors):
+        """작성자 해시 배열 → 기존 댓글의 주 언어 코드 (분포가 한쪽으로 쏠리지 않았으면 -1)"""
+        _, counts = self.authors.get(authors)
+        total = counts.sum(axis=1)
+        best = counts.argmax(axis=1)
+        share = counts.max(axis=1) / np.maximum(total, 1)
+        return np.where((total > 0) & (share >= HISTORY_SHARE), best, -1)
+
+    def classify(self, texts, author_ids):
+        """본문·작성자 Series → 언어 코드 배열"""
+        keys = normalize(texts)
+        index, unique = pd.factorize(keys)
+        hashes = hash_keys(unique)
+        found, cached = self.texts.get(hashes)
+        codes = cached[:, 0].copy()
+        self.stats['cached'] += int(found[index].sum())
+        if not found.all():
+            missing = np.flatnonzero(~found)
+            codes[missing] = self._classify(np.asarray(unique, dtype=object)[missing])
+            self.texts.add(hashes[missing], codes[missing, None])
+            self._new_texts.add(hashes[missing], codes[missing, None])
+
+        rows = codes[index]
+        base = (rows & (UNCERTAIN - 1)).astype(np.int64)
+        uncertain = (rows & UNCERTAIN) > 0
+        authors = hash_authors(author_ids)
+        self._remember(authors[~uncertain], base[~uncertain])
+        if uncertain.any():
+            history = self.dominant(authors[uncertain])
+            use = history >= 0
+            base[np.flatnonzero(uncertain)[use]] = history[use]
+            self.stats['history'] += int(use.sum())
+        return base
+
+    def annotate(self, chunk, reclassify=False):
+        """원본 댓글 청크의 빈 language / region 채우기 (reclassify 면 전부 다시 분류).
+
+        이미 표기된 댓글은 그대로 두고, 저장소 캐시를 쓰는 중이면 작성자 언어 이력에만 반영한다.
+        """
+        language = chunk['language']
+        missing = np.ones(len(chunk), bool) if reclassify else (language.isna() | (language == '')).to_numpy()
+        labeled = ~missing & language.isin(LANGUAGES).to_numpy()
+        self.stats['labeled'] += int(labeled.sum())
+        # 이력은 저장소에 남길 때(수집)만 의미가 있으므로 그 밖의 원본 읽기는 건너뛴다
+        if self.loaded and labeled.any():
+            self._remember(hash_authors(chunk['author_id'].to_numpy()[labeled]),
+                           language[labeled].map(CODES).to_numpy())
+        if not missing.any():
+            return chunk
+        chunk = chunk.copy()
+        codes = self.classify(chunk.loc[missing, 'text'], chunk.loc[missing, 'author_id'])
+        langs = np.asarray(LANGUAGES, dtype=object)[codes]
+        chunk['language'] = chunk['language'].astype(object)
+        chunk['region'] = chunk['region'].astype(object)
+        chunk.loc[missing, 'language'] = langs
+        chunk.loc[missing, 'region'] = pd.Series(langs).map(LANGUAGE_REGIONS).to_numpy()
+        return chunk
+
+    # ---------------- 저장/복원 ----------------
+    def load(self, store_dir):
+        """디스크 캐시를 합침 (프로세스당 저장소마다 한 번)"""
+        if store_dir in self.loaded:
+            return
+        self.loaded.add(store_dir)
+        texts, authors = _read_cache(store_dir)
+        if texts is not None:
+            self.texts.update(texts)
+        if authors is not None:
+            self.authors.update(authors)
+
+    def pending(self):
+        """마지막 저장 이후 새로 생긴 항목을 꺼냄 (워커 → 부모 프로세스 전달용, 꺼낸 뒤 비움)"""
+        new = self._new_texts, self._new_authors
+        self._new_texts = HashTable(1, np.uint8)
+        self._new_authors = HashTable(len(LANGUAGES), np.uint32, 'sum')
+        return new
+
+    def absorb(self, new):
+        """다른 프로세스의 pending() 결과를 합침 (다음 save 때 함께 저장)"""
+        texts, authors = new
+        self.texts.update(texts)
+        self.authors.update(authors)
+        self._new_texts.update(texts)
+        self._new_authors.update(authors)
+
+    def save(self, store_dir):
+        """디스크 캐시 + 이번 실행에서 새로 생긴 항목을 저장.
+
+        저장 직전에 디스크 내용을 다시 읽어 그 위에 더하지만 잠금은 없으므로,
+        한 저장소에 동시에 저장하는 프로세스는 하나여야 한다.
+        """
+        if not len(self._new_texts) and not len(self._new_authors):
+            return
+        texts, authors = _read_cache(store_dir)
+        if texts is None:
+            texts = HashTable(1, np.uint8)
+        if authors is None:
+            authors = HashTable(len(LANGUAGES), np.uint32, 'sum')
+        texts.update(self._new_texts)
+        authors.update(self._new_authors)
+        path = cache_dir(store_dir)
+        os.makedirs(path, exist_ok=True)
+        for name, table in [(TEXTS_FILE, texts.to_arrow(['code'])), (AUTHORS_FILE, authors.to_arrow(LANGUAGES))]:
+            tmp = os.path.join(path, f'{name}.{os.getpid()}.tmp')
+            feather.write_feather(table, tmp, compression='zstd')
+            os.replace(tmp, os.path.join(path, name))
+        self.texts, self.authors = texts, authors
+        self._new_texts = HashTable(1, np.uint8)
+        self._new_authors = HashTable(len(LANGUAGES), np.uint32, 'sum')
+        self.loaded.add(store_dir)
+
+
+def cache_dir(store_dir):
+    return os.path.join(store_dir, LANGUAGE_DIR)
+
+
+def _read_cache(store_dir):
+    result = []
+    for name, dtype, how in [(TEXTS_FILE, np.uint8, 'first'), (AUTHORS_FILE, np.uint32, 'sum')]:
+        path = os.path.join(cache_dir(store_dir), name)
+        table = feather.read_table(path) if os.path.exists(path) else None
+        result.append(None if table is None else HashTable.from_arrow(table, dtype, how))
+    return result
+
+
+_classifier = None
+
+
+def shared_classifier():
+    """프로세스 공용 분류기 (원본 청크 스트리밍에서 사용)"""
+    global _classifier
+    if _classifier is None:
+        _classifier = LanguageClassifier(_load_model())
+    return _classifier
+
+
+def load_language_cache(store_dir):
+    shared_classifier().load(store_dir)
+
+
+def save_language_cache(store_dir):
+    shared_classifier().save(store_dir)
+
+
+def pending_language_cache():
+    return shared_classifier().pending()
+
+
+def absorb_language_cache(new):
+    shared_classifier().absorb(new)
+
+
+# ============================================================
+# 실행 (원본 표기와 비교)
+# ============================================================
+def main():
+    from kfantrix_pipeline import CHUNK_SIZE, iter_raw_chunks
+    from kfantrix_store import STORE_DIR
+
+    parser = argparse.ArgumentParser(description='언어 분류 결과를 원본 language 와 비교')
+    parser.add_argument('prefix', help='그룹 prefix (예: plave)')
+    parser.add_argument('--raw', help='원본 댓글 CSV 경로 (기본: <prefix>_comments_raw.csv)')
+    parser.add_argument('--chunksize', type=int, default=CHUNK_SIZE)
+    parser.add_argument('--store-dir', default=STORE_DIR)
+    parser.add_argument('--cache', action='store_true', help='저장소의 캐시를 읽고 결과도 저장')
+    parser.add_argument('--passes', type=int, default=2, help='같은 덤프를 몇 번 분류할지 (2번째부터 캐시 효과)')
+    args = parser.parse_args()
+
+    classifier = LanguageClassifier(_load_model())
+    if args.cache:
+        classifier.load(args.store_dir)
+    raw_path = args.raw or f'{args.prefix}_comments_raw.csv'
+    for n in range(args.passes):
+        before, after, rows, elapsed = [], [], 0, 0.0
+        classifier.stats = dict.fromkeys(classifier.stats, 0)
+        for chunk in iter_raw_chunks(raw_path, args.chunksize, args.prefix, rematch=False, classify=False):
+            started = time.perf_counter()
+            result = classifier.annotate(chunk, reclassify=True)
+            elapsed += time.perf_counter() - started
+            rows += len(chunk)
+            before.append(chunk['language'].fillna('unknown'))
+            after.append(result['language'])
+        before, after = pd.concat(before), pd.concat(after)
+        print(f'[{n + 1}회차] 댓글 {rows:,}개, {elapsed:.2f}초 ({rows / max(elapsed, 1e-9):,.0f}개/초), '
+              f'원본과 일치 {(before == after).mean() * 100:.1f}%, 경로 {classifier.stats}')
+    report = pd.crosstab(before.rename('원본'), after.rename('분류'))
+    print(report.to_string())
+    if args.cache:
+        classifier.save(args.store_dir)
+
+
+if __name__ == '__main__':
+    main()
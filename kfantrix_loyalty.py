@@ -0,0 +1,427 @@
+# kfantrix_loyalty.py - 작성자 단위 충성도 지수
+# 기간 조회용 (날짜, 멤버) 셀은 항상 HyperLogLog / bottom-k 스케치라 셀 크기가 작성자 수와 무관하다.
+# 전체 기간은 작은 그룹이면 멤버별 정확 카운트, 큰 그룹이면 셀을 합친 스케치 (+ 작성자 조회용 Count-Min).
+# 모든 백엔드는 merge() 가 가능해 셀을 합쳐 임의 기간을 계산한다.
+
+import argparse
+import os
+import pickle
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+from kfantrix_pipeline import (CHUNK_SIZE, LOYAL_MIN, MEMBER_LOYAL_MIN, MEMBER_SUPER_MIN,
+                               SUPER_MIN, TABLE_FILES, iter_raw_chunks, rate)
+from kfantrix_decode import decode_list
+from kfantrix_store import STORE_DIR, group_dir, read_table
+
+LOYALTY_FILE = 'loyalty.pkl'
+
+TIER_COLUMNS = ['member', 'total_fans', 'casual_fans', 'casual_rate', 'regular_fans', 'regular_rate',
+                'loyal_fans', 'loyal_rate', 'super_fans', 'super_fan_rate']
+
+# 고유 작성자가 이 수 미만이면 정확 카운트
+EXACT_LIMIT = 200_000
+
+_UINT64 = np.uint64
+
+
+def hash_authors(author_ids):
+    """author_id → 64bit 해시 (그룹/프로세스가 달라도 같은 값)"""
+    return pd.util.hash_array(np.asarray(author_ids, dtype=object))
+
+
+def _bit_length(x):
+    """uint64 배열의 비트 길이 (벡터화)"""
+    x = x.copy()
+    n = np.zeros(x.shape, dtype=np.int64)
+    for shift in (32, 16, 8, 4, 2, 1):
+        mask = x >= (_UINT64(1) << _UINT64(shift))
+        n[mask] += shift
+        x[mask] >>= _UINT64(shift)
+    return n + (x > 0)
+
+
+# ============================================================
+# 스케치
+# ============================================================
+class HyperLogLog:
+    """고유 작성자 수 추정 (표준오차 ≈ 1.04 / sqrt(2^p))"""
+
+    def __init__(self, p=14):
+        self.p = p
+        self.registers = np.zeros(1 << p, dtype=np.uint8)
+
+    def add_hashes(self, hashes):
+        p = _UINT64(self.p)
+        idx = (hashes >> (_UINT64(64) - p)).astype(np.int64)
+        rest = hashes & ((_UINT64(1) << (_UINT64(64) - p)) - _UINT64(1))
+        rank = (64 - self.p) - _bit_length(rest) + 1
+        np.maximum.at(self.registers, idx, rank.astype(np.uint8))
+
+    def merge(self, other):
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+    def count(self):
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / np.sum(np.ldexp(1.0, -self.registers.astype(np.int64)))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if estimate <= 2.5 * m and zeros:
+            estimate = m * np.log(m / zeros)
+        return int(round(estimate))
+
+
+class CountMinSketch:
+    """작성자별 댓글 수 상한 추정 (과대추정만 있음)"""
+
+    def __init__(self, width=1 << 16, depth=4):
+        self.width = width
+        self.depth = depth
+        self.table = np.zeros((depth, width), dtype=np.int64)
+
+    def _columns(self, hashes):
+        h1 = hashes & _UINT64(0xFFFFFFFF)
+        h2 = hashes >> _UINT64(32)
+        return [((h1 + _UINT64(i) * h2) % _UINT64(self.width)).astype(np.int64)
+                for i in range(self.depth)]
+
+    def add_hashes(self, hashes, counts=None):
+        counts = np.ones(len(hashes), dtype=np.int64) if counts is None else counts
+        for row, cols in enumerate(self._columns(hashes)):
+            np.add.at(self.table[row], cols, counts)
+
+    def merge(self, other):
+        self.table += other.table
+        return self
+
+    def estimate(self, author_ids):
+        cols = self._columns(hash_authors(author_ids))
+        return np.min([self.table[row, c] for row, c in enumerate(cols)], axis=0)
+
+
+class BottomK:
+    """해시가 가장 작은 k 명의 작성자와 그 정확한 댓글 수.
+
+    같은 작성자는 어디서나 같은 해시를 가지므로, 합친 집합의 bottom-k 에
+    드는 작성자는 각 부분 집합의 bottom-k 에도 반드시 들어 있다.
+    따라서 merge 후에도 표본 작성자의 댓글 수는 정확하고, 등급 비율은
+    고유 작성자에 대한 균등 표본 비율이 된다.
+    """
+
+    def __init__(self, k=4096):
+        self.k = k
+        self.hashes = np.zeros(0, dtype=np.uint64)
+        self.counts = np.zeros(0, dtype=np.int64)
+
+    def _combine(self, hashes, counts):
+        hashes = np.concatenate([self.hashes, hashes])
+        counts = np.concatenate([self.counts, counts])
+        uniq, inverse = np.unique(hashes, return_inverse=True)
+        summed = np.bincount(inverse, weights=counts, minlength=len(uniq)).astype(np.int64)
+        self.hashes = uniq[:self.k]
+        self.counts = summed[:self.k]
+
+    def add_hashes(self, hashes):
+        if len(self.hashes) >= self.k:
+            hashes = hashes[hashes <= self.hashes[-1]]
+        uniq, counts = np.unique(hashes, return_counts=True)
+        self._combine(uniq, counts.astype(np.int64))
+
+    def merge(self, other):
+        self._combine(other.hashes, other.counts)
+        return self
+
+    def fraction(self, min_count, max_count=None):
+        if not len(self.counts):
+            return 0.0
+        mask = self.counts >= min_count
+        if max_count is not None:
+            mask &= self.counts < max_count
+        return float(mask.mean())
+
+
+# ============================================================
+# 충성도 백엔드
+# ============================================================
+class ExactLoyalty:
+    """작성자별 댓글 수를 그대로 들고 있는 정확 백엔드"""
+
+    def __init__(self):
+        self.counts = Counter()
+
+    def add(self, author_ids):
+        self.counts.update(author_ids)
+
+    def merge(self, other):
+        self.counts.update(other.counts)
+        return self
+
+    def unique_authors(self):
+        return len(self.counts)
+
+    def count_between(self, min_count, max_count=None):
+        return sum(1 for c in self.counts.values()
+                   if c >= min_count and (max_count is None or c < max_count))
+
+
+class SketchLoyalty:
+    """HLL(고유 수) + bottom-k(등급 비율) 백엔드.
+
+    (날짜, 멤버) 셀마다 하나씩 생기므로 셀당 수십 KB 이내로 유지한다.
+    작성자가 k 명 이하인 동안은 bottom-k 표본이 곧 전체라 HLL 없이 정확하게 세고,
+    k 명을 넘는 순간 표본의 해시로 HLL 을 만들어 이어 간다 (작은 셀은 HLL 레지스터를 들지 않음).
+    """
+
+    def __init__(self, p=12, k=2048):
+        self.p = p
+        self.hll = None
+        self.sample = BottomK(k)
+
+    def _hll_of(self, hashes):
+        hll = HyperLogLog(self.p)
+        hll.add_hashes(hashes)
+        return hll
+
+    def _ensure_hll(self, hashes):
+        """표본 밖으로 작성자가 밀려나기 직전이면 HLL 시작 (hashes 는 새로 들어올 해시)"""
+        if self.hll is None and len(np.union1d(self.sample.hashes, hashes)) > self.sample.k:
+            self.hll = self._hll_of(self.sample.hashes)
+
+    def add(self, author_ids):
+        hashes = hash_authors(author_ids)
+        self._ensure_hll(hashes)
+        if self.hll is not None:
+            self.hll.add_hashes(hashes)
+        self.sample.add_hashes(hashes)
+
+    def merge(self, other):
+        other_hll = getattr(other, 'hll', None)
+        self._ensure_hll(other.sample.hashes)
+        if self.hll is None and other_hll is not None:
+            self.hll = self._hll_of(self.sample.hashes)
+        if self.hll is not None:
+            self.hll.merge(other_hll if other_hll is not None else self._hll_of(other.sample.hashes))
+        self.sample.merge(other.sample)
+        return self
+
+    def unique_authors(self):
+        return len(self.sample.hashes) if self.hll is None else self.hll.count()
+
+    def count_between(self, min_count, max_count=None):
+        return int(round(self.sample.fraction(min_count, max_count) * self.unique_authors()))
+
+
+BACKENDS = {'exact': ExactLoyalty, 'sketch': SketchLoyalty}
+
+
+# ============================================================
+# (날짜, 멤버) 충성도 인덱스
+# ============================================================
+class LoyaltyIndex:
+    """날짜 × 멤버 셀별 스케치 + (정확 백엔드면) 멤버별 전체 기간 정확 카운트.
+    member 가 None 인 셀은 그룹 전체.
+
+    기간 조회는 해당 날짜 셀만 merge 하므로 원본 댓글을 다시 읽지 않는다.
+    정확 카운트를 날짜 셀마다 두면 메모리가 날짜 × 멤버 × 작성자로 늘어나므로
+    정확 값은 전체 기간에만 쓰고, 기간을 좁힌 조회는 백엔드와 무관하게 스케치로 답한다.
+    """
+
+    def __init__(self, backend='exact'):
+        self.backend = backend
+        self.cells = {}
+        self.members = []
+        # 전체 기간 멤버별 작성자 댓글 수 (정확 백엔드만)
+        self.totals = {} if backend == 'exact' else None
+        # 전체 기간 작성자별 댓글 수 조회용 (스케치 백엔드만)
+        self.author_counts = CountMinSketch() if backend == 'sketch' else None
+
+    def __setstate__(self, state):
+        # 이전 형식: 정확 백엔드가 날짜 셀마다 작성자 Counter 를 들고 있었음 → 전체 기간 합 + 스케치 셀로 변환
+        self.__dict__.update(state)
+        if 'totals' in state:
+            return
+        self.totals = {} if self.backend == 'exact' else None
+        if self.totals is None:
+            return
+        for (date, member), cell in list(self.cells.items()):
+            self._total(member).merge(cell)
+            sketch = SketchLoyalty()
+            if cell.counts:
+                sketch.add(np.repeat(np.array(list(cell.counts), dtype=object), list(cell.counts.values())))
+            self.cells[(date, member)] = sketch
+
+    def _cell(self, date, member):
+        key = (date, member)
+        if key not in self.cells:
+            self.cells[key] = SketchLoyalty()
+            if member is not None and member not in self.members:
+                self.members.append(member)
+        return self.cells[key]
+
+    def _total(self, member):
+        if member not in self.totals:
+            self.totals[member] = ExactLoyalty()
+        return self.totals[member]
+
+    def _add(self, date, member, authors):
+        self._cell(date, member).add(authors)
+        if self.totals is not None:
+            self._total(member).add(authors)
+
+    def add_chunk(self, chunk):
+        """원본 댓글 청크 반영 (mentioned_members 는 문자열/리스트 모두 가능)"""
+        members = chunk['mentioned_members']
+        if len(members) and isinstance(members.iloc[0], str):
+            members = decode_list(members)
+        for date, authors in chunk.groupby('date')['author_id']:
+            self._add(date, None, authors.to_numpy())
+        if self.author_counts is not None:
+            self.author_counts.add_hashes(hash_authors(chunk['author_id']))
+        mentions = (pd.DataFrame({'date': chunk['date'].to_numpy(),
+                                  'author_id': chunk['author_id'].to_numpy(),
+                                  'member': members.to_numpy()})
+                    .explode('member')
+                    .dropna())
+        for (date, member), authors in mentions.groupby(['date', 'member'])['author_id']:
+            self._add(date, member, authors.to_numpy())
+
+    def merge(self, other):
+        """다른 인덱스(다른 영상 묶음/수집분) 합치기"""
+        for (date, member), cell in other.cells.items():
+            self._cell(date, member).merge(cell)
+        if self.totals is not None and other.totals is not None:
+            for member, total in other.totals.items():
+                self._total(member).merge(total)
+        if self.author_counts is not None and other.author_counts is not None:
+            self.author_counts.merge(other.author_counts)
+        return self
+
+    def author_count(self, author_id):
+        """작성자 한 명의 전체 기간 댓글 수 (스케치는 상한 추정)"""
+        if self.author_counts is not None:
+            return int(self.author_counts.estimate([author_id])[0])
+        return self.query().counts.get(author_id, 0)
+
+    def dates(self):
+        return sorted({date for date, _ in self.cells})
+
+    def query(self, start=None, end=None, member=None):
+        """기간 [start, end] 의 백엔드 (정확 백엔드의 전체 기간은 정확 카운트, 그 밖에는 셀을 합친 스케치)"""
+        if self.totals is not None and not start and not end:
+            return self.totals.get(member, ExactLoyalty())
+        result = SketchLoyalty()
+        for (date, m), cell in self.cells.items():
+            if m != member:
+                continue
+            if (start and date < start) or (end and date > end):
+                continue
+            result.merge(cell)
+        return result
+
+    # -------------------- 대시보드용 테이블 --------------------
+    def summary(self, start=None, end=None):
+        """기간별 고유 작성자 / 진성팬 / 슈퍼팬 비율"""
+        cell = self.query(start, end)
+        unique = cell.unique_authors()
+        return {
+            'unique_authors': unique,
+            'loyal_fan_rate': rate(cell.count_between(LOYAL_MIN), unique, 2),
+            'super_fan_rate': rate(cell.count_between(SUPER_MIN), unique, 2)
+        }
+
+    def member_tiers(self, start=None, end=None):
+        """기간별 멤버 팬 등급 (_loyal_fans.csv 와 같은 컬럼)"""
+        rows = []
+        for member in self.members:
+            cell = self.query(start, end, member)
+            total = cell.unique_authors()
+            casual = cell.count_between(1, LOYAL_MIN)
+            regular = cell.count_between(LOYAL_MIN, MEMBER_LOYAL_MIN)
+            loyal = cell.count_between(MEMBER_LOYAL_MIN, MEMBER_SUPER_MIN)
+            super_fans = cell.count_between(MEMBER_SUPER_MIN)
+            rows.append({
+                'member': member,
+                'total_fans': total,
+                'casual_fans': casual, 'casual_rate': rate(casual, total),
+                'regular_fans': regular, 'regular_rate': rate(regular, total),
+                'loyal_fans': loyal, 'loyal_rate': rate(loyal, total),
+                'super_fans': super_fans, 'super_fan_rate': rate(super_fans, total)
+            })
+        return pd.DataFrame(rows, columns=TIER_COLUMNS)
+
+
+# ============================================================
+# 저장/복원
+# ============================================================
+def loyalty_path(prefix, store_dir=STORE_DIR):
+    return os.path.join(group_dir(prefix, store_dir), LOYALTY_FILE)
+
+
+def save_loyalty(index, prefix, store_dir=STORE_DIR):
+    path = loyalty_path(prefix, store_dir)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = path + '.tmp'
+    with open(tmp, 'wb') as f:
+        pickle.dump(index, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp, path)
+
+
+def loyalty_version(prefix, store_dir=STORE_DIR):
+    """인덱스 파일 수정 시각 (캐시 키 용도, 없으면 None)"""
+    path = loyalty_path(prefix, store_dir)
+    return os.path.getmtime(path) if os.path.exists(path) else None
+
+
+def load_loyalty(prefix, store_dir=STORE_DIR):
+    """저장된 충성도 인덱스 (없으면 None)"""
+    path = loyalty_path(prefix, store_dir)
+    if not os.path.exists(path):
+        return None
+    with open(path, 'rb') as f:
+        return pickle.load(f)
+
+
+def choose_backend(prefix, store_dir=STORE_DIR, src_dir='.'):
+    """기존 summary 의 고유 작성자 수로 백엔드 선택"""
+    summary = read_table(prefix, 'summary', store_dir)
+    if summary is None:
+        path = os.path.join(src_dir, f"{prefix}_{TABLE_FILES['summary']}.csv")
+        summary = pd.read_csv(path) if os.path.exists(path) else None
+    if summary is None or summary['unique_authors'].iloc[0] < EXACT_LIMIT:
+        return 'exact'
+    return 'sketch'
+
+
+def build_loyalty(prefix, raw_path=None, store_dir=STORE_DIR, backend='auto',
+                  chunksize=CHUNK_SIZE):
+    """원본 댓글로 충성도 인덱스 생성 후 저장"""
+    raw_path = raw_path or f'{prefix}_comments_raw.csv'
+    if backend == 'auto':
+        backend = choose_backend(prefix, store_dir)
+    index = LoyaltyIndex(backend)
+    for chunk in iter_raw_chunks(raw_path, chunksize, prefix):
+        index.add_chunk(chunk.drop_duplicates('comment_id'))
+    save_loyalty(index, prefix, store_dir)
+    return index
+
+
+def main():
+    parser = argparse.ArgumentParser(description='작성자 충성도 인덱스 생성')
+    parser.add_argument('prefix', help='그룹 prefix (예: plave)')
+    parser.add_argument('--raw', help='원본 댓글 CSV 경로 (기본: <prefix>_comments_raw.csv)')
+    parser.add_argument('--store-dir', default=STORE_DIR)
+    parser.add_argument('--backend', choices=['auto'] + list(BACKENDS), default='auto')
+    parser.add_argument('--chunksize', type=int, default=CHUNK_SIZE)
+    args = parser.parse_args()
+
+    index = build_loyalty(args.prefix, args.raw, args.store_dir, args.backend, args.chunksize)
+    summary = index.summary()
+    print(f"✅ {args.prefix} ({index.backend}): 고유 작성자 {summary['unique_authors']:,}명, "
+          f"진성팬 {summary['loyal_fan_rate']}%, 슈퍼팬 {summary['super_fan_rate']}%")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,279 @@
+# kfantrix_mentions.py - 댓글 본문 멤버 언급 탐지 (Aho-Corasick)
+# 그룹별 별칭 사전(한글 이름·성+이름, 로마자, 애칭, 팬덤 태그·이모지)을 하나의 오토마톤으로 컴파일하고
+# 정규화한 본문을 한 번만 훑어 mentioned_members 를 다시 만든다.
+# 별칭(+조사) 인 raw_words 토큰(changbin, seungmin, 하민이 ...)은 일반 단어 순위에서 빠진다.
+#
+#   정규화  NFKC + casefold (ＬＩＬＹ / Lily → lily), 3번 이상 늘인 로마자는 한 글자로 (Noahhh → noah),
+#           이모지 변형 선택자(U+FE0F) 제거
+#   경계    로마자 별칭은 앞뒤가 영문·숫자가 아닐 때만 (chan ≠ change, han ≠ thank)
+#           한글 별칭은 띄어 쓰지 않은 팬 표현(밤비귀여워, 하민쌤)이 많아 경계를 보지 않고,
+#           일반 단어의 앞부분이기도 한 BOUNDED_ALIASES 만 뒤가 한글이 아니거나 조사·호칭일 때 (지우가 → 지우, 지우개 ≠ 지우)
+#   제외    NEGATIVE_TERMS 안에 걸친 별칭은 버림 (크리스마스, 릴리즈)
+#   문맥    GATED_ALIASES (chan, 🐺 처럼 흔한 말·이모지)는 같은 댓글에 다른 별칭이나
+#           GROUP_TAGS (skz, 스키즈 ...) 가 있을 때만 언급으로 센다
+
+import argparse
+import os
+import re
+import time
+import unicodedata
+from collections import deque
+from functools import lru_cache
+
+import pandas as pd
+
+from kfantrix_decode import decode_list
+
+# ============================================================
+# 별칭 사전 (대표 이름은 심층 분석 테이블의 member 값)
+# ============================================================
+# 대표 이름도 목록에 있을 때만 별칭 - 한 글자 한글('한', '찬')처럼 일반 단어와 겹치는 이름은 넣지 않는다
+GROUP_ALIASES = {
+    'plave': {
+        '예준': ['예준', '남예준', 'yejun', 'yejunie', 'ye jun', 'nam yejun'],
+        '노아': ['노아', '한노아', 'noah', 'noahya', 'han noah'],
+        '밤비': ['밤비', 'bamby', 'bambi'],
+        '은호': ['은호', '도은호', 'eunho', 'eunhoya', 'eun ho', 'do eunho'],
+        '하민': ['하민', '유하민', 'hamin', 'haminie', 'hamini', 'yu hamin']
+    },
+    'nmixx': {
+        '릴리': ['릴리', 'lily', 'lily jin'],
+        '해원': ['해원', '오해원', 'haewon', 'oh haewon'],
+        '설윤': ['설윤', '설수윤', 'sullyoon', 'sullyun', 'seolyoon'],
+        '배이': ['배이', '배진솔', 'baee', 'jinsol'],
+        '지우': ['지우', '김지우', 'jiwoo', 'kim jiwoo'],
+        '규진': ['규진', '장규진', 'kyujin', 'gyujin']
+    },
+    'skz': {
+        '방찬': ['방찬', '크리스', 'bang chan', 'bangchan', 'chan', 'channie', 'chris',
+                'wolfchan', 'wolf chan', '울프찬', '🐺'],
+        '리노': ['리노', '이민호', 'lee know', 'leeknow', 'minho', 'lino', 'leebit', '리빗', '🐰'],
+        '창빈': ['창빈', '서창빈', 'changbin', 'binnie', 'spearb', 'dwaekki', '돼끼', '🐷'],
+        '현진': ['현진', '황현진', 'hyunjin', 'jinnie', 'jiniret', '지니렛'],
+        '한': ['한지성', '지성', 'han', 'jisung', 'han jisung', 'quokka', '쿼카', 'hanquokka', '한쿼카', '🐿'],
+        '필릭스': ['필릭스', '용복', '이용복', 'felix', 'yongbok', 'lix', 'bbokari', '뽁아리', '🐥'],
+        '승민': ['승민', '김승민', 'seungmin', 'minnie', 'puppym', 'puppy m', '퍼피엠', '🐶'],
+        '아이엔': ['아이엔', '정인', '양정인', 'i.n', 'jeongin', 'innie', 'foxiny', 'fox.i.ny', '폭스아이니', '🦊']
+    }
+}
+
+# 혼자서는 흔한 말·이모지라 같은 댓글에 다른 별칭이나 그룹 태그가 있어야 세는 별칭
+GATED_ALIASES = {
+    'nmixx': ['lily'],
+    'skz': ['chan', 'chris', 'han', 'lix', 'minnie', 'innie', 'binnie', 'jinnie',
+            '🐺', '🐰', '🐷', '🐿', '🐥', '🐶', '🦊']
+}
+# 일반 단어의 앞부분이기도 한 한글 별칭 (뒤에 조사·호칭이 오거나 한글이 끝날 때만 인정)
+BOUNDED_ALIASES = {
+    'nmixx': ['릴리', '지우', '배이'],
+    'skz': ['크리스', '지성']
+}
+# 그룹 이름·팬덤 태그 (문맥으로만 쓰고 멤버로 세지 않음)
+GROUP_TAGS = {
+    'plave': ['plave', '플레이브', 'plli'],
+    'nmixx': ['nmixx', '엔믹스', 'nswer', '엔써'],
+    'skz': ['skz', 'stray kids', 'straykids', '스트레이키즈', '스트레이 키즈', '스키즈', 'skzoo']
+}
+# 별칭을 품고 있지만 멤버가 아닌 말 (이 안에 걸친 별칭은 버림)
+NEGATIVE_TERMS = {
+    'nmixx': ['릴리즈', '릴리스', '지우개', '지우기'],
+    'skz': ['크리스마스', '크리스천', '크리스탈', '지성인', '지성미']
+}
+
+# raw_words 에서 한글 별칭 뒤에 붙어도 별칭으로 보는 조사/호칭 (하민이가, 은호는, 설윤아)
+PARTICLES = {
+    '이', '가', '은', '는', '을', '를', '의', '도', '야', '아', '랑', '와', '과', '한테', '에게', '만',
+    '이가', '이는', '이를', '이의', '이도', '이랑', '이한테', '이만', '님', '님이', '님은'
+}
+# 본문에서 한글 별칭 뒤에 바로 붙어도 되는 말 (조사 + 호칭·애칭 접미사)
+SUFFIXES = PARTICLES | {
+    '에', '에게서', '한테서', '께', '로', '으로', '처럼', '보다', '까지', '부터', '하고', '이랑은',
+    '이고', '이야', '이다', '이네', '이지', '씨', '오빠', '형', '언니', '누나', '쌤', '짱', '최고', '최애'
+}
+RAW_SUFFIX = '_comments_raw.csv'
+ELONGATED_RE = re.compile(r'([a-z])\1{2,}')
+VARIATION_SELECTOR = '\ufe0f'
+# 오토마톤 출력 종류
+ALIAS, GATED, TAG, NEGATIVE = range(4)
+
+
+def normalize(text):
+    text = unicodedata.normalize('NFKC', text).casefold().replace(VARIATION_SELECTOR, '')
+    return ELONGATED_RE.sub(r'\1', text)
+
+
+def _is_word(ch):
+    return ch.isascii() and ch.isalnum()
+
+
+def _is_hangul(ch):
+    return '\uac00' <= ch <= '\ud7a3'
+
+
+def _hangul_boundary(text, end):
+    """한글 별칭이 text[end] 에서 끝날 때 뒤가 한글이 아니거나 조사·호칭으로 이어지는지"""
+    if end + 1 >= len(text) or not _is_hangul(text[end + 1]):
+        return True
+    return any(text.startswith(suffix, end + 1) for suffix in SUFFIXES)
+
+
+# ============================================================
+# 매처
+# ============================================================
+class MentionMatcher:
+    """별칭 → 멤버 Aho-Corasick 오토마톤.
+
+    실패 링크를 미리 펼쳐 상태마다 완전한 전이표(dict)를 만들어 두므로
+    본문 글자 하나당 dict 조회 한 번으로 끝난다 (본문 길이에 선형, 별칭 수와 무관).
+    """
+
+    def __init__(self, aliases, gated=(), bounded=(), tags=(), negatives=()):
+        self.members = list(aliases)
+        self.aliases = {}
+        for member, names in aliases.items():
+            for name in names:
+                self.aliases.setdefault(normalize(name), member)
+        gated = {normalize(name) for name in gated}
+        bounded = {normalize(name) for name in bounded}
+
+        patterns = [(alias, member, GATED if alias in gated else ALIAS) for alias, member in self.aliases.items()]
+        patterns += [(normalize(tag), None, TAG) for tag in tags]
+        patterns += [(normalize(term), None, NEGATIVE) for term in negatives]
+        goto = [{}]
+        outputs = [[]]
+        for pattern, member, kind in patterns:
+            state = 0
+            for ch in pattern:
+                if ch not in goto[state]:
+                    goto.append({})
+                    outputs.append([])
+                    goto[state][ch] = len(goto) - 1
+                state = goto[state][ch]
+            # (길이, 멤버, 종류, 앞 경계 검사, 뒤 경계 검사, 한글 뒤 경계 검사)
+            outputs[state].append((len(pattern), member, kind, _is_word(pattern[0]), _is_word(pattern[-1]),
+                                   pattern in bounded))
+
+        # BFS 로 실패 링크를 계산하면서 전이표를 완성 (DFA)
+        fail = [0] * len(goto)
+        delta = [dict(goto[0])]
+        delta.extend({} for _ in range(len(goto) - 1))
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            outputs[state] = outputs[state] + outputs[fail[state]]
+            delta[state] = dict(delta[fail[state]])
+            for ch, nxt in goto[state].items():
+                fail[nxt] = delta[fail[state]].get(ch, 0)
+                delta[state][ch] = nxt
+                queue.append(nxt)
+        self.delta = delta
+        self.outputs = [tuple(o) for o in outputs]
+
+    def find(self, text):
+        """정규화된 본문 → 언급된 멤버 (처음 나온 순서, 중복 없음)"""
+        delta, outputs = self.delta, self.outputs
+        hits, negatives = [], []
+        state = 0
+        for end, ch in enumerate(text):
+            state = delta[state].get(ch, 0)
+            if not outputs[state]:
+                continue
+            for length, member, kind, left, right, hangul in outputs[state]:
+                start = end - length + 1
+                if kind == NEGATIVE:
+                    negatives.append((start, end))
+                    continue
+                if left and start > 0 and _is_word(text[start - 1]):
+                    continue
+                if right and end + 1 < len(text) and _is_word(text[end + 1]):
+                    continue
+                if hangul and not _hangul_boundary(text, end):
+                    continue
+                hits.append((start, end, member, kind))
+        if negatives:
+            hits = [h for h in hits if not any(s <= h[0] and h[1] <= e for s, e in negatives)]
+        context = any(kind != GATED for _, _, _, kind in hits)
+        found = {}
+        for start, _, member, kind in hits:
+            if member is not None and (kind == ALIAS or context):
+                found[member] = min(start, found.get(member, start))
+        return sorted(found, key=found.get)
+
+    def match(self, texts):
+        """본문 Series → 멤버 list Series (같은 본문은 한 번만 훑음)"""
+        normalized = (texts.fillna('').astype(str).str.normalize('NFKC').str.casefold()
+                      .str.replace(VARIATION_SELECTOR, '', regex=False)
+                      .str.replace(ELONGATED_RE, r'\1', regex=True))
+        unique = pd.unique(normalized)
+        found = dict(zip(unique, map(self.find, unique)))
+        return normalized.map(found)
+
+    def is_alias(self, word):
+        """raw_words 토큰이 별칭(+조사)인지"""
+        word = normalize(word)
+        if word in self.aliases:
+            return True
+        return any(word[:i] in self.aliases and word[i:] in PARTICLES for i in range(2, len(word)))
+
+    def annotate(self, chunk):
+        """원본 댓글 청크의 mentioned_members 를 본문에서 다시 찾고, raw_words 에서 별칭을 뺀다.
+
+        두 컬럼 모두 원본과 같은 repr 문자열로 돌려주므로 이후 디코더는 그대로 쓴다.
+        """
+        chunk = chunk.copy()
+        members = self.match(chunk['text'])
+        chunk['mentioned_members'] = members.map(repr)
+        # raw_words 는 본문 토큰이므로 별칭이 걸린 댓글만 다시 쓰면 된다
+        hit = members.map(bool)
+        if 'raw_words' in chunk.columns and hit.any():
+            words = decode_list(chunk.loc[hit, 'raw_words'])
+            chunk.loc[hit, 'raw_words'] = words.map(lambda ws: repr([w for w in ws if not self.is_alias(w)]))
+        return chunk
+
+
+@lru_cache(maxsize=None)
+def matcher_for(prefix):
+    """그룹 별칭 사전의 매처 (사전이 없는 그룹이면 None)"""
+    aliases = GROUP_ALIASES.get(prefix)
+    if not aliases:
+        return None
+    return MentionMatcher(aliases, GATED_ALIASES.get(prefix, ()), BOUNDED_ALIASES.get(prefix, ()),
+                          GROUP_TAGS.get(prefix, ()), NEGATIVE_TERMS.get(prefix, ()))
+
+
+def prefix_of(path):
+    """'<prefix>_comments_raw.csv' 경로 → prefix (형식이 다르면 None)"""
+    name = os.path.basename(path)
+    return name[:-len(RAW_SUFFIX)] if name.endswith(RAW_SUFFIX) else None
+
+
+# ============================================================
+# 실행 (원본 표기와 비교)
+# ============================================================
+def main():
+    from kfantrix_pipeline import CHUNK_SIZE, iter_raw_chunks
+
+    parser = argparse.ArgumentParser(description='별칭 매처 결과를 원본 mentioned_members 와 비교')
+    parser.add_argument('prefix', help='그룹 prefix (예: plave)')
+    parser.add_argument('--raw', help='원본 댓글 CSV 경로 (기본: <prefix>_comments_raw.csv)')
+    parser.add_argument('--chunksize', type=int, default=CHUNK_SIZE)
+    args = parser.parse_args()
+
+    matcher = matcher_for(args.prefix)
+    if matcher is None:
+        parser.error(f'{args.prefix} 별칭 사전이 없습니다 ({", ".join(GROUP_ALIASES)})')
+    before, after, rows, elapsed = pd.Series(dtype='int64'), pd.Series(dtype='int64'), 0, 0.0
+    for chunk in iter_raw_chunks(args.raw or f'{args.prefix}{RAW_SUFFIX}', args.chunksize, rematch=False):
+        started = time.perf_counter()
+        found = matcher.match(chunk['text'])
+        elapsed += time.perf_counter() - started
+        rows += len(chunk)
+        before = before.add(decode_list(chunk['mentioned_members']).explode().value_counts(), fill_value=0)
+        after = after.add(found.explode().value_counts(), fill_value=0)
+    report = pd.DataFrame({'원본': before, '매처': after}).fillna(0).astype(int)
+    print(report.sort_values('매처', ascending=False).to_string())
+    print(f'\n댓글 {rows:,}개, {elapsed:.2f}초 ({rows / max(elapsed, 1e-9):,.0f}개/초)')
+
+
+if __name__ == '__main__':
+    main()
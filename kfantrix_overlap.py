@@ -0,0 +1,269 @@
+# kfantrix_overlap.py - 그룹·멤버 간 팬(작성자) 중복도 (MinHash + LSH)
+# author_id 집합을 (날짜, 멤버) 셀마다 MinHash 서명 + HyperLogLog 로 요약해 두고,
+# 셀을 합쳐(원소별 min / max) 임의 기간·멤버의 서명을 만든 뒤 서명끼리 Jaccard 를 추정한다.
+# 그룹이 늘어도 정확한 작성자 집합 교집합을 짝마다 계산하지 않는다.
+#
+#   Jaccard  ≈ 같은 자리 서명 값이 같은 비율 (표준오차 ≈ sqrt(J(1-J)/k))
+#   공통 작성자 ≈ Jaccard × |A ∪ B|  (합집합 크기는 HLL 병합으로)
+#
+# store/<prefix>/overlap.pkl   수집(ingest/batch) 때 함께 갱신
+
+import argparse
+import os
+import pickle
+from itertools import combinations
+
+import numpy as np
+import pandas as pd
+
+from kfantrix_decode import decode_list
+from kfantrix_loyalty import HyperLogLog, hash_authors
+from kfantrix_pipeline import CHUNK_SIZE, iter_raw_chunks
+from kfantrix_store import STORE_DIR, group_dir
+
+OVERLAP_FILE = 'overlap.pkl'
+NUM_PERM = 128
+HLL_P = 12
+# 서명 계산 시 한 번에 펼치는 작성자 수 (메모리: BATCH × NUM_PERM × 8 바이트)
+BATCH = 4096
+
+_MAX = np.iinfo(np.uint64).max
+# 순열마다 다른 시드 (프로세스·그룹이 달라도 같은 값이어야 서명을 비교할 수 있음)
+_SEEDS = np.random.default_rng(20251220).integers(0, _MAX, NUM_PERM, dtype=np.uint64, endpoint=True)
+
+
+def _mix(x):
+    """splitmix64 마무리 단계 (uint64 배열, 오버플로는 의도된 wrap-around)"""
+    x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return x ^ (x >> np.uint64(31))
+
+
+# ============================================================
+# 스케치
+# ============================================================
+class MinHash:
+    """작성자 집합 서명 (순열 k 개의 최소 해시) + 고유 작성자 수 HLL"""
+
+    def __init__(self, num_perm=NUM_PERM):
+        self.signature = np.full(num_perm, _MAX, dtype=np.uint64)
+        self.hll = HyperLogLog(HLL_P)
+
+    def add_hashes(self, hashes):
+        hashes = np.unique(hashes)
+        self.hll.add_hashes(hashes)
+        seeds = _SEEDS[:len(self.signature)]
+        with np.errstate(over='ignore'):
+            for start in range(0, len(hashes), BATCH):
+                block = _mix(hashes[start:start + BATCH, None] ^ seeds[None, :])
+                np.minimum(self.signature, block.min(axis=0), out=self.signature)
+
+    def add(self, author_ids):
+        self.add_hashes(hash_authors(author_ids))
+
+    def merge(self, other):
+        np.minimum(self.signature, other.signature, out=self.signature)
+        self.hll.merge(other.hll)
+        return self
+
+    def copy(self):
+        result = MinHash(len(self.signature))
+        result.merge(self)
+        return result
+
+    @property
+    def empty(self):
+        return bool((self.signature == _MAX).all())
+
+    def count(self):
+        return 0 if self.empty else self.hll.count()
+
+    def jaccard(self, other):
+        if self.empty or other.empty:
+            return 0.0
+        return float(np.mean(self.signature == other.signature))
+
+
+def compare(a, b):
+    """두 서명 → Jaccard, 공통 작성자 수, A 작성자 중 B 에도 있는 비율(%) 등 추정"""
+    jaccard = a.jaccard(b)
+    union = a.copy().merge(b).count()
+    shared = int(round(jaccard * union))
+    size_a, size_b = a.count(), b.count()
+    return {
+        'authors_a': size_a,
+        'authors_b': size_b,
+        'jaccard': round(jaccard, 4),
+        'shared_authors': shared,
+        'share_of_a': round(min(shared / size_a, 1) * 100, 1) if size_a else 0.0,
+        'share_of_b': round(min(shared / size_b, 1) * 100, 1) if size_b else 0.0
+    }
+
+
+def lsh_candidates(signatures, bands=32):
+    """LSH 밴딩: 한 밴드라도 서명이 같은 (이름, 이름) 후보 쌍.
+
+    bands × rows = 서명 길이. Jaccard 가 (1/bands)^(1/rows) 근처 이상인 쌍이 후보로 잡힌다.
+    """
+    buckets = {}
+    for name, sketch in signatures.items():
+        if sketch.empty:
+            continue
+        for band, part in enumerate(np.array_split(sketch.signature, bands)):
+            buckets.setdefault((band, part.tobytes()), []).append(name)
+    pairs = set()
+    for names in buckets.values():
+        pairs.update(combinations(sorted(set(names)), 2))
+    return sorted(pairs)
+
+
+# ============================================================
+# (날짜, 멤버) 서명 인덱스
+# ============================================================
+class OverlapIndex:
+    """날짜 × 멤버 셀별 MinHash. member 가 None 인 셀은 그룹 전체 (LoyaltyIndex 와 같은 구조)"""
+
+    def __init__(self, num_perm=NUM_PERM):
+        self.num_perm = num_perm
+        self.cells = {}
+        self.members = []
+
+    def _cell(self, date, member):
+        key = (date, member)
+        if key not in self.cells:
+            self.cells[key] = MinHash(self.num_perm)
+            if member is not None and member not in self.members:
+                self.members.append(member)
+        return self.cells[key]
+
+    def add_chunk(self, chunk):
+        """원본 댓글 청크 반영 (mentioned_members 는 문자열/리스트 모두 가능)"""
+        members = chunk['mentioned_members']
+        if len(members) and isinstance(members.iloc[0], str):
+            members = decode_list(members)
+        for date, authors in chunk.groupby('date')['author_id']:
+            self._cell(date, None).add(authors.to_numpy())
+        mentions = (pd.DataFrame({'date': chunk['date'].to_numpy(),
+                                  'author_id': chunk['author_id'].to_numpy(),
+                                  'member': members.to_numpy()})
+                    .explode('member')
+                    .dropna())
+        for (date, member), authors in mentions.groupby(['date', 'member'])['author_id']:
+            self._cell(date, member).add(authors.to_numpy())
+
+    def merge(self, other):
+        for (date, member), cell in other.cells.items():
+            self._cell(date, member).merge(cell)
+        return self
+
+    def dates(self):
+        return sorted({date for date, _ in self.cells})
+
+    def query(self, start=None, end=None, member=None):
+        """기간 [start, end] 의 셀을 합친 서명"""
+        result = MinHash(self.num_perm)
+        for (date, m), cell in self.cells.items():
+            if m != member:
+                continue
+            if (start and date < start) or (end and date > end):
+                continue
+            result.merge(cell)
+        return result
+
+
+# ============================================================
+# 저장/복원
+# ============================================================
+def overlap_path(prefix, store_dir=STORE_DIR):
+    return os.path.join(group_dir(prefix, store_dir), OVERLAP_FILE)
+
+
+def save_overlap(index, prefix, store_dir=STORE_DIR):
+    path = overlap_path(prefix, store_dir)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = path + '.tmp'
+    with open(tmp, 'wb') as f:
+        pickle.dump(index, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp, path)
+
+
+def overlap_version(prefix, store_dir=STORE_DIR):
+    """인덱스 파일 수정 시각 (캐시 키 용도, 없으면 None)"""
+    path = overlap_path(prefix, store_dir)
+    return os.path.getmtime(path) if os.path.exists(path) else None
+
+
+def load_overlap(prefix, store_dir=STORE_DIR):
+    """저장된 중복도 인덱스 (없으면 None)"""
+    path = overlap_path(prefix, store_dir)
+    if not os.path.exists(path):
+        return None
+    with open(path, 'rb') as f:
+        return pickle.load(f)
+
+
+def build_overlap(prefix, raw_path=None, store_dir=STORE_DIR, chunksize=CHUNK_SIZE):
+    """원본 댓글로 중복도 인덱스 생성 후 저장"""
+    raw_path = raw_path or f'{prefix}_comments_raw.csv'
+    index = OverlapIndex()
+    for chunk in iter_raw_chunks(raw_path, chunksize, prefix):
+        index.add_chunk(chunk.drop_duplicates('comment_id'))
+    save_overlap(index, prefix, store_dir)
+    return index
+
+
+# ============================================================
+# 비교 표
+# ============================================================
+def signatures(indexes, start=None, end=None, members=True):
+    """{prefix: OverlapIndex} → {'prefix' 또는 'prefix/멤버': MinHash}"""
+    result = {}
+    for prefix, index in indexes.items():
+        result[prefix] = index.query(start, end)
+        if members:
+            for member in index.members:
+                result[f'{prefix}/{member}'] = index.query(start, end, member)
+    return result
+
+
+def overlap_table(sketches, pairs=None):
+    """이름 쌍별 중복도 추정 (pairs 가 없으면 모든 쌍, 서명 비교라 쌍이 많아도 가벼움)"""
+    pairs = pairs if pairs is not None else list(combinations(sketches, 2))
+    rows = [{'a': a, 'b': b, **compare(sketches[a], sketches[b])} for a, b in pairs]
+    columns = ['a', 'b', 'authors_a', 'authors_b', 'jaccard', 'shared_authors', 'share_of_a', 'share_of_b']
+    return pd.DataFrame(rows, columns=columns).sort_values('jaccard', ascending=False, ignore_index=True)
+
+
+def jaccard_matrix(sketches):
+    names = list(sketches)
+    values = [[1.0 if a == b else sketches[a].jaccard(sketches[b]) for b in names] for a in names]
+    return pd.DataFrame(values, index=names, columns=names)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='그룹·멤버 간 팬 중복도 (MinHash)')
+    parser.add_argument('prefixes', nargs='+', help='그룹 prefix (예: plave nmixx skz)')
+    parser.add_argument('--build', action='store_true', help='원본 댓글로 인덱스를 먼저 생성')
+    parser.add_argument('--store-dir', default=STORE_DIR)
+    parser.add_argument('--start', help='기간 시작 (YYYY-MM-DD)')
+    parser.add_argument('--end', help='기간 끝 (YYYY-MM-DD)')
+    parser.add_argument('--groups-only', action='store_true', help='멤버 단위 서명 제외')
+    parser.add_argument('--lsh', action='store_true', help='모든 쌍 대신 LSH 후보 쌍만 비교')
+    parser.add_argument('--bands', type=int, default=32, help='LSH 밴드 수 (많을수록 낮은 Jaccard 도 후보)')
+    args = parser.parse_args()
+
+    indexes = {}
+    for prefix in args.prefixes:
+        index = build_overlap(prefix, store_dir=args.store_dir) if args.build else load_overlap(prefix, args.store_dir)
+        if index is None:
+            print(f'⚠️ {prefix}: 중복도 인덱스 없음 (--build 또는 kfantrix_ingest.py 실행)')
+            continue
+        indexes[prefix] = index
+    sketches = signatures(indexes, args.start, args.end, not args.groups_only)
+    pairs = lsh_candidates(sketches, args.bands) if args.lsh else None
+    with pd.option_context('display.width', 200, 'display.max_rows', 200):
+        print(overlap_table(sketches, pairs).to_string(index=False))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,561 @@
+# kfantrix_pipeline.py - 원본 댓글 → 심층 분석 테이블 집계 파이프라인
+# <prefix>_comments_raw.csv 를 청크 단위로 한 번만 읽어 <prefix>_*.csv 11종을 생성
+
+import argparse
+from collections import Counter, defaultdict
+from datetime import datetime
+from functools import partial
+
+import pandas as pd
+
+from kfantrix_cooccur import CooccurrenceMatrix, combo_counts, combo_table
+from kfantrix_decode import decode_columns
+from kfantrix_language import shared_classifier
+from kfantrix_mentions import matcher_for, prefix_of
+from kfantrix_topk import SpaceSaving
+
+# ============================================================
+# 설정
+# ============================================================
+CHUNK_SIZE = 100_000
+
+RAW_COLUMNS = [
+    'video_id', 'comment_id', 'author', 'author_id', 'text', 'likes', 'date',
+    'video_title', 'video_date', 'language', 'region',
+    'mentioned_members', 'keywords', 'raw_words'
+]
+
+# 대시보드 테이블 키 → 파일 접미사
+TABLE_FILES = {
+    'summary': 'summary',
+    'language': 'language_stats',
+    'member': 'member_stats',
+    'region_member': 'region_member',
+    'cooccurrence': 'member_cooccurrence',
+    'combos': 'member_combos',
+    'member_keywords': 'member_keywords',
+    'region_keywords': 'region_keywords',
+    'member_region_keywords': 'member_region_keywords',
+    'loyal_fans': 'loyal_fans',
+    'video_engagement': 'video_engagement'
+}
+
+# 멤버 통계의 언어 컬럼
+MEMBER_LANG_COLUMNS = {
+    'ko': 'lang_korean',
+    'en': 'lang_english',
+    'ja': 'lang_japanese',
+    'zh': 'lang_chinese'
+}
+
+# 마케팅 점수에 쓰는 키워드 카테고리
+SCORE_CATEGORIES = ['visual', 'talent', 'personality', 'love']
+
+# 팬 등급 기준 (작성 댓글 수)
+LOYAL_MIN = 2
+SUPER_MIN = 5
+MEMBER_LOYAL_MIN = 5
+MEMBER_SUPER_MIN = 10
+
+# 멤버 조합 테이블: 최소 인원, 조합 크기별 상위 개수
+COMBO_MIN = 3
+COMBO_TOP = 20
+
+# 표본이 너무 작은 국가/언어는 제외
+MIN_REGION_COMMENTS = 5
+MIN_MEMBER_REGION_COMMENTS = 10
+
+
+# ============================================================
+# 유틸
+# ============================================================
+def format_top(counter, k, with_count=True):
+    """Counter/SpaceSaving 상위 k개를 '단어(횟수), ...' 문자열로"""
+    items = counter.most_common(k)
+    if with_count:
+        return ', '.join(f'{word}({count})' for word, count in items)
+    return ', '.join(word for word, _ in items)
+
+
+# 영상별 누적 카운트 (merge 때 더하는 값) / 이전 상태에 없던 키의 기본값
+VIDEO_COUNTS = ['comment_count', 'korean', 'english', 'likes', 'mentioned']
+VIDEO_DEFAULTS = {'video_date': None, 'likes': 0, 'mentioned': 0, 'first_comment': None, 'last_comment': None}
+
+
+def new_video(row):
+    return {
+        'video_title': str(row.video_title)[:50],
+        'video_date': None if pd.isna(row.video_date) else str(row.video_date),
+        'comment_count': 0,
+        'korean': 0,
+        'english': 0,
+        'likes': 0,
+        'mentioned': 0,
+        'first_comment': None,
+        'last_comment': None,
+        'members': Counter(),
+        'keywords': SpaceSaving()
+    }
+
+
+# 카테고리별 키워드 요약 (pickle 가능하도록 lambda 대신 partial)
+category_summary = partial(defaultdict, SpaceSaving)
+
+
+def rate(part, total, digits=1):
+    return round(part / total * 100, digits) if total else 0.0
+
+
+# ============================================================
+# 집계기
+# ============================================================
+class GroupAggregator:
+    """댓글 청크를 받아 누적 집계 후 테이블 11종을 만든다.
+
+    상태는 언어/멤버/키워드/작성자 단위 카운터만 유지하므로
+    메모리는 댓글 수가 아니라 고유 작성자·어휘 수에 비례한다.
+    청크 경계를 넘는 중복 댓글을 거르기 위한 comment_id 집합은 실행 중에만 두고 저장하지 않는다.
+    """
+
+    def __init__(self, artist=None):
+        self.artist = artist
+        self.total_comments = 0
+
+        self.language_counts = Counter()
+        self.language_region = {}
+        self.region_counts = Counter()
+
+        self.author_counts = Counter()
+
+        self.members = []
+        self.member_counts = Counter()
+        self.member_lang = defaultdict(Counter)
+        self.member_authors = defaultdict(Counter)
+        self.member_keywords = defaultdict(category_summary)
+        self.member_raw_words = defaultdict(SpaceSaving)
+        self.cooccurrence = CooccurrenceMatrix()
+        # 3명 이상 조합 (트리오·유닛·완전체) → 댓글 수
+        self.combos = Counter()
+
+        self.lang_member = defaultdict(Counter)
+        self.region_keywords = defaultdict(category_summary)
+        self.region_raw_words = defaultdict(SpaceSaving)
+
+        self.member_region_counts = Counter()
+        self.member_region_scores = defaultdict(Counter)
+        self.member_region_words = defaultdict(SpaceSaving)
+
+        # 진성팬 키워드: 두 번째 댓글 전까지는 첫 댓글 키워드만 보류
+        self.loyal_keywords = defaultdict(SpaceSaving)
+        self.pending_keywords = {}
+
+        self.videos = {}
+        self.video_authors = defaultdict(set)
+
+        # 이번 실행에서 반영한 comment_id (증분 수집끼리의 중복은 워터마크가 거른다)
+        self._seen = set()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['_seen']
+        return state
+
+    def __setstate__(self, state):
+        # 영상별 좋아요·날짜·언급, 멤버 조합 누적이 없던 이전 수집 상태 (이번 수집분부터 반영)
+        self.__dict__.update(state)
+        self._seen = set()
+        self.__dict__.setdefault('combos', Counter())
+        for video in self.videos.values():
+            for key, value in VIDEO_DEFAULTS.items():
+                video.setdefault(key, value)
+
+    # -------------------- 누적 --------------------
+    def update(self, chunk):
+        """원본 댓글 청크 하나를 집계에 반영 (앞 청크에서 본 comment_id 는 건너뜀)"""
+        chunk = chunk.drop_duplicates('comment_id')
+        chunk = chunk[~chunk['comment_id'].isin(self._seen)]
+        if chunk.empty:
+            return
+        self._seen.update(chunk['comment_id'])
+        self.total_comments += len(chunk)
+
+        # 벡터화 가능한 단순 카운트
+        lang_region = chunk[['language', 'region']].fillna('unknown')
+        self.language_counts.update(lang_region['language'])
+        self.region_counts.update(lang_region['region'])
+        for lang, region in lang_region.drop_duplicates('language').itertuples(index=False):
+            self.language_region.setdefault(lang, region)
+        self.author_counts.update(chunk['author_id'])
+
+        chunk = decode_columns(chunk)
+        mentions = (chunk[['comment_id', 'mentioned_members']]
+                    .explode('mentioned_members')
+                    .dropna()
+                    .rename(columns={'mentioned_members': 'member'}))
+        self.cooccurrence.update(mentions, total_comments=len(chunk))
+        combo_counts(mentions, COMBO_MIN, self.combos)
+
+        for row in chunk.itertuples(index=False):
+            self._update_video(row)
+            members = list(dict.fromkeys(row.mentioned_members))
+            self._update_comment(row, members, row.keywords, row.raw_words)
+
+    def _update_video(self, row):
+        video = self.videos.get(row.video_id)
+        if video is None:
+            video = self.videos[row.video_id] = new_video(row)
+        video['comment_count'] += 1
+        video['korean'] += row.language == 'ko'
+        video['english'] += row.language == 'en'
+        video['likes'] += 0 if pd.isna(row.likes) else int(row.likes)
+        date = str(row.date)
+        video['first_comment'] = min(video['first_comment'] or date, date)
+        video['last_comment'] = max(video['last_comment'] or date, date)
+        self.video_authors[row.video_id].add(row.author_id)
+
+    def _update_comment(self, row, members, keywords, raw_words):
+        lang = row.language if isinstance(row.language, str) else 'unknown'
+        region = row.region if isinstance(row.region, str) else '기타'
+        words = [w for ws in keywords.values() for w in ws]
+
+        video = self.videos[row.video_id]
+        video['members'].update(members)
+        video['mentioned'] += bool(members)
+        video['keywords'].update(words)
+
+        for category, ws in keywords.items():
+            self.region_keywords[region][category].update(ws)
+        self.region_raw_words[region].update(raw_words)
+
+        for member in members:
+            if member not in self.member_counts:
+                self.members.append(member)
+            self.member_counts[member] += 1
+            self.member_lang[member][lang] += 1
+            self.lang_member[lang][member] += 1
+            for category, ws in keywords.items():
+                self.member_keywords[member][category].update(ws)
+            self.member_raw_words[member].update(raw_words)
+
+            key = (member, region)
+            self.member_region_counts[key] += 1
+            for category in SCORE_CATEGORIES:
+                self.member_region_scores[key][category] += len(keywords.get(category, []))
+            self.member_region_words[key].update(raw_words)
+
+            self._update_loyal(member, row.author_id, words)
+
+    def _update_loyal(self, member, author_id, words):
+        authors = self.member_authors[member]
+        authors[author_id] += 1
+        count = authors[author_id]
+        if count == 1:
+            if words:
+                self.pending_keywords[(member, author_id)] = words
+            return
+        if count == LOYAL_MIN:
+            self.loyal_keywords[member].update(self.pending_keywords.pop((member, author_id), []))
+        self.loyal_keywords[member].update(words)
+
+    # -------------------- 병합 --------------------
+    def merge(self, other):
+        """다른 집계기(다른 영상 shard/청크)의 부분 집계 합치기"""
+        self.total_comments += other.total_comments
+        self._seen |= other._seen
+        self.language_counts.update(other.language_counts)
+        self.region_counts.update(other.region_counts)
+        for lang, region in other.language_region.items():
+            self.language_region.setdefault(lang, region)
+        self.author_counts.update(other.author_counts)
+
+        for member in other.members:
+            if member not in self.member_counts:
+                self.members.append(member)
+        self.member_counts.update(other.member_counts)
+        self.member_region_counts.update(other.member_region_counts)
+        self.cooccurrence.merge(other.cooccurrence)
+        self.combos.update(other.combos)
+        for mine, theirs in [(self.member_lang, other.member_lang),
+                             (self.lang_member, other.lang_member),
+                             (self.member_region_scores, other.member_region_scores)]:
+            for key, counter in theirs.items():
+                mine[key].update(counter)
+        for mine, theirs in [(self.member_raw_words, other.member_raw_words),
+                             (self.region_raw_words, other.region_raw_words),
+                             (self.member_region_words, other.member_region_words),
+                             (self.loyal_keywords, other.loyal_keywords)]:
+            for key, summary in theirs.items():
+                mine[key].merge(summary)
+        for mine, theirs in [(self.member_keywords, other.member_keywords),
+                             (self.region_keywords, other.region_keywords)]:
+            for key, categories in theirs.items():
+                for category, summary in categories.items():
+                    mine[key][category].merge(summary)
+
+        # 진성팬 키워드: 양쪽 합쳐 두 번째 댓글이 되는 작성자의 보류 키워드를 반영
+        for member, authors in other.member_authors.items():
+            mine = self.member_authors[member]
+            for author_id, count in authors.items():
+                key = (member, author_id)
+                before = mine[author_id]
+                mine[author_id] += count
+                if before and mine[author_id] >= LOYAL_MIN:
+                    for pending in [self.pending_keywords.pop(key, None), other.pending_keywords.get(key)]:
+                        if pending:
+                            self.loyal_keywords[member].update(pending)
+                elif key in other.pending_keywords:
+                    self.pending_keywords[key] = other.pending_keywords[key]
+
+        for video_id, video in other.videos.items():
+            mine = self.videos.get(video_id)
+            if mine is None:
+                self.videos[video_id] = video
+            else:
+                for col in VIDEO_COUNTS:
+                    mine[col] += video[col]
+                dates = [d for d in (mine['first_comment'], video['first_comment']) if d]
+                mine['first_comment'] = min(dates, default=None)
+                dates = [d for d in (mine['last_comment'], video['last_comment']) if d]
+                mine['last_comment'] = max(dates, default=None)
+                mine['members'].update(video['members'])
+                mine['keywords'].merge(video['keywords'])
+            self.video_authors[video_id] |= other.video_authors[video_id]
+        return self
+
+    # -------------------- 결과 테이블 --------------------
+    def finalize(self, collected_at=None):
+        """누적 상태로 대시보드와 같은 키의 테이블 dict 생성"""
+        collected_at = collected_at or datetime.now().strftime('%Y-%m-%d %H:%M')
+        return {
+            'summary': self._summary(collected_at),
+            'language': self._language(),
+            'member': self._member(),
+            'region_member': self._region_member(),
+            'cooccurrence': self._cooccurrence(),
+            'combos': self._combos(),
+            'member_keywords': self._member_keywords(),
+            'region_keywords': self._region_keywords(),
+            'member_region_keywords': self._member_region_keywords(),
+            'loyal_fans': self._loyal_fans(),
+            'video_engagement': self._video_engagement()
+        }
+
+    def _summary(self, collected_at):
+        counts = pd.Series(self.author_counts, dtype='int64')
+        row = {
+            'collected_at': collected_at,
+            'total_comments': self.total_comments,
+            'total_videos': len(self.videos),
+            'unique_authors': len(counts),
+            'loyal_fan_rate': rate((counts >= LOYAL_MIN).sum(), len(counts), 2),
+            'super_fan_rate': rate((counts >= SUPER_MIN).sum(), len(counts), 2)
+        }
+        if self.artist:
+            row = {'artist': self.artist, **row}
+        return pd.DataFrame([row])
+
+    def _language(self):
+        rows = [
+            {'language': lang, 'region': self.language_region[lang], 'count': count,
+             'percentage': rate(count, self.total_comments, 2)}
+            for lang, count in self.language_counts.most_common()
+        ]
+        return pd.DataFrame(rows, columns=['language', 'region', 'count', 'percentage'])
+
+    def _member(self):
+        rows = []
+        for member in self.members:
+            langs = self.member_lang[member]
+            fans = self.member_authors[member]
+            loyal = sum(1 for c in fans.values() if c >= LOYAL_MIN)
+            row = {
+                'member': member,
+                'mention_count': self.member_counts[member],
+                'mention_rate': rate(self.member_counts[member], self.total_comments, 2)
+            }
+            for lang, col in MEMBER_LANG_COLUMNS.items():
+                row[col] = langs[lang]
+            row['lang_other'] = sum(c for lang, c in langs.items() if lang not in MEMBER_LANG_COLUMNS)
+            row['loyal_fans'] = loyal
+            row['loyal_fan_rate'] = rate(loyal, len(fans), 2)
+            rows.append(row)
+        return pd.DataFrame(rows)
+
+    def _region_member(self):
+        rows = []
+        for lang, total in self.language_counts.items():
+            if total < MIN_REGION_COMMENTS or lang == 'unknown':
+                continue
+            top = self.lang_member[lang].most_common(1)
+            rows.append({
+                'language': lang,
+                'region': self.language_region[lang],
+                'total_comments': total,
+                'top_member': top[0][0] if top else '',
+                'top_member_count': top[0][1] if top else 0
+            })
+        return pd.DataFrame(rows, columns=['language', 'region', 'total_comments',
+                                           'top_member', 'top_member_count'])
+
+    def _cooccurrence(self):
+        return self.cooccurrence.top_pairs()
+
+    def _combos(self):
+        return combo_table(self.combos, COMBO_TOP)
+
+    def _member_keywords(self):
+        rows = []
+        for member in self.members:
+            kw = self.member_keywords[member]
+            rows.append({
+                'member': member,
+                'top_visual': format_top(kw['visual'], 5),
+                'top_talent': format_top(kw['talent'], 5),
+                'top_personality': format_top(kw['personality'], 5),
+                'top_love': format_top(kw['love'], 5),
+                'top_raw_words': format_top(self.member_raw_words[member], 10),
+                'total_keywords': sum(c.total for c in kw.values())
+            })
+        return pd.DataFrame(rows)
+
+    def _region_keywords(self):
+        rows = []
+        for region, count in self.region_counts.most_common():
+            kw = self.region_keywords[region]
+            rows.append({
+                'region': region,
+                'top_visual': format_top(kw['visual'], 5),
+                'top_talent': format_top(kw['talent'], 5),
+                'top_love': format_top(kw['love'], 5),
+                'top_raw_words': format_top(self.region_raw_words[region], 10),
+                'comment_count': count
+            })
+        return pd.DataFrame(rows)
+
+    def _member_region_keywords(self):
+        rows = []
+        for member in self.members:
+            for (m, region), count in self.member_region_counts.most_common():
+                if m != member or count < MIN_MEMBER_REGION_COMMENTS:
+                    continue
+                scores = self.member_region_scores[(member, region)]
+                rows.append({
+                    'member': member,
+                    'region': region,
+                    'comment_count': count,
+                    'top_category': max(SCORE_CATEGORIES, key=lambda c: scores[c]),
+                    **{f'{c}_score': scores[c] for c in SCORE_CATEGORIES},
+                    'top_words': format_top(self.member_region_words[(member, region)], 5, with_count=False)
+                })
+        return pd.DataFrame(rows)
+
+    def _loyal_fans(self):
+        rows = []
+        for member in self.members:
+            counts = pd.Series(self.member_authors[member], dtype='int64')
+            total = len(counts)
+            casual = int((counts < LOYAL_MIN).sum())
+            regular = int(((counts >= LOYAL_MIN) & (counts < MEMBER_LOYAL_MIN)).sum())
+            loyal = int(((counts >= MEMBER_LOYAL_MIN) & (counts < MEMBER_SUPER_MIN)).sum())
+            super_fans = int((counts >= MEMBER_SUPER_MIN).sum())
+            rows.append({
+                'member': member,
+                'total_fans': total,
+                'casual_fans': casual, 'casual_rate': rate(casual, total),
+                'regular_fans': regular, 'regular_rate': rate(regular, total),
+                'loyal_fans': loyal, 'loyal_rate': rate(loyal, total),
+                'super_fans': super_fans, 'super_fan_rate': rate(super_fans, total),
+                'loyal_fan_keywords': format_top(self.loyal_keywords[member], 10)
+            })
+        return pd.DataFrame(rows)
+
+    def _video_engagement(self):
+        rows = []
+        for video_id, video in self.videos.items():
+            top = video['members'].most_common(1)
+            total = video['comment_count']
+            rows.append({
+                'video_id': video_id,
+                'video_title': video['video_title'],
+                'comment_count': total,
+                'unique_authors': len(self.video_authors[video_id]),
+                'korean_rate': rate(video['korean'], total),
+                'english_rate': rate(video['english'], total),
+                'top_member': top[0][0] if top else '',
+                'top_member_count': top[0][1] if top else 0,
+                'top_keywords': format_top(video['keywords'], 5, with_count=False),
+                'video_date': video['video_date'],
+                'total_likes': video['likes'],
+                'avg_likes': round(video['likes'] / total, 1) if total else 0.0,
+                'mention_rate': rate(video['mentioned'], total),
+                'first_comment': video['first_comment'],
+                'last_comment': video['last_comment']
+            })
+        return pd.DataFrame(rows)
+
+
+# ============================================================
+# 실행
+# ============================================================
+def iter_raw_chunks(path, chunksize=CHUNK_SIZE, prefix=None, rematch=True, classify=True, select=None):
+    """원본 댓글 CSV를 청크 단위로 스트리밍.
+
+    그룹 별칭 사전이 있으면 (prefix 기본값은 파일 이름) 본문에서 멤버 언급을 다시 찾고,
+    language 가 비어 있는 댓글(언어 분류 없이 수집한 덤프 포함)은 언어/지역을 분류해 채운다.
+    select(chunk) 를 주면 분류·매칭 전에 처리할 행만 남기고, 남은 행이 없는 청크는 건너뛴다.
+    """
+    reader = pd.read_csv(path, chunksize=chunksize, usecols=lambda c: c in RAW_COLUMNS,
+                         dtype={'likes': 'Int64'}, encoding='utf-8-sig')
+    matcher = matcher_for(prefix or prefix_of(path)) if rematch else None
+    classifier = shared_classifier() if classify else None
+    for chunk in reader:
+        chunk = chunk.reindex(columns=RAW_COLUMNS)
+        if select is not None:
+            chunk = select(chunk)
+            if chunk.empty:
+                continue
+        if classifier is not None:
+            chunk = classifier.annotate(chunk)
+        if matcher is not None:
+            chunk = matcher.annotate(chunk)
+        yield chunk
+
+
+def aggregate_raw(path, artist=None, chunksize=CHUNK_SIZE, prefix=None):
+    """원본 댓글 파일 하나를 단일 패스로 집계"""
+    agg = GroupAggregator(artist=artist)
+    for chunk in iter_raw_chunks(path, chunksize, prefix):
+        agg.update(chunk)
+    return agg
+
+
+def write_tables(tables, prefix, out_dir='.'):
+    """테이블 dict를 <prefix>_*.csv 로 저장"""
+    for key, suffix in TABLE_FILES.items():
+        tables[key].to_csv(f'{out_dir}/{prefix}_{suffix}.csv', index=False, encoding='utf-8-sig')
+
+
+def build_tables(prefix, raw_path=None, out_dir='.', artist=None, chunksize=CHUNK_SIZE):
+    """<prefix>_comments_raw.csv → <prefix>_*.csv 11종"""
+    raw_path = raw_path or f'{out_dir}/{prefix}_comments_raw.csv'
+    tables = aggregate_raw(raw_path, artist=artist, chunksize=chunksize, prefix=prefix).finalize()
+    write_tables(tables, prefix, out_dir)
+    return tables
+
+
+def main():
+    parser = argparse.ArgumentParser(description='원본 댓글로 심층 분석 CSV 생성')
+    parser.add_argument('prefix', help='그룹 prefix (예: plave)')
+    parser.add_argument('--raw', help='원본 댓글 CSV 경로 (기본: <prefix>_comments_raw.csv)')
+    parser.add_argument('--out-dir', default='.')
+    parser.add_argument('--artist', help='summary 에 기록할 아티스트명')
+    parser.add_argument('--chunksize', type=int, default=CHUNK_SIZE)
+    args = parser.parse_args()
+
+    tables = build_tables(args.prefix, args.raw, args.out_dir, args.artist, args.chunksize)
+    summary = tables['summary'].iloc[0]
+    print(f"✅ {args.prefix}: 댓글 {summary['total_comments']:,}개 → {len(TABLE_FILES)}개 테이블 생성")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,203 @@
+# kfantrix_profile.py - 대시보드 페이지 렌더링 프로파일링 (opt-in)
+# 실행(rerun) 한 번마다 구간별 시간(과 선택적으로 메모리)을 기록한다.
+#   load      테이블/인덱스 로드
+#   transform 필터·키워드·검색 등 pandas 변환
+#   figure    그림 가져오기 (공유 그림 캐시 적중이면 조회만, 없으면 전처리 + 그림 생성)
+#   send      위젯 직렬화·전송 (st.plotly_chart 등)
+# 꺼져 있으면 section() 은 아무것도 하지 않는다.
+#
+# 켜기: 서버 환경 변수 KFANTRIX_PROFILE=1 (URL 로는 켤 수 없음). 시간은 tracemalloc 없이 잰다.
+# 메모리: KFANTRIX_PROFILE_MEMORY=1 을 함께 주면 tracemalloc 으로 구간별 최대 증가량도 잰다.
+#   tracemalloc 은 프로세스 전체 기준이라 동시에 도는 다른 세션(스레드)의 할당이 섞이고
+#   모든 할당이 느려지므로 혼자 쓰는 디버그 서버에서만 켠다 (기록에 memory=true 로 남는다).
+# 로그: $KFANTRIX_PROFILE_LOG (기본 store/profile/profile.jsonl), 실행 1회 = JSON 한 줄
+
+import argparse
+import json
+import os
+import threading
+import time
+import tracemalloc
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+from kfantrix_store import STORE_DIR
+
+PROFILE_ENV = 'KFANTRIX_PROFILE'
+MEMORY_ENV = 'KFANTRIX_PROFILE_MEMORY'
+LOG_ENV = 'KFANTRIX_PROFILE_LOG'
+MAX_RUNS = 1000
+SECTION_KINDS = ['load', 'transform', 'figure', 'send']
+
+
+def env_enabled(name=PROFILE_ENV):
+    return os.environ.get(name, '').lower() in ('1', 'true', 'yes')
+
+
+def memory_enabled():
+    """메모리 측정 (프로파일링이 켜져 있고 KFANTRIX_PROFILE_MEMORY 도 켜졌을 때만)"""
+    return env_enabled() and env_enabled(MEMORY_ENV)
+
+
+def default_log_path():
+    return os.environ.get(LOG_ENV) or os.path.join(STORE_DIR, 'profile', 'profile.jsonl')
+
+
+# ============================================================
+# 실행 1회 프로파일
+# ============================================================
+class Profiler:
+    """구간 타이머. memory=True 면 tracemalloc 기준 구간 안 최대 증가량(KB)도 잰다.
+
+    메모리 값은 프로세스 전체 기준이라 다른 세션의 할당이 섞일 수 있다 (모듈 설명 참고).
+    구간이 중첩되면(그림 생성 중 테이블 로드 등) 바깥 구간 시간은 안쪽을 포함하고,
+    안쪽 구간이 최대값을 초기화하기 전에 바깥 구간들의 최대값을 먼저 갱신해 둔다.
+    """
+
+    def __init__(self, enabled=False, memory=False):
+        self.enabled = enabled
+        self.memory = enabled and memory
+        self.run_id = uuid.uuid4().hex[:12]
+        self.started = time.perf_counter()
+        self.sections = []
+        self._stack = []
+        if self.memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def _bump_peaks(self):
+        _, peak = tracemalloc.get_traced_memory()
+        for frame in self._stack:
+            frame['peak'] = max(frame['peak'], peak)
+
+    @contextmanager
+    def section(self, kind, name=''):
+        if not self.enabled:
+            yield
+            return
+        tracing = self.memory and tracemalloc.is_tracing()
+        frame = {'base': 0, 'peak': 0}
+        if tracing:
+            self._bump_peaks()
+            frame['base'] = frame['peak'] = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+        self._stack.append(frame)
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            if tracing:
+                self._bump_peaks()
+            self._stack.pop()
+            self.sections.append({
+                'kind': kind,
+                'name': str(name),
+                'ms': round(elapsed * 1000, 2),
+                'peak_kb': round((frame['peak'] - frame['base']) / 1024, 1) if tracing else None
+            })
+
+    def record(self, session='', **context):
+        """이번 실행 기록 (dict, JSON 직렬화 가능)"""
+        return {
+            'ts': datetime.now(timezone.utc).isoformat(),
+            'run': self.run_id,
+            'session': session,
+            'memory': self.memory,
+            **context,
+            'total_ms': round((time.perf_counter() - self.started) * 1000, 2),
+            'sections': self.sections
+        }
+
+
+# ============================================================
+# 실행 기록 모음
+# ============================================================
+class RunLog:
+    """최근 실행 기록 (프로세스 메모리) + JSONL 파일 추가 기록"""
+
+    def __init__(self, path=None, maxlen=MAX_RUNS):
+        self.path = path or default_log_path()
+        self.runs = deque(maxlen=maxlen)
+        self._lock = threading.Lock()
+
+    def add(self, run):
+        line = json.dumps(run, ensure_ascii=False)
+        with self._lock:
+            self.runs.append(run)
+            try:
+                os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+                with open(self.path, 'a', encoding='utf-8') as f:
+                    f.write(line + '\n')
+            except OSError:
+                # 로그 파일을 못 쓰면 메모리 기록만 유지
+                pass
+
+    def recent(self):
+        with self._lock:
+            return list(self.runs)
+
+
+def read_log(paths):
+    """JSONL 로그 파일들 → 실행 기록 목록 (깨진 줄은 건너뜀)"""
+    runs = []
+    for path in paths:
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    runs.append(json.loads(line))
+                except json.JSONDecodeError:
+                    continue
+    return runs
+
+
+def page_of(run):
+    return ' / '.join(str(run[k]) for k in ('mode', 'group', 'menu') if run.get(k))
+
+
+def summarize(runs):
+    """(페이지, 구간 종류, 이름) 별 횟수·p50·p99·최대 (ms) 와 최대 메모리 (KB)"""
+    rows = []
+    for run in runs:
+        page = page_of(run)
+        rows.append({'page': page, 'kind': 'total', 'name': '', 'ms': run['total_ms'], 'peak_kb': None})
+        for s in run['sections']:
+            rows.append({'page': page, **s})
+    if not rows:
+        return pd.DataFrame(columns=['page', 'kind', 'name', 'count', 'p50_ms', 'p99_ms', 'max_ms', 'peak_kb'])
+    df = pd.DataFrame(rows)
+    grouped = df.groupby(['page', 'kind', 'name'], sort=False)
+    result = grouped['ms'].agg(
+        count='size',
+        p50_ms=lambda x: np.percentile(x, 50),
+        p99_ms=lambda x: np.percentile(x, 99),
+        max_ms='max'
+    )
+    result['peak_kb'] = grouped['peak_kb'].max()
+    return result.round(2).reset_index().sort_values(['page', 'p99_ms'], ascending=[True, False])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='프로파일 로그 집계 (페이지·구간별 p50/p99)')
+    parser.add_argument('logs', nargs='*', help=f'JSONL 로그 (기본: {default_log_path()})')
+    parser.add_argument('--page', help='페이지 이름 일부로 필터')
+    parser.add_argument('--csv', help='결과 CSV 저장 경로')
+    args = parser.parse_args()
+
+    runs = read_log(args.logs or [default_log_path()])
+    if args.page:
+        runs = [r for r in runs if args.page in page_of(r)]
+    df = summarize(runs)
+    if args.csv:
+        df.to_csv(args.csv, index=False, encoding='utf-8-sig')
+    with pd.option_context('display.width', 200, 'display.max_rows', 200):
+        print(df.to_string(index=False))
+    print(f'\n실행 {len(runs)}회')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,294 @@
+# kfantrix_report.py - 그룹별 정기 리포트 (헤드리스)
+# 대시보드 심층 분석 페이지와 같은 그림(kfantrix_figures)을 정적 HTML 로 렌더링.
+# 그림 조각은 (그룹, 데이터 버전) 별로 한 번만 만들어 저장소에 두고,
+# 고객별 리포트는 프로세스 풀에서 조각을 조립만 한다.
+#
+# store/<prefix>/reports/<version>/<figure>.html (+ .png)   그림 조각 캐시
+# <out_dir>/<client>/<prefix>_report.html   (<client> 는 고객 이름에서 파일명에 못 쓰는 문자를 '_' 로 바꾼 것)
+
+import argparse
+import html
+import importlib.util
+import json
+import os
+import re
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+
+from plotly.offline import get_plotlyjs, get_plotlyjs_version
+
+import kfantrix_figures as figures
+from kfantrix_cache import SharedTableCache, load_table, table_source
+from kfantrix_export import version_tag
+from kfantrix_figcache import group_version
+from kfantrix_insight import CATEGORY_LABELS, GROUP_PREFIXES, load_insights
+from kfantrix_pipeline import TABLE_FILES
+from kfantrix_store import STORE_DIR, group_dir
+
+REPORT_DIR = 'reports'
+GROUP_NAMES = {'plave': 'PLAVE', 'nmixx': 'NMIXX', 'skz': 'Stray Kids'}
+PAGES = {
+    'summary': '📊 전체 요약',
+    'chemistry': '💑 멤버 케미',
+    'loyal': '💜 진성팬 분석',
+    'marketing': '🎯 마케팅 인사이트'
+}
+PLOTLY_JS = 'plotly.min.js'
+# 조각은 설치된 plotly 가 만들므로 CDN 도 같은 plotly.js 버전을 쓴다 (버전이 다르면 bdata 등을 못 읽음)
+PLOTLY_CDN = f'https://cdn.plot.ly/plotly-{get_plotlyjs_version()}.min.js'
+
+
+def images_available():
+    """PNG 렌더링 가능 여부 (kaleido 설치 시)"""
+    return importlib.util.find_spec('kaleido') is not None
+
+
+def default_out_dir(today=None):
+    """주간 리포트 폴더 (reports/<ISO 연도>-W<주>)"""
+    year, week, _ = (today or date.today()).isocalendar()
+    return os.path.join(REPORT_DIR, f'{year}-W{week:02d}')
+
+
+def load_clients(path=None):
+    """고객 설정 [{name, groups, pages}] (없으면 전체 그룹·전체 페이지 기본 고객 하나)"""
+    if path is None:
+        return [{'name': 'default'}]
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def client_dir_name(name):
+    """고객 이름 → 출력 폴더 이름 (경로 구분자·특수문자는 '_', 앞뒤 '.' 제거)"""
+    safe = re.sub(r'[^\w.-]', '_', str(name)).strip('.')
+    if not safe:
+        raise ValueError(f'고객 이름으로 폴더를 만들 수 없습니다: {name!r}')
+    return safe
+
+
+def check_clients(clients):
+    """고객 설정 검증 (알 수 없는 페이지·그룹, 폴더 이름이 겹치는 고객이면 ValueError)"""
+    dirs = {}
+    for client in clients:
+        unknown = set(client.get('pages') or []) - set(PAGES)
+        if unknown:
+            raise ValueError(f"{client['name']}: 알 수 없는 페이지 {sorted(unknown)} (가능: {list(PAGES)})")
+        unknown = set(client.get('groups') or []) - set(GROUP_PREFIXES)
+        if unknown:
+            raise ValueError(f"{client['name']}: 알 수 없는 그룹 {sorted(unknown)} (가능: {GROUP_PREFIXES})")
+        folder = client_dir_name(client['name'])
+        if folder in dirs:
+            raise ValueError(f"{client['name']}: 출력 폴더 '{folder}' 가 {dirs[folder]} 와 겹칩니다")
+        dirs[folder] = client['name']
+
+
+# ============================================================
+# 그림 조각
+# ============================================================
+def figure_specs(tables):
+    """(페이지, 이름, 제목, 생성 함수) 목록 - 대시보드 페이지와 같은 그림"""
+    specs = []
+    if tables['language'] is not None:
+        specs.append(('summary', 'language', '🌐 언어 분포', lambda: figures.language(tables['language'])))
+    if tables['member'] is not None:
+        specs.append(('summary', 'member_mentions', '👥 멤버 언급 비율',
+                      lambda: figures.member_mentions(tables['member'])))
+    cooc = tables['cooccurrence']
+    if cooc is not None and len(cooc) > 0:
+        specs.append(('chemistry', 'cooc_rank', '동시 언급 순위', lambda: figures.cooc_rank(cooc)))
+        if tables['member'] is not None and tables['summary'] is not None:
+            total = tables['summary'].iloc[0]['total_comments']
+            specs.append(('chemistry', 'cooc_heatmap', '케미 히트맵',
+                          lambda: figures.cooc_heatmap(tables['member'], cooc, total)))
+    if tables['loyal_fans'] is not None:
+        df_lf = tables['loyal_fans']
+        specs.append(('loyal', 'fan_tiers', '멤버별 팬 등급 분포', lambda: figures.fan_tiers(df_lf)))
+        specs.append(('loyal', 'loyal_rate', '진성팬 비율', lambda: figures.loyal_rate(df_lf)))
+        specs.append(('loyal', 'super_rate', '슈퍼팬 비율', lambda: figures.super_rate(df_lf)))
+    df_mrk = tables['member_region_keywords']
+    if df_mrk is not None:
+        for i, region in enumerate(df_mrk['region'].astype(str).unique()):
+            df_region = df_mrk[df_mrk['region'].astype(str) == region].sort_values('comment_count', ascending=False)
+            specs.append(('marketing', f'region_members_{i}', f'{region} 멤버별 인기도',
+                          lambda d=df_region, r=region: figures.region_members(d, r)))
+            specs.append(('marketing', f'region_categories_{i}', f'{region} 반응 카테고리',
+                          lambda d=df_region: figures.region_categories(figures.category_totals(d))))
+        specs.append(('marketing', 'member_region_heatmap', '📊 멤버×국가 히트맵',
+                      lambda: figures.member_region_heatmap(df_mrk)))
+    return specs
+
+
+def _write(path, content, mode='w'):
+    tmp = f'{path}.{os.getpid()}.tmp'
+    with open(tmp, mode, **({'encoding': 'utf-8'} if 'b' not in mode else {})) as f:
+        f.write(content)
+    os.replace(tmp, path)
+
+
+def render_fragments(prefix, store_dir=STORE_DIR, src_dir='.', images=False):
+    """그룹 하나의 그림 조각을 (데이터 버전별로 한 번만) 렌더링 (워커 프로세스에서 실행).
+
+    반환값은 {'dir', 'figures': [(페이지, 이름, 제목)], 'context'} 이고,
+    그룹 데이터가 없으면 None.
+    """
+    cache = SharedTableCache()
+    tables = {key: load_table(prefix, key, table_source(prefix, key, store_dir, src_dir)[0],
+                              cache, store_dir, src_dir) for key in TABLE_FILES}
+    if tables['summary'] is None:
+        return None
+
+    folder = os.path.join(group_dir(prefix, store_dir), REPORT_DIR, version_tag(group_version(prefix, store_dir, src_dir)))
+    os.makedirs(folder, exist_ok=True)
+    root = os.path.dirname(folder)
+    for name in os.listdir(root):
+        if os.path.join(root, name) != folder:
+            shutil.rmtree(os.path.join(root, name), ignore_errors=True)
+
+    specs = figure_specs(tables)
+    for page, name, title, build in specs:
+        path = os.path.join(folder, f'{name}.html')
+        png = os.path.join(folder, f'{name}.png')
+        if os.path.exists(path) and (not images or os.path.exists(png)):
+            continue
+        fig = build()
+        _write(path, fig.to_html(full_html=False, include_plotlyjs=False))
+        if images:
+            _write(png, fig.to_image(format='png'), 'wb')
+    return {'dir': folder, 'figures': [spec[:3] for spec in specs],
+            'context': report_context(prefix, tables, store_dir, src_dir)}
+
+
+def report_context(prefix, tables, store_dir=STORE_DIR, src_dir='.'):
+    """리포트 본문 텍스트용 값 (요약 지표, 케미 TOP 3, 지역별 추천)"""
+    summary = tables['summary'].iloc[0]
+    cooc = tables['cooccurrence']
+    insights = load_insights(GROUP_PREFIXES, store_dir, src_dir)
+    insights = insights[insights['group'] == prefix]
+    return {
+        'metrics': [
+            ('총 댓글', f"{int(summary['total_comments']):,}개"),
+            ('분석 영상', f"{int(summary['total_videos'])}개"),
+            ('고유 작성자', f"{int(summary['unique_authors']):,}명"),
+            ('진성팬 비율', f"{summary['loyal_fan_rate']}%"),
+            ('슈퍼팬 비율', f"{summary['super_fan_rate']}%")
+        ],
+        'top_pairs': [] if cooc is None else [(r['pair'], int(r['count'])) for _, r in cooc.head(3).iterrows()],
+        'regions': [
+            (r['region'], r['recommended_member'], int(r['member_comments']),
+             CATEGORY_LABELS[r['top_category']], float(r['member_stability']))
+            for _, r in insights.iterrows()
+        ]
+    }
+
+
+# ============================================================
+# 리포트 조립
+# ============================================================
+def build_report(prefix, client, fragments, out_path, plotlyjs='cdn', images=False):
+    """조각을 읽어 고객용 HTML 리포트 하나를 쓴다"""
+    pages = client.get('pages') or list(PAGES)
+    context = fragments['context']
+    esc = html.escape
+    body = [f"<h1>{esc(GROUP_NAMES.get(prefix, prefix))} 주간 리포트</h1>",
+            f"<p class='meta'>{esc(client['name'])} · {date.today().isoformat()}</p>"]
+
+    for page in pages:
+        body.append(f'<h2>{esc(PAGES[page])}</h2>')
+        if page == 'summary':
+            body.append('<div class="metrics">' + ''.join(
+                f'<div><span>{esc(label)}</span><strong>{esc(value)}</strong></div>'
+                for label, value in context['metrics']) + '</div>')
+        if page == 'chemistry' and context['top_pairs']:
+            body.append('<p>인기 케미 TOP 3: ' + ', '.join(
+                f'{esc(str(pair))} ({count}회)' for pair, count in context['top_pairs']) + '</p>')
+        if page == 'marketing' and context['regions']:
+            body.append('<ul>' + ''.join(
+                f'<li><strong>{esc(region)}</strong>: {esc(member)} (언급 {count}회, 안정도 {stab:.0%}) · {esc(cat)} 중심 콘텐츠</li>'
+                for region, member, count, cat, stab in context['regions']) + '</ul>')
+        for fig_page, name, title in fragments['figures']:
+            if fig_page != page:
+                continue
+            if images:
+                shutil.copyfile(os.path.join(fragments['dir'], f'{name}.png'),
+                                os.path.join(os.path.dirname(out_path), f'{prefix}_{name}.png'))
+            with open(os.path.join(fragments['dir'], f'{name}.html'), encoding='utf-8') as f:
+                body.append(f'<h3>{esc(title)}</h3>' + f.read())
+
+    script = (f'<script src="{PLOTLY_CDN}"></script>' if plotlyjs == 'cdn'
+              else f'<script src="{PLOTLY_JS}"></script>')
+    _write(out_path, f"""<!DOCTYPE html>
+<html lang="ko"><head><meta charset="utf-8">
+<title>KFANTRIX {esc(GROUP_NAMES.get(prefix, prefix))} 리포트</title>
+{script}
+<style>
+body {{ font-family: sans-serif; max-width: 1100px; margin: 2rem auto; color: #222; }}
+h1 {{ color: #9C27B0; }} .meta {{ color: #888; }}
+.metrics {{ display: flex; gap: 1rem; }}
+.metrics div {{ flex: 1; padding: .8rem; border-radius: 8px; background: #F3E5F5; }}
+.metrics span {{ display: block; font-size: .8rem; color: #666; }}
+</style></head>
+<body>
+{chr(10).join(body)}
+<p class="meta">© KFANTRIX - K-pop 팬덤 데이터로 글로벌 마케팅 성공률을 높이다</p>
+</body></html>
+""")
+    return out_path
+
+
+def run_reports(clients, out_dir=None, store_dir=STORE_DIR, src_dir='.', workers=None,
+                plotlyjs='cdn', images=False):
+    """고객 × 그룹 리포트 일괄 생성. 반환값은 생성된 리포트 경로 목록.
+
+    1단계: 필요한 그룹의 그림 조각을 그룹마다 병렬 렌더링 (버전이 같으면 재사용)
+    2단계: (고객, 그룹) 리포트를 병렬 조립
+    """
+    check_clients(clients)
+    out_dir = out_dir or default_out_dir()
+    images = images and images_available()
+    prefixes = list(dict.fromkeys(p for c in clients for p in (c.get('groups') or GROUP_PREFIXES)))
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        rendered = dict(zip(prefixes, pool.map(render_fragments, prefixes, [store_dir] * len(prefixes),
+                                               [src_dir] * len(prefixes), [images] * len(prefixes))))
+        jobs = []
+        for client in clients:
+            client_dir = os.path.join(out_dir, client_dir_name(client['name']))
+            os.makedirs(client_dir, exist_ok=True)
+            if plotlyjs == 'directory' and not os.path.exists(os.path.join(client_dir, PLOTLY_JS)):
+                _write(os.path.join(client_dir, PLOTLY_JS), get_plotlyjs())
+            for prefix in client.get('groups') or GROUP_PREFIXES:
+                if rendered[prefix] is None:
+                    continue
+                jobs.append(pool.submit(build_report, prefix, client, rendered[prefix],
+                                        os.path.join(client_dir, f'{prefix}_report.html'), plotlyjs, images))
+        return [job.result() for job in jobs]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='그룹별 정기 리포트 생성 (cron 등에서 실행)')
+    parser.add_argument('--clients', help='고객 설정 JSON [{"name", "groups", "pages"}]')
+    parser.add_argument('--out-dir', help='출력 경로 (기본: reports/<연도>-W<주>)')
+    parser.add_argument('--store-dir', default=STORE_DIR)
+    parser.add_argument('--src-dir', default='.')
+    parser.add_argument('--workers', type=int, help='프로세스 수 (기본: CPU 코어 수)')
+    parser.add_argument('--plotlyjs', default='cdn', choices=['cdn', 'directory'],
+                        help="plotly.js 위치 ('directory' 면 고객 폴더에 한 번 복사, 오프라인 열람용)")
+    parser.add_argument('--images', action='store_true', help='그림 PNG 도 저장 (kaleido 필요)')
+    args = parser.parse_args()
+
+    if args.images and not images_available():
+        print('⚠️ kaleido 가 없어 PNG 는 건너뜁니다 (pip install kaleido)')
+    clients = load_clients(args.clients)
+    try:
+        check_clients(clients)
+    except ValueError as e:
+        parser.error(str(e))
+    started = time.time()
+    paths = run_reports(clients, args.out_dir, args.store_dir, args.src_dir,
+                        args.workers, args.plotlyjs, args.images)
+    print(f'✅ 리포트 {len(paths)}개 ({time.time() - started:.1f}초)')
+
+
+if __name__ == '__main__':
+    main()
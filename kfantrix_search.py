@@ -0,0 +1,513 @@
+# kfantrix_search.py - 원본 댓글 역색인 (키워드 → 댓글 드릴다운)
+# raw_words / keywords 를 키워드별 posting 으로 저장하고 메모리 맵으로 조회.
+# 수집할 때마다 세그먼트가 하나씩 추가되며 조회는 모든 세그먼트를 합친다.
+# 세그먼트는 <segment>.pending 에 쓰고, 수집 상태까지 저장된 뒤 commit() 으로 이름을 바꿔야 조회된다.
+# 수집 후 compact() 가 크기 등급(docs 수의 log4)이 같은 세그먼트 4개를 하나로 병합해 개수를 로그 수준으로 유지한다.
+#
+# store/<prefix>/search/<segment>/
+#   meta.json      members (멤버 bit 순서), docs 수, merged (병합으로 대체한 세그먼트 이름)
+#   docs.arrow     doc 순서의 comment_id, video_id, date, region, members(bitmask), likes, author, text
+#   terms.arrow    정렬된 term 과 postings 구간 (offset, count)
+#   postings.arrow term 순서로 정렬된 doc id
+#   forward.arrow  doc 순서로 정렬된 term id (연관 키워드 계산용)
+
+import argparse
+import bisect
+import json
+import os
+import shutil
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+
+from kfantrix_decode import decode_list, explode_keywords, explode_list
+from kfantrix_pipeline import CHUNK_SIZE, iter_raw_chunks
+from kfantrix_store import STORE_DIR, group_dir
+
+SEARCH_DIR = 'search'
+DOC_COLUMNS = ['comment_id', 'video_id', 'date', 'region', 'likes', 'author', 'text']
+NARROW_COLUMNS = ['video_id', 'date', 'region', 'members', 'likes']
+MAX_MEMBERS = 63  # members bitmask 는 int64
+PENDING_SUFFIX = '.pending'
+DROPPED_SUFFIX = '.dropped'
+MERGE_FACTOR = 4  # 같은 등급 세그먼트가 이만큼 모이면 병합
+
+
+def normalize_term(term):
+    return str(term).strip().lower()
+
+
+# ============================================================
+# 세그먼트 생성
+# ============================================================
+class SegmentWriter:
+    """청크를 받아 세그먼트 하나를 만든다. docs 는 청크마다 바로 디스크에 쓴다.
+
+    파일은 path + '.pending' 에 쓰고 commit() 해야 조회 대상이 된다.
+    """
+
+    def __init__(self, path):
+        self.final_path = path
+        self.path = path + PENDING_SUFFIX
+        os.makedirs(self.path, exist_ok=True)
+        self.members = []
+        self.member_bits = {}
+        self.term_ids = {}
+        self.post_terms = []
+        self.post_docs = []
+        self.n_docs = 0
+        self.merged = []
+        self._docs_schema = None
+        self._docs_writer = None
+
+    def _member_mask(self, members):
+        mask = 0
+        for m in members:
+            if m not in self.member_bits:
+                if len(self.members) >= MAX_MEMBERS:
+                    raise ValueError(f'멤버가 {MAX_MEMBERS}명을 넘어 bitmask 에 담을 수 없습니다: {m}')
+                self.member_bits[m] = len(self.members)
+                self.members.append(m)
+            mask |= 1 << self.member_bits[m]
+        return mask
+
+    def add_chunk(self, chunk):
+        chunk = chunk.reset_index(drop=True)
+        docs = np.arange(self.n_docs, self.n_docs + len(chunk), dtype=np.int32)
+
+        # 댓글별 term (raw_words + keywords, 댓글 안에서 중복 제거)
+        words = pd.concat([
+            explode_list(chunk, 'raw_words', 'term'),
+            explode_keywords(chunk).rename(columns={'keyword': 'term'})[['comment_id', 'term']]
+        ], ignore_index=True)
+        words['term'] = words['term'].str.strip().str.lower()
+        words = words[words['term'] != ''].drop_duplicates()
+        codes, uniques = pd.factorize(words['term'])
+        ids = np.array([self.term_ids.setdefault(t, len(self.term_ids)) for t in uniques], dtype=np.int32)
+        positions = pd.Index(chunk['comment_id']).get_indexer(words['comment_id'])
+        self.post_terms.append(ids[codes] if len(ids) else np.zeros(0, dtype=np.int32))
+        self.post_docs.append(docs[positions])
+
+        table = pd.DataFrame({
+            'comment_id': chunk['comment_id'].astype(str),
+            'video_id': chunk['video_id'].astype(str),
+            'date': chunk['date'].astype(str),
+            'region': chunk['region'].fillna('기타').astype(str),
+            'members': [self._member_mask(ms) for ms in decode_list(chunk['mentioned_members'])],
+            'likes': pd.to_numeric(chunk['likes'], errors='coerce').fillna(0).astype('int64'),
+            'author': chunk['author'].fillna('').astype(str),
+            'text': chunk['text'].fillna('').astype(str)
+        })
+        self._write_docs(pa.Table.from_pandas(table, preserve_index=False))
+        self.n_docs += len(chunk)
+
+    def add_segment(self, segment):
+        """기존 세그먼트를 그대로 이어 붙인다 (병합용, 멤버 bit·term id 만 다시 매김)"""
+        old = segment.docs['members'].to_numpy()
+        masks = np.zeros(len(old), dtype=np.int64)
+        for b, m in enumerate(segment.members):
+            masks |= (old >> b & 1) << (self._member_mask([m]).bit_length() - 1)
+        ids = np.array([self.term_ids.setdefault(t, len(self.term_ids)) for t in segment.terms.to_pylist()],
+                       dtype=np.int32)
+        docs = np.repeat(np.arange(segment.n_docs, dtype=np.int32), np.diff(segment.forward_offsets))
+        self.post_terms.append(ids[segment.forward_terms] if len(ids) else np.zeros(0, dtype=np.int32))
+        self.post_docs.append(docs + np.int32(self.n_docs))
+
+        table = segment.docs.set_column(segment.docs.schema.get_field_index('members'), 'members',
+                                        pa.array(masks))
+        self._write_docs(table)
+        self.n_docs += segment.n_docs
+
+    def _write_docs(self, table):
+        if self._docs_writer is None:
+            self._docs_schema = table.schema
+            self._docs_writer = pa.ipc.new_file(os.path.join(self.path, 'docs.arrow'), table.schema)
+        self._docs_writer.write_table(table.cast(self._docs_schema))
+
+    def close(self):
+        if self._docs_writer is not None:
+            self._docs_writer.close()
+
+        # term 을 사전순으로 정렬하고 id 를 다시 매김
+        vocab = np.array(list(self.term_ids), dtype=object)
+        order = np.argsort(vocab.astype(str), kind='stable')
+        remap = np.empty(len(order), dtype=np.int32)
+        remap[order] = np.arange(len(order), dtype=np.int32)
+        post_terms = remap[np.concatenate(self.post_terms)] if self.post_terms else np.zeros(0, np.int32)
+        post_docs = np.concatenate(self.post_docs) if self.post_docs else np.zeros(0, np.int32)
+
+        by_term = np.lexsort((post_docs, post_terms))
+        counts = np.bincount(post_terms, minlength=len(order)) if len(order) else np.zeros(0, np.int64)
+        offsets = np.concatenate([[0], np.cumsum(counts)[:-1]]) if len(order) else counts
+        feather.write_feather(pd.DataFrame({'term': vocab[order].astype(str),
+                                            'offset': offsets.astype(np.int64),
+                                            'count': counts.astype(np.int64)}),
+                              os.path.join(self.path, 'terms.arrow'), compression='uncompressed')
+        feather.write_feather(pd.DataFrame({'doc': post_docs[by_term]}),
+                              os.path.join(self.path, 'postings.arrow'), compression='uncompressed')
+
+        by_doc = np.lexsort((post_terms, post_docs))
+        feather.write_feather(pd.DataFrame({'doc': post_docs[by_doc], 'term': post_terms[by_doc]}),
+                              os.path.join(self.path, 'forward.arrow'), compression='uncompressed')
+
+        with open(os.path.join(self.path, 'meta.json'), 'w', encoding='utf-8') as f:
+            json.dump({'members': self.members, 'docs': self.n_docs, 'merged': self.merged}, f,
+                      ensure_ascii=False)
+        return self.n_docs
+
+    def commit(self):
+        """close() 한 세그먼트를 조회 대상으로 (수집 상태 저장이 끝난 뒤 호출)"""
+        os.replace(self.path, self.final_path)
+
+
+def search_dir(prefix, store_dir=STORE_DIR):
+    return os.path.join(group_dir(prefix, store_dir), SEARCH_DIR)
+
+
+def new_segment(prefix, store_dir=STORE_DIR, suffix=''):
+    """새 세그먼트 writer (이름은 생성 시각 → 사전순 = 생성순, 병렬 생성 시 suffix 로 구분)"""
+    name = datetime.now(timezone.utc).strftime('seg_%Y%m%dT%H%M%S%f') + suffix
+    return SegmentWriter(os.path.join(search_dir(prefix, store_dir), name))
+
+
+def segment_names(prefix, store_dir=STORE_DIR, pending=False):
+    """commit 된 (pending=True 면 아직 commit 되지 않은) 세그먼트 이름 (생성순)"""
+    root = search_dir(prefix, store_dir)
+    names = sorted(os.listdir(root)) if os.path.isdir(root) else []
+    return [n for n in names if n.endswith(PENDING_SUFFIX) == pending and not n.endswith(DROPPED_SUFFIX)]
+
+
+def read_meta(prefix, name, store_dir=STORE_DIR):
+    """세그먼트 meta.json (아직 쓰는 중이면 None)"""
+    path = os.path.join(search_dir(prefix, store_dir), name, 'meta.json')
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def live_segments(prefix, store_dir=STORE_DIR):
+    """조회할 세그먼트 {이름: meta}. 병합 직후 지우기 전에 멈춰 남은 원본은 제외."""
+    metas = {n: read_meta(prefix, n, store_dir) for n in segment_names(prefix, store_dir)}
+    metas = {n: meta for n, meta in metas.items() if meta is not None}
+    replaced = {old for meta in metas.values() for old in meta.get('merged', [])}
+    return {n: meta for n, meta in metas.items() if n not in replaced}
+
+
+def drop_segment(prefix, name, store_dir=STORE_DIR):
+    """세그먼트 삭제 (먼저 이름을 바꿔 목록에서 빼고 지운다)"""
+    path = os.path.join(search_dir(prefix, store_dir), name)
+    os.replace(path, path + DROPPED_SUFFIX)
+    shutil.rmtree(path + DROPPED_SUFFIX)
+
+
+def commit_pending(prefix, store_dir=STORE_DIR):
+    """아직 commit 되지 않은 세그먼트 전부 commit (병렬 생성 후 부모 프로세스에서)"""
+    root = search_dir(prefix, store_dir)
+    for name in segment_names(prefix, store_dir, pending=True):
+        os.replace(os.path.join(root, name), os.path.join(root, name[:-len(PENDING_SUFFIX)]))
+
+
+def swap_index(prefix, old, store_dir=STORE_DIR):
+    """다시 만든 세그먼트(pending)를 commit 하고 그 전 세그먼트(old)를 지운다 (전체 재색인 마무리)"""
+    commit_pending(prefix, store_dir)
+    for name in old:
+        drop_segment(prefix, name, store_dir)
+
+
+def drop_pending(prefix, store_dir=STORE_DIR):
+    """이전 수집이 상태 저장 전에 실패해 남은 세그먼트 삭제"""
+    root = search_dir(prefix, store_dir)
+    for name in segment_names(prefix, store_dir, pending=True):
+        shutil.rmtree(os.path.join(root, name))
+    for name in os.listdir(root) if os.path.isdir(root) else []:
+        if name.endswith(DROPPED_SUFFIX):
+            shutil.rmtree(os.path.join(root, name))
+
+
+def index_version(prefix, store_dir=STORE_DIR):
+    """세그먼트 목록 (캐시 키 용도, 없으면 None)"""
+    return tuple(segment_names(prefix, store_dir)) or None
+
+
+def build_index(prefix, raw_path=None, store_dir=STORE_DIR, chunksize=CHUNK_SIZE, append=False):
+    """원본 댓글로 세그먼트 생성. append=False 면 새 세그먼트가 완성된 뒤 기존 세그먼트를 지운다."""
+    raw_path = raw_path or f'{prefix}_comments_raw.csv'
+    old = [] if append else segment_names(prefix, store_dir)
+    drop_pending(prefix, store_dir)
+    writer = new_segment(prefix, store_dir)
+    for chunk in iter_raw_chunks(raw_path, chunksize, prefix):
+        writer.add_chunk(chunk.drop_duplicates('comment_id'))
+    docs = writer.close()
+    swap_index(prefix, old, store_dir)
+    compact(prefix, store_dir)
+    return docs
+
+
+def merge_tier(docs, factor=MERGE_FACTOR):
+    """세그먼트 크기 등급 (docs 수의 log_factor)"""
+    return int(np.log(max(docs, 1)) / np.log(factor))
+
+
+def merge_segments(prefix, names, store_dir=STORE_DIR):
+    """세그먼트 여러 개를 하나로 병합. 새 세그먼트를 commit 한 뒤 원본을 지운다.
+
+    meta 의 merged 에 원본 이름을 남기므로 지우기 전에 멈춰도 조회는 중복되지 않는다.
+    """
+    root = search_dir(prefix, store_dir)
+    writer = new_segment(prefix, store_dir, suffix='_merged')
+    writer.merged = list(names)
+    for name in names:
+        writer.add_segment(Segment(os.path.join(root, name)))
+    docs = writer.close()
+    writer.commit()
+    for name in names:
+        drop_segment(prefix, name, store_dir)
+    return docs
+
+
+def compact(prefix, store_dir=STORE_DIR, factor=MERGE_FACTOR):
+    """같은 등급 세그먼트가 factor 개 이상이면 병합 (더 이상 없을 때까지). 반환값은 병합 횟수.
+
+    수집이 끝난 뒤 (다른 writer 가 없을 때) 호출한다.
+    """
+    live = live_segments(prefix, store_dir)
+    for name in set(segment_names(prefix, store_dir)) - set(live):
+        if read_meta(prefix, name, store_dir) is not None:
+            drop_segment(prefix, name, store_dir)
+    merges = 0
+    while True:
+        tiers = {}
+        for name, meta in live.items():
+            tiers.setdefault(merge_tier(meta['docs'], factor), []).append(name)
+        names = next((names for _, names in sorted(tiers.items()) if len(names) >= factor), None)
+        if names is None:
+            return merges
+        merge_segments(prefix, names, store_dir)
+        merges += 1
+        live = live_segments(prefix, store_dir)
+
+
+# ============================================================
+# 조회
+# ============================================================
+class TermView:
+    """메모리 맵 term 배열을 bisect 할 수 있게 (찾는 위치의 term 만 파이썬 문자열로)"""
+
+    def __init__(self, terms):
+        self.terms = terms
+
+    def __len__(self):
+        return len(self.terms)
+
+    def __getitem__(self, i):
+        return self.terms[i].as_py()
+
+
+class Segment:
+    """세그먼트 하나 (모든 배열은 메모리 맵, term 사전도 통째로 읽지 않는다)"""
+
+    def __init__(self, path):
+        with open(os.path.join(path, 'meta.json'), encoding='utf-8') as f:
+            meta = json.load(f)
+        self.members = meta['members']
+        self.n_docs = meta['docs']
+        terms = feather.read_table(os.path.join(path, 'terms.arrow'), memory_map=True)
+        self.terms = terms['term'].combine_chunks()
+        self.offsets = terms['offset'].to_numpy()
+        self.counts = terms['count'].to_numpy()
+        self.postings = feather.read_table(os.path.join(path, 'postings.arrow'),
+                                           memory_map=True)['doc'].to_numpy()
+        forward = feather.read_table(os.path.join(path, 'forward.arrow'), memory_map=True)
+        self.forward_terms = forward['term'].to_numpy()
+        forward_docs = forward['doc'].to_numpy()
+        self.forward_offsets = np.searchsorted(forward_docs, np.arange(meta['docs'] + 1))
+        self.docs = feather.read_table(os.path.join(path, 'docs.arrow'), memory_map=True)
+
+    def term_range(self, term, prefix=False):
+        """정렬된 term 배열에서 일치(또는 접두사) 구간"""
+        view = TermView(self.terms)
+        lo = bisect.bisect_left(view, term)
+        hi = bisect.bisect_right(view, term + '\U0010ffff' if prefix else term)
+        return lo, hi
+
+    def lookup(self, term, prefix=False):
+        lo, hi = self.term_range(term, prefix)
+        if lo >= hi:
+            return np.zeros(0, dtype=np.int32)
+        parts = [self.postings[self.offsets[i]:self.offsets[i] + self.counts[i]] for i in range(lo, hi)]
+        return np.unique(np.concatenate(parts))
+
+    def member_mask(self, member):
+        if member not in self.members:
+            return None
+        return 1 << self.members.index(member)
+
+    def doc_terms(self, docs):
+        """docs 에 등장한 term id 전부 (forward index 구간 이어 붙이기)"""
+        starts, ends = self.forward_offsets[docs], self.forward_offsets[docs + 1]
+        lengths = ends - starts
+        if not lengths.sum():
+            return np.zeros(0, dtype=np.int32)
+        index = np.repeat(starts - np.concatenate([[0], np.cumsum(lengths)[:-1]]), lengths) + \
+            np.arange(lengths.sum())
+        return self.forward_terms[index]
+
+
+class SearchIndex:
+    """그룹의 모든 세그먼트에 대한 키워드 조회"""
+
+    def __init__(self, prefix, store_dir=STORE_DIR):
+        root = search_dir(prefix, store_dir)
+        self.segments = [Segment(os.path.join(root, n)) for n in live_segments(prefix, store_dir)]
+
+    def __bool__(self):
+        return bool(self.segments)
+
+    def _match(self, segment, query, prefix=False, phrase=False):
+        """쿼리의 모든 단어를 포함하는 doc (AND). 마지막 단어만 접두사 허용.
+
+        phrase=True 면 색인에 없는 단어(조사/불용어)는 건너뛰고 본문 확인에 맡긴다.
+        색인된 단어가 하나도 없으면 빈 결과.
+        """
+        words = [normalize_term(w) for w in query.split()]
+        docs = None
+        for i, word in enumerate(words):
+            is_prefix = prefix and i == len(words) - 1
+            lo, hi = segment.term_range(word, is_prefix)
+            if phrase and lo >= hi:
+                continue
+            hits = segment.lookup(word, is_prefix)
+            docs = hits if docs is None else np.intersect1d(docs, hits, assume_unique=True)
+            if not len(docs):
+                break
+        return np.zeros(0, np.int32) if docs is None else docs
+
+    def _filter(self, segment, query, prefix=False, phrase=False, member=None, region=None,
+                start=None, end=None, videos=None):
+        """쿼리와 필터를 통과한 doc 의 좁은 컬럼 (index = doc id).
+
+        필터는 NARROW_COLUMNS 로만 하고, text 는 phrase 확인이 필요한 후보만 읽는다.
+        """
+        mask = segment.member_mask(member) if member is not None else None
+        if member is not None and mask is None:
+            return None
+        docs = self._match(segment, query, prefix, phrase)
+        if not len(docs):
+            return None
+        df = segment.docs.select(NARROW_COLUMNS).take(pa.array(docs)).to_pandas()
+        df.index = docs
+        keep = np.ones(len(df), dtype=bool)
+        if mask is not None:
+            keep &= (df['members'].to_numpy() & mask) != 0
+        if region:
+            keep &= (df['region'] == region).to_numpy()
+        if start:
+            keep &= (df['date'] >= start).to_numpy()
+        if end:
+            keep &= (df['date'] <= end).to_numpy()
+        if videos:
+            keep &= df['video_id'].isin(videos).to_numpy()
+        df = df[keep]
+        if phrase and len(df):
+            text = segment.docs['text'].take(pa.array(df.index.to_numpy())).to_pandas()
+            df = df[text.str.lower().str.contains(query.lower(), regex=False).to_numpy()]
+        return df if len(df) else None
+
+    def search(self, query, prefix=False, phrase=False, member=None, region=None,
+               start=None, end=None, videos=None, limit=50):
+        """키워드 → 댓글 DataFrame (좋아요 순). phrase=True 면 본문에 구절 그대로 포함된 것만
+
+        순위는 좁은 컬럼으로 매기고 text 를 포함한 전체 행은 상위 limit 개만 읽는다.
+        """
+        frames = []
+        for i, segment in enumerate(self.segments):
+            df = self._filter(segment, query, prefix, phrase, member, region, start, end, videos)
+            if df is not None:
+                frames.append(pd.DataFrame({'segment': i, 'doc': df.index, 'likes': df['likes'].to_numpy()}))
+        if not frames:
+            return pd.DataFrame(columns=DOC_COLUMNS + ['members'])
+        top = pd.concat(frames, ignore_index=True).sort_values('likes', ascending=False, kind='stable')
+        if limit:
+            top = top.head(limit)
+
+        rows = []
+        for i, docs in top.groupby('segment', sort=False)['doc']:
+            segment = self.segments[i]
+            df = segment.docs.take(pa.array(docs.to_numpy())).to_pandas()
+            df['members'] = [[m for b, m in enumerate(segment.members) if bits >> b & 1]
+                             for bits in df['members']]
+            df.index = docs.index
+            rows.append(df)
+        return pd.concat(rows).loc[top.index].reset_index(drop=True)
+
+    def breakdown(self, query, prefix=False, phrase=False, **filters):
+        """키워드가 나온 댓글의 전체/멤버/국가/날짜별 건수 (좁은 컬럼만 읽는다)"""
+        total, members, regions, dates = 0, {}, [], []
+        for segment in self.segments:
+            df = self._filter(segment, query, prefix, phrase, **filters)
+            if df is None:
+                continue
+            total += len(df)
+            bits = df['members'].to_numpy()
+            for b, m in enumerate(segment.members):
+                members[m] = members.get(m, 0) + int((bits >> b & 1).sum())
+            regions.append(df['region'])
+            dates.append(df['date'])
+        member = pd.Series(members, dtype='int64')
+        return {
+            'total': total,
+            'member': member[member > 0].sort_values(ascending=False, kind='stable'),
+            'region': pd.concat(regions).value_counts() if regions else pd.Series(dtype='int64'),
+            'date': pd.concat(dates).value_counts().sort_index() if dates else pd.Series(dtype='int64')
+        }
+
+    def related(self, query, k=10, prefix=False, phrase=False, **filters):
+        """쿼리 키워드와 같은 댓글에 자주 나온 키워드 top-k (search 와 같은 필터 적용)"""
+        words = [normalize_term(w) for w in query.split()]
+        totals = pd.Series(dtype='int64', index=pd.Index([], dtype=object))
+        for segment in self.segments:
+            df = self._filter(segment, query, prefix, phrase, **filters)
+            if df is None:
+                continue
+            docs = df.index.to_numpy()
+            counts = np.bincount(segment.doc_terms(docs), minlength=len(segment.terms))
+            nonzero = np.nonzero(counts)[0]
+            terms = segment.terms.take(pa.array(nonzero)).to_pylist()
+            totals = totals.add(pd.Series(counts[nonzero], index=terms), fill_value=0)
+        matched = totals.index.isin(words)
+        if prefix and words:
+            matched |= totals.index.str.startswith(words[-1])
+        totals = totals[~matched].astype('int64')
+        return (totals.sort_values(ascending=False, kind='stable').head(k)
+                .rename_axis('keyword').reset_index(name='count'))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='원본 댓글 키워드 역색인 생성/조회')
+    parser.add_argument('prefix', help='그룹 prefix (예: plave)')
+    parser.add_argument('--raw', help='원본 댓글 CSV 경로 (기본: <prefix>_comments_raw.csv)')
+    parser.add_argument('--store-dir', default=STORE_DIR)
+    parser.add_argument('--append', action='store_true', help='기존 세그먼트를 두고 새 세그먼트 추가')
+    parser.add_argument('--query', help='색인 대신 키워드 조회')
+    parser.add_argument('--compact', action='store_true', help='색인 대신 같은 등급 세그먼트 병합만')
+    parser.add_argument('--chunksize', type=int, default=CHUNK_SIZE)
+    args = parser.parse_args()
+
+    if args.query:
+        index = SearchIndex(args.prefix, args.store_dir)
+        print(index.search(args.query, limit=10)[['date', 'region', 'members', 'likes', 'text']])
+        print(index.related(args.query))
+        return
+    if args.compact:
+        print(f'✅ {args.prefix}: 세그먼트 {compact(args.prefix, args.store_dir)}번 병합')
+        return
+    docs = build_index(args.prefix, args.raw, args.store_dir, args.chunksize, args.append)
+    print(f'✅ {args.prefix}: 댓글 {docs:,}개 색인')
+
+
+if __name__ == '__main__':
+    main()
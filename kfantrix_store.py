@@ -0,0 +1,262 @@
+# kfantrix_store.py - 그룹별 컬럼형(Arrow) 저장소
+# store/<prefix>/<table>.arrow + manifest.json 구조, 메모리 맵으로 읽음
+
+import argparse
+import json
+import os
+import pickle
+from datetime import datetime, timezone
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+
+from kfantrix_decode import to_long
+from kfantrix_pipeline import CHUNK_SIZE, TABLE_FILES, aggregate_raw, iter_raw_chunks
+
+# ============================================================
+# 설정
+# ============================================================
+STORE_DIR = 'store'
+MANIFEST = 'manifest.json'
+RAW_DIR = 'raw'
+KEYWORDS_FILE = 'keywords.pkl'
+
+# 반복값이 많은 문자열 컬럼은 categorical(dictionary) 로 저장
+CATEGORY_COLUMNS = ['member', 'member_1', 'member_2', 'region', 'language',
+                    'top_member', 'top_category']
+
+# 카운트 컬럼은 정수로 고정
+INT_COLUMNS = ['count', 'mention_count', 'comment_count', 'total_comments', 'total_videos',
+               'unique_authors', 'top_member_count', 'total_keywords', 'total_fans',
+               'casual_fans', 'regular_fans', 'loyal_fans', 'super_fans',
+               'lang_korean', 'lang_english', 'lang_japanese', 'lang_chinese', 'lang_other',
+               'visual_score', 'talent_score', 'personality_score', 'love_score']
+
+
+# ============================================================
+# 타입 정리
+# ============================================================
+def normalize_types(df):
+    """저장 전 컬럼 타입 고정 (categorical / int64)"""
+    df = df.copy()
+    for col in df.columns:
+        if col in CATEGORY_COLUMNS:
+            df[col] = df[col].astype('category')
+        elif col in INT_COLUMNS:
+            df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0).astype('int64')
+    return df
+
+
+# ============================================================
+# 쓰기
+# ============================================================
+def group_dir(prefix, store_dir=STORE_DIR):
+    return os.path.join(store_dir, prefix)
+
+
+def write_group(tables, prefix, store_dir=STORE_DIR):
+    """테이블 dict 를 그룹 저장소로 기록하고 manifest 갱신"""
+    path = group_dir(prefix, store_dir)
+    os.makedirs(path, exist_ok=True)
+
+    rows = {}
+    for key in TABLE_FILES:
+        df = tables.get(key)
+        if df is None:
+            continue
+        # 메모리 맵으로 바로 읽을 수 있도록 비압축 저장.
+        # 다른 프로세스가 맵핑 중일 수 있으므로 덮어쓰지 않고 tmp → os.replace
+        target = os.path.join(path, f'{key}.arrow')
+        feather.write_feather(normalize_types(df), target + '.tmp', compression='uncompressed')
+        os.replace(target + '.tmp', target)
+        rows[key] = len(df)
+
+    manifest = {
+        'prefix': prefix,
+        'version': datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S%fZ'),
+        'tables': rows
+    }
+    target = os.path.join(path, MANIFEST)
+    with open(target + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(target + '.tmp', target)
+    return manifest
+
+
+def convert_csv(prefix, src_dir='.', store_dir=STORE_DIR):
+    """기존 <prefix>_*.csv 11종을 저장소로 변환"""
+    tables = {}
+    for key, suffix in TABLE_FILES.items():
+        filename = os.path.join(src_dir, f'{prefix}_{suffix}.csv')
+        if os.path.exists(filename):
+            tables[key] = pd.read_csv(filename)
+    if not tables:
+        return None
+    return write_group(tables, prefix, store_dir)
+
+
+def build_from_raw(prefix, raw_path=None, src_dir='.', store_dir=STORE_DIR, artist=None):
+    """원본 댓글을 집계해 CSV 를 거치지 않고 바로 저장소에 기록"""
+    raw_path = raw_path or os.path.join(src_dir, f'{prefix}_comments_raw.csv')
+    tables = aggregate_raw(raw_path, artist=artist, prefix=prefix).finalize()
+    return write_group(tables, prefix, store_dir)
+
+
+# ============================================================
+# 원본 댓글 long 포맷
+# ============================================================
+# 본문 테이블은 첫 청크로 타입을 추론하면 (예: author 가 전부 비어 있는 청크) 뒤 청크와 어긋나므로 고정
+COMMENT_SCHEMA = pa.schema(
+    [(col, pa.int64() if col == 'likes' else pa.string())
+     for col in ['video_id', 'comment_id', 'author', 'author_id', 'text', 'likes', 'date',
+                 'video_title', 'video_date', 'language', 'region']]
+)
+
+LONG_SCHEMAS = {
+    'comments': COMMENT_SCHEMA,
+    'mentions': pa.schema([('comment_id', pa.string()), ('member', pa.string())]),
+    'keywords': pa.schema([('comment_id', pa.string()), ('category', pa.string()),
+                           ('keyword', pa.string())]),
+    'raw_words': pa.schema([('comment_id', pa.string()), ('word', pa.string())])
+}
+
+
+def conform(df, schema):
+    """청크를 고정 스키마 컬럼 순서·타입으로 (전부 비어 있는 컬럼도 같은 타입)"""
+    return pd.DataFrame({
+        field.name: df[field.name].astype('Int64' if pa.types.is_integer(field.type) else 'string')
+        for field in schema
+    })
+
+
+def migrate_raw(prefix, raw_path=None, src_dir='.', store_dir=STORE_DIR, chunksize=CHUNK_SIZE):
+    """원본 댓글 CSV → store/<prefix>/raw/{comments,mentions,keywords,raw_words}.arrow
+
+    문자열 list/dict 컬럼을 (comment_id, member) / (comment_id, category, keyword)
+    / (comment_id, word) long 테이블로 풀어서 청크마다 이어 쓴다.
+    """
+    raw_path = raw_path or os.path.join(src_dir, f'{prefix}_comments_raw.csv')
+    out_dir = os.path.join(group_dir(prefix, store_dir), RAW_DIR)
+    os.makedirs(out_dir, exist_ok=True)
+
+    # 끝까지 쓴 뒤에만 tmp → os.replace (중간에 끊겨도 이전 파일 유지)
+    writers = {}
+    rows = {}
+    try:
+        for chunk in iter_raw_chunks(raw_path, chunksize, prefix):
+            for name, df in to_long(chunk).items():
+                schema = LONG_SCHEMAS[name]
+                table = pa.Table.from_pandas(conform(df, schema), schema=schema, preserve_index=False)
+                if name not in writers:
+                    writers[name] = pa.ipc.new_file(os.path.join(out_dir, f'{name}.arrow.tmp'), schema)
+                    rows[name] = 0
+                writers[name].write_table(table)
+                rows[name] += len(df)
+    except BaseException:
+        for name, writer in writers.items():
+            writer.close()
+            os.remove(os.path.join(out_dir, f'{name}.arrow.tmp'))
+        raise
+    for name, writer in writers.items():
+        writer.close()
+        target = os.path.join(out_dir, f'{name}.arrow')
+        os.replace(target + '.tmp', target)
+    return rows
+
+
+def read_raw(prefix, name, store_dir=STORE_DIR, columns=None):
+    """long 포맷 원본 테이블 하나 읽기 (없으면 None)"""
+    path = os.path.join(group_dir(prefix, store_dir), RAW_DIR, f'{name}.arrow')
+    if not os.path.exists(path):
+        return None
+    return feather.read_table(path, columns=columns, memory_map=True).to_pandas()
+
+
+# ============================================================
+# 읽기
+# ============================================================
+def read_manifest(prefix, store_dir=STORE_DIR):
+    path = os.path.join(group_dir(prefix, store_dir), MANIFEST)
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def read_table(prefix, key, store_dir=STORE_DIR, columns=None):
+    """테이블 하나를 메모리 맵으로 읽기 (없으면 None)"""
+    path = os.path.join(group_dir(prefix, store_dir), f'{key}.arrow')
+    if not os.path.exists(path):
+        return None
+    table = feather.read_table(path, columns=columns, memory_map=True)
+    return table.to_pandas()
+
+
+def read_group(prefix, store_dir=STORE_DIR):
+    """그룹 저장소 전체 읽기. 저장소가 없으면 None"""
+    manifest = read_manifest(prefix, store_dir)
+    if manifest is None:
+        return None
+    return {key: read_table(prefix, key, store_dir) for key in TABLE_FILES}
+
+
+# ============================================================
+# 키워드 요약 (kfantrix_topk.KeywordSummaries)
+# ============================================================
+def keywords_path(prefix, store_dir=STORE_DIR):
+    return os.path.join(group_dir(prefix, store_dir), KEYWORDS_FILE)
+
+
+def save_keywords(summaries, prefix, store_dir=STORE_DIR):
+    path = keywords_path(prefix, store_dir)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = path + '.tmp'
+    with open(tmp, 'wb') as f:
+        pickle.dump(summaries, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp, path)
+
+
+def keywords_version(prefix, store_dir=STORE_DIR):
+    """요약 파일 수정 시각 (캐시 키 용도, 없으면 None)"""
+    path = keywords_path(prefix, store_dir)
+    return os.path.getmtime(path) if os.path.exists(path) else None
+
+
+def load_keywords(prefix, store_dir=STORE_DIR):
+    """저장된 키워드 요약 (없으면 None)"""
+    path = keywords_path(prefix, store_dir)
+    if not os.path.exists(path):
+        return None
+    with open(path, 'rb') as f:
+        return pickle.load(f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='<prefix>_*.csv 를 컬럼형 저장소로 변환')
+    parser.add_argument('prefixes', nargs='+', help='그룹 prefix (예: plave nmixx skz)')
+    parser.add_argument('--src-dir', default='.')
+    parser.add_argument('--store-dir', default=STORE_DIR)
+    parser.add_argument('--from-raw', action='store_true',
+                        help='CSV 대신 <prefix>_comments_raw.csv 를 집계해서 저장')
+    parser.add_argument('--long', action='store_true',
+                        help='<prefix>_comments_raw.csv 를 long 포맷(raw/*.arrow)으로 변환')
+    args = parser.parse_args()
+
+    for prefix in args.prefixes:
+        if args.long:
+            rows = migrate_raw(prefix, src_dir=args.src_dir, store_dir=args.store_dir)
+            print(f'✅ {prefix}: ' + ', '.join(f'{k} {v:,}행' for k, v in rows.items()))
+            continue
+        if args.from_raw:
+            manifest = build_from_raw(prefix, src_dir=args.src_dir, store_dir=args.store_dir)
+        else:
+            manifest = convert_csv(prefix, args.src_dir, args.store_dir)
+        if manifest is None:
+            print(f'⚠️ {prefix}: 변환할 CSV 가 없습니다.')
+        else:
+            print(f"✅ {prefix}: {len(manifest['tables'])}개 테이블 → {group_dir(prefix, args.store_dir)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,242 @@
+# kfantrix_timeseries.py - 채널 지표 시계열 저장소
+# channels_data.csv 같은 채널 스냅샷을 수집할 때마다 append-only 로 쌓고
+# 시간/일/주 단위 롤업(구간 마지막 값)을 증분으로 갱신한다.
+# 채널 페이지는 롤업만 읽으므로 스냅샷 전체를 올리지 않는다.
+#
+# store/channels/
+#   meta.json                          채널별 워터마크(마지막 수집 시각), 파트 목록
+#   snapshots/part-<시각>.arrow        스냅샷 원본 (zstd 압축, 수집 1회 = 파일 1개)
+#   rollup/<level>/<기간>.arrow        level: hour(월별) / day(연도별) / week(전체)
+
+import argparse
+import glob
+import json
+import os
+from datetime import datetime, timezone
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+
+from kfantrix_store import STORE_DIR
+
+CHANNEL_DIR = 'channels'
+METRICS = ['subscribers', 'total_views', 'video_count', 'avg_views', 'avg_likes', 'avg_comments',
+           'engagement_rate', 'fandom_activity', 'recent_videos_30d']
+METRIC_LABELS = {
+    'subscribers': '구독자',
+    'total_views': '누적 조회수',
+    'video_count': '영상 수',
+    'avg_views': '평균 조회수',
+    'avg_likes': '평균 좋아요',
+    'avg_comments': '평균 댓글',
+    'engagement_rate': '참여도 (%)',
+    'fandom_activity': '팬덤 활성도 (%)',
+    'recent_videos_30d': '최근 30일 영상'
+}
+# 롤업 단계 → (버킷 함수, 파티션 형식)
+LEVELS = {
+    'hour': (lambda ts: ts.dt.floor('h'), '%Y-%m'),
+    'day': (lambda ts: ts.dt.floor('D'), '%Y'),
+    'week': (lambda ts: ts.dt.to_period('W-SUN').dt.start_time, None)
+}
+
+
+def channel_dir(store_dir=STORE_DIR):
+    return os.path.join(store_dir, CHANNEL_DIR)
+
+
+def _meta_path(store_dir):
+    return os.path.join(channel_dir(store_dir), 'meta.json')
+
+
+def read_meta(store_dir=STORE_DIR):
+    path = _meta_path(store_dir)
+    if not os.path.exists(path):
+        return {'watermarks': {}, 'parts': []}
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _write_meta(meta, store_dir):
+    path = _meta_path(store_dir)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f'{path}.{os.getpid()}.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(meta, f, ensure_ascii=False, indent=1)
+    os.replace(tmp, path)
+
+
+def _write_atomic(table, path, compression='zstd'):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f'{path}.{os.getpid()}.tmp'
+    feather.write_feather(table, tmp, compression=compression)
+    os.replace(tmp, path)
+
+
+def timeseries_version(store_dir=STORE_DIR):
+    """메타 파일 수정 시각 (없으면 None) - 캐시 키용"""
+    path = _meta_path(store_dir)
+    return os.path.getmtime(path) if os.path.exists(path) else None
+
+
+# ============================================================
+# 스냅샷 추가
+# ============================================================
+def normalize_snapshot(df):
+    """채널 스냅샷 → (ts, artist, 지표) 테이블. ts 는 UTC (시간대 없는 시각은 UTC 로 본다)"""
+    out = pd.DataFrame({
+        'ts': pd.to_datetime(df['collected_at'], utc=True).dt.tz_localize(None).astype('datetime64[us]'),
+        'artist': df['artist'].astype(str)
+    })
+    for col in METRICS:
+        out[col] = pd.to_numeric(df[col], errors='coerce') if col in df.columns else float('nan')
+    return out
+
+
+def merge_rollup(old, new):
+    """같은 (artist, bucket) 은 마지막 스냅샷 값을 남기고 개수는 더한다"""
+    both = pd.concat([old, new], ignore_index=True) if old is not None else new
+    counts = both.groupby(['artist', 'bucket'])['snapshots'].sum()
+    last = both.sort_values('ts', kind='stable').drop_duplicates(['artist', 'bucket'], keep='last')
+    last = last.set_index(['artist', 'bucket'])
+    last['snapshots'] = counts
+    return last.reset_index().sort_values(['bucket', 'artist'], kind='stable').reset_index(drop=True)
+
+
+def _rollup_path(level, partition, store_dir):
+    return os.path.join(channel_dir(store_dir), 'rollup', level, f'{partition}.arrow')
+
+
+def update_rollups(snapshots, store_dir=STORE_DIR):
+    """새 스냅샷이 닿는 롤업 파티션만 다시 쓴다.
+
+    (artist, bucket) 행의 ts 이하 스냅샷은 이미 반영된 것으로 보고 건너뛰므로
+    메타 저장 전에 멈춘 수집을 다시 실행해도 snapshots 개수가 두 번 더해지지 않는다.
+    """
+    for level, (bucket_of, fmt) in LEVELS.items():
+        new = snapshots.assign(bucket=bucket_of(snapshots['ts']), snapshots=1)
+        partitions = new['bucket'].dt.strftime(fmt) if fmt else pd.Series('all', index=new.index)
+        for partition, part in new.groupby(partitions):
+            path = _rollup_path(level, partition, store_dir)
+            old = feather.read_table(path).to_pandas() if os.path.exists(path) else None
+            if old is not None:
+                applied = part.merge(old[['artist', 'bucket', 'ts']].rename(columns={'ts': 'applied'}),
+                                     on=['artist', 'bucket'], how='left')['applied'].to_numpy()
+                part = part[pd.isna(applied) | (part['ts'].to_numpy() > applied)]
+                if part.empty:
+                    continue
+            _write_atomic(pa.Table.from_pandas(merge_rollup(old, merge_rollup(None, part)),
+                                               preserve_index=False), path)
+
+
+def append_snapshot(df, store_dir=STORE_DIR):
+    """채널 스냅샷 추가. 채널별 마지막 수집 시각 이후 행만 반영 (같은 파일을 다시 넣어도 안전).
+
+    반환값은 추가된 행 수.
+    """
+    meta = read_meta(store_dir)
+    snapshots = normalize_snapshot(df).dropna(subset=['ts'])
+    marks = snapshots['artist'].map(meta['watermarks']).fillna('')
+    snapshots = snapshots[snapshots['ts'].dt.strftime('%Y-%m-%dT%H:%M:%S') > marks]
+    if snapshots.empty:
+        return 0
+
+    stamp = datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S%fZ')
+    part = os.path.join(channel_dir(store_dir), 'snapshots', f'part-{stamp}.arrow')
+    _write_atomic(pa.Table.from_pandas(snapshots.reset_index(drop=True), preserve_index=False), part)
+    update_rollups(snapshots, store_dir)
+
+    latest = snapshots.groupby('artist')['ts'].max().dt.strftime('%Y-%m-%dT%H:%M:%S')
+    meta['watermarks'].update(latest.to_dict())
+    meta['parts'].append(os.path.basename(part))
+    # 메타는 마지막에 교체 (중간에 실패하면 다음 실행이 같은 스냅샷을 다시 반영)
+    _write_meta(meta, store_dir)
+    return len(snapshots)
+
+
+def compact(store_dir=STORE_DIR):
+    """스냅샷 파트를 월별 파일 하나씩으로 합치기. 반환값은 합친 뒤 파트 수"""
+    meta = read_meta(store_dir)
+    folder = os.path.join(channel_dir(store_dir), 'snapshots')
+    if not meta['parts']:
+        return 0
+    df = pd.concat([feather.read_table(os.path.join(folder, p)).to_pandas() for p in meta['parts']],
+                   ignore_index=True)
+    parts = []
+    for month, part in df.sort_values('ts', kind='stable').groupby(df['ts'].dt.strftime('%Y%m')):
+        name = f'part-{month}.arrow'
+        _write_atomic(pa.Table.from_pandas(part.reset_index(drop=True), preserve_index=False),
+                      os.path.join(folder, name))
+        parts.append(name)
+    old = set(meta['parts']) - set(parts)
+    meta['parts'] = parts
+    _write_meta(meta, store_dir)
+    for name in old:
+        os.remove(os.path.join(folder, name))
+    return len(parts)
+
+
+# ============================================================
+# 조회
+# ============================================================
+def read_rollup(level='day', start=None, end=None, artists=None, store_dir=STORE_DIR):
+    """롤업 조회 (필요한 파티션만 메모리 맵으로 읽음). 없으면 빈 DataFrame"""
+    _, fmt = LEVELS[level]
+    frames = []
+    for path in sorted(glob.glob(os.path.join(glob.escape(channel_dir(store_dir)), 'rollup', level, '*.arrow'))):
+        partition = os.path.basename(path)[:-len('.arrow')]
+        if fmt and start is not None and partition < pd.Timestamp(start).strftime(fmt):
+            continue
+        if fmt and end is not None and partition > pd.Timestamp(end).strftime(fmt):
+            continue
+        frames.append(feather.read_table(path, memory_map=True).to_pandas())
+    if not frames:
+        return pd.DataFrame(columns=['artist', 'bucket', 'ts', 'snapshots'] + METRICS)
+    df = pd.concat(frames, ignore_index=True)
+    if start is not None:
+        df = df[df['bucket'] >= pd.Timestamp(start)]
+    if end is not None:
+        df = df[df['bucket'] <= pd.Timestamp(end)]
+    if artists:
+        df = df[df['artist'].isin(artists)]
+    return df.sort_values(['bucket', 'artist'], kind='stable').reset_index(drop=True)
+
+
+def growth(rollup, metric):
+    """채널별 기간 처음 → 마지막 값 변화량·증가율"""
+    if rollup.empty:
+        return pd.DataFrame(columns=['artist', 'first', 'last', 'delta', 'growth_rate'])
+    ordered = rollup.sort_values('bucket', kind='stable').groupby('artist')[metric]
+    result = pd.DataFrame({'first': ordered.first(), 'last': ordered.last()})
+    result['delta'] = result['last'] - result['first']
+    result['growth_rate'] = (result['delta'] / result['first'].where(result['first'] != 0) * 100).round(2)
+    return result.reset_index().sort_values('growth_rate', ascending=False, na_position='last')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='채널 지표 시계열 저장소')
+    sub = parser.add_subparsers(dest='command', required=True)
+    add = sub.add_parser('append', help='채널 스냅샷 CSV 추가')
+    add.add_argument('paths', nargs='+')
+    pack = sub.add_parser('compact', help='스냅샷 파트를 월별로 합치기')
+    show = sub.add_parser('show', help='롤업 조회')
+    show.add_argument('--level', default='day', choices=list(LEVELS))
+    show.add_argument('--metric', default='subscribers', choices=METRICS)
+    for p in (add, pack, show):
+        p.add_argument('--store-dir', default=STORE_DIR)
+    args = parser.parse_args()
+
+    if args.command == 'append':
+        for path in args.paths:
+            rows = append_snapshot(pd.read_csv(path, encoding='utf-8-sig'), args.store_dir)
+            print(f'✅ {path}: 스냅샷 {rows}개 추가')
+    elif args.command == 'compact':
+        print(f'✅ 파트 {compact(args.store_dir)}개')
+    else:
+        df = read_rollup(args.level, store_dir=args.store_dir)
+        print(df.pivot_table(index='bucket', columns='artist', values=args.metric).to_string())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,172 @@
+# kfantrix_topk.py - 키워드 heavy hitter 요약 (Space-Saving)
+# 문자열로 굳힌 "look(49), beautiful(25)" 대신 합칠 수 있는 top-k 요약을 유지하고
+# 대시보드에서 원하는 k 로 그때그때 꺼낸다.
+
+from collections import defaultdict
+
+import pandas as pd
+
+from kfantrix_decode import explode_keywords, explode_list
+
+# 집계기 요약 하나 / (날짜, 멤버, 국가, 카테고리) 셀 하나가 유지하는 항목 수
+CAPACITY = 5000
+CELL_CAPACITY = 1000
+RAW_CATEGORY = 'raw'
+
+
+# ============================================================
+# Space-Saving
+# ============================================================
+class SpaceSaving:
+    """Space-Saving heavy hitter 요약 (Counter 의 update / most_common 호환).
+
+    항목이 capacity 의 2배를 넘으면 상위 capacity 개만 남기고, 잘려 나간
+    최대 count 를 floor 로 기록한다. 새 항목은 floor 에서 시작하므로 count 는
+    참값의 상한이고 count - error 는 하한이다. 잘린 적이 없으면 정확한 값.
+
+    counts/errors 는 offset 을 뺀 값으로 저장한다. merge 때 이쪽에만 있는 항목에
+    상대 floor 를 더하는 대신 offset 만 올리므로 merge 비용은 상대 항목 수에 비례한다.
+    """
+
+    def __init__(self, capacity=CAPACITY):
+        self.capacity = capacity
+        self.counts = {}
+        self.errors = {}
+        self.floor = 0
+        self.offset = 0
+        self.total = 0
+
+    def __setstate__(self, state):
+        # offset 이전에 저장된 요약
+        state.setdefault('offset', 0)
+        self.__dict__.update(state)
+
+    def add(self, item, count=1):
+        if item in self.counts:
+            self.counts[item] += count
+        else:
+            self.counts[item] = self.floor - self.offset + count
+            if self.floor != self.offset:
+                self.errors[item] = self.floor - self.offset
+            if len(self.counts) > 2 * self.capacity:
+                self._trim()
+        self.total += count
+
+    def update(self, items):
+        """iterable(항목마다 1) 또는 {항목: count} dict 반영"""
+        if isinstance(items, dict):
+            for item, count in items.items():
+                self.add(item, count)
+        else:
+            for item in items:
+                self.add(item)
+
+    def _trim(self):
+        if len(self.counts) <= self.capacity:
+            return
+        ranked = sorted(self.counts.items(), key=lambda kv: kv[1], reverse=True)
+        self.floor = max(self.floor, ranked[self.capacity][1] + self.offset)
+        for item, _ in ranked[self.capacity:]:
+            del self.counts[item]
+            self.errors.pop(item, None)
+
+    def merge(self, other):
+        """다른 요약(다른 영상/기간/청크) 합치기. 한쪽에 없는 항목은 그쪽 floor 를 상한으로 더한다"""
+        # 이쪽에만 있는 항목은 offset 으로 other.floor 를 한꺼번에 더한다
+        offset = self.offset + other.floor
+        for item, count in other.counts.items():
+            count += other.offset
+            error = other.errors.get(item, 0) + other.offset
+            if item in self.counts:
+                # offset 이 other.floor 만큼 올라가므로 그만큼 빼서 저장
+                self.counts[item] += count - other.floor
+                error += self.errors.get(item, 0) - other.floor
+            else:
+                self.counts[item] = self.floor + count - offset
+                error += self.floor - offset
+            if error:
+                self.errors[item] = error
+            else:
+                self.errors.pop(item, None)
+        self.offset = offset
+        self.floor += other.floor
+        self.total += other.total
+        if len(self.counts) > 2 * self.capacity:
+            self._trim()
+        return self
+
+    def most_common(self, k=None):
+        self._trim()
+        ranked = sorted(self.counts.items(), key=lambda kv: kv[1], reverse=True)
+        ranked = ranked[:k] if k else ranked
+        return [(item, count + self.offset) for item, count in ranked]
+
+    def guaranteed(self, item):
+        """참값 하한"""
+        if item not in self.counts:
+            return 0
+        return self.counts[item] - self.errors.get(item, 0)
+
+    def __len__(self):
+        return len(self.counts)
+
+
+# ============================================================
+# (날짜, 멤버, 국가, 카테고리) 요약
+# ============================================================
+class KeywordSummaries:
+    """키워드 카테고리별 Space-Saving 셀 묶음.
+
+    cells[(member, category)][(date, region)] = SpaceSaving.
+    member None 은 그룹 전체 댓글, category 'raw' 는 raw_words.
+    조회 시 조건에 맞는 셀만 merge 하므로 멤버·국가·기간을 자유롭게 조합할 수 있다.
+    """
+
+    def __init__(self, capacity=CELL_CAPACITY):
+        self.capacity = capacity
+        self.cells = defaultdict(dict)
+
+    def add_chunk(self, chunk):
+        chunk = chunk.reset_index(drop=True)
+        words = pd.concat([
+            explode_keywords(chunk),
+            explode_list(chunk, 'raw_words', 'keyword').assign(category=RAW_CATEGORY)
+        ], ignore_index=True)
+        dims = chunk[['comment_id', 'date', 'region']].copy()
+        dims['region'] = dims['region'].fillna('기타')
+        words = words.merge(dims, on='comment_id')
+
+        mentions = explode_list(chunk, 'mentioned_members', 'member').drop_duplicates()
+        rows = pd.concat([words.assign(member=''), words.merge(mentions, on='comment_id')],
+                         ignore_index=True)
+        counts = (rows.groupby(['member', 'category', 'date', 'region', 'keyword'], sort=False)
+                  .size().reset_index(name='count'))
+        for member, category, date, region, keyword, count in counts.itertuples(index=False):
+            cells = self.cells[(member or None, category)]
+            cell = cells.get((date, region))
+            if cell is None:
+                cell = cells[(date, region)] = SpaceSaving(self.capacity)
+            cell.add(keyword, int(count))
+
+    def merge(self, other):
+        for key, cells in other.cells.items():
+            for cell_key, cell in cells.items():
+                mine = self.cells[key].get(cell_key)
+                if mine is None:
+                    mine = self.cells[key][cell_key] = SpaceSaving(self.capacity)
+                mine.merge(cell)
+        return self
+
+    def summary(self, category, member=None, region=None, start=None, end=None):
+        """조건에 맞는 셀을 합친 SpaceSaving (format_top 에 그대로 넘길 수 있음)"""
+        merged = SpaceSaving(CAPACITY)
+        for (date, cell_region), cell in self.cells.get((member, category), {}).items():
+            if region is not None and cell_region != region:
+                continue
+            if (start and date < start) or (end and date > end):
+                continue
+            merged.merge(cell)
+        return merged
+
+    def top(self, category, k=5, **filters):
+        return self.summary(category, **filters).most_common(k)
@@ -0,0 +1,152 @@
+# kfantrix_videos.py - 영상별 참여 지표 조회 (정렬·필터·페이지)
+# 영상 테이블(video_engagement)은 수집 상태의 영상별 누적값으로 publish 때마다 갱신된다.
+# 여기서는 그 테이블을 Arrow 로 들고 컬럼별 정렬 순서를 한 번만 계산해 두고,
+# 필터 → 정렬 순서 → 페이지 슬라이스 뒤 해당 페이지 행만 pandas 로 바꾼다.
+# 영상이 수천 개여도 브라우저로는 한 페이지만 보낸다.
+
+import argparse
+import threading
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from kfantrix_cache import load_table, table_source
+from kfantrix_store import STORE_DIR
+
+PAGE_SIZE = 20
+SORT_COLUMNS = {
+    'comment_count': '댓글 수',
+    'unique_authors': '고유 작성자',
+    'total_likes': '좋아요',
+    'avg_likes': '평균 좋아요',
+    'mention_rate': '멤버 언급 비율',
+    'korean_rate': '한국어 비율',
+    'english_rate': '영어 비율',
+    'video_date': '게시일',
+    'last_comment': '최근 댓글'
+}
+COLUMN_LABELS = {
+    'video_id': '영상 ID',
+    'video_title': '제목',
+    'top_member': '최다 언급 멤버',
+    'top_member_count': '언급 수',
+    'top_keywords': '주요 키워드',
+    'first_comment': '첫 댓글',
+    **SORT_COLUMNS
+}
+
+
+# ============================================================
+# 인덱스
+# ============================================================
+class VideoIndex:
+    """영상 테이블 + 컬럼별 정렬 순서 캐시 (정렬은 컬럼·방향마다 처음 한 번만, 빈 값은 맨 뒤)"""
+
+    def __init__(self, table):
+        self.table = table
+        self._titles = pc.utf8_lower(table['video_title'].cast(pa.string()))
+        self._orders = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_frame(cls, df):
+        return cls(pa.Table.from_pandas(df, preserve_index=False))
+
+    def __len__(self):
+        return self.table.num_rows
+
+    def sort_columns(self):
+        """이 테이블에 있는 정렬 가능 컬럼 (이전 형식 CSV 에는 없는 컬럼이 있음)"""
+        return [c for c in SORT_COLUMNS if c in self.table.column_names]
+
+    def members(self):
+        values = self.table['top_member'].drop_null().unique().to_pylist()
+        return sorted(v for v in values if v)
+
+    def sort_order(self, column, ascending=False):
+        key = (column, ascending)
+        with self._lock:
+            if key not in self._orders:
+                self._orders[key] = pc.sort_indices(
+                    self.table, sort_keys=[(column, 'ascending' if ascending else 'descending'),
+                                           ('video_id', 'ascending')])
+            return self._orders[key]
+
+    def mask(self, search=None, member=None, min_comments=0, video_ids=None):
+        """필터 조건 → bool 배열 (조건이 없으면 None)"""
+        conditions = []
+        if search:
+            conditions.append(pc.match_substring(self._titles, search.lower()))
+        if member:
+            conditions.append(pc.equal(self.table['top_member'], member))
+        if min_comments:
+            conditions.append(pc.greater_equal(self.table['comment_count'], min_comments))
+        if video_ids:
+            conditions.append(pc.is_in(self.table['video_id'], pa.array(list(video_ids), pa.string())))
+        if not conditions:
+            return None
+        result = conditions[0]
+        for cond in conditions[1:]:
+            result = pc.and_kleene(result, cond)
+        return pc.fill_null(result, False)
+
+    def query(self, sort='comment_count', ascending=False, page=1, page_size=PAGE_SIZE, **filters):
+        """(페이지 DataFrame, 필터 후 전체 영상 수)"""
+        order = self.sort_order(sort, ascending)
+        mask = self.mask(**filters)
+        if mask is not None:
+            order = pc.filter(order, pc.take(mask, order))
+        total = len(order)
+        start = max(page - 1, 0) * page_size
+        rows = self.table.take(order[start:start + page_size]).to_pandas()
+        return rows, total
+
+    def totals(self, **filters):
+        """필터된 영상 전체 합계 (페이지와 무관)"""
+        mask = self.mask(**filters)
+        table = self.table if mask is None else self.table.filter(mask)
+        result = {'videos': table.num_rows, 'comments': int(pc.sum(table['comment_count']).as_py() or 0)}
+        if 'total_likes' in table.column_names:
+            result['likes'] = int(pc.sum(table['total_likes']).as_py() or 0)
+        return result
+
+
+def page_count(total, page_size=PAGE_SIZE):
+    return max(1, -(-total // page_size))
+
+
+def load_video_index(prefix, store_dir=STORE_DIR, src_dir='.'):
+    """저장소(없으면 CSV)의 영상 테이블 인덱스 (테이블이 없으면 None)"""
+    source, _ = table_source(prefix, 'video_engagement', store_dir, src_dir)
+    df = load_table(prefix, 'video_engagement', source, store_dir=store_dir, src_dir=src_dir)
+    return None if df is None else VideoIndex.from_frame(df)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='영상별 참여 지표 조회')
+    parser.add_argument('prefix', help='그룹 prefix (예: plave)')
+    parser.add_argument('--sort', default='comment_count', choices=list(SORT_COLUMNS))
+    parser.add_argument('--ascending', action='store_true')
+    parser.add_argument('--search', help='제목 검색어')
+    parser.add_argument('--member', help='최다 언급 멤버')
+    parser.add_argument('--min-comments', type=int, default=0)
+    parser.add_argument('--page', type=int, default=1)
+    parser.add_argument('--page-size', type=int, default=PAGE_SIZE)
+    parser.add_argument('--store-dir', default=STORE_DIR)
+    args = parser.parse_args()
+
+    index = load_video_index(args.prefix, args.store_dir)
+    if index is None:
+        parser.error(f'{args.prefix} 영상 테이블이 없습니다')
+    if args.sort not in index.sort_columns():
+        parser.error(f'{args.sort} 컬럼이 없습니다 (kfantrix_ingest.py 로 다시 집계하면 생성)')
+    rows, total = index.query(args.sort, args.ascending, args.page, args.page_size, search=args.search,
+                              member=args.member, min_comments=args.min_comments)
+    with pd.option_context('display.width', 200, 'display.max_colwidth', 40):
+        print(rows.to_string(index=False))
+    print(f'\n{total:,}개 중 {args.page}/{page_count(total, args.page_size)} 페이지')
+
+
+if __name__ == '__main__':
+    main()